@@ -0,0 +1,83 @@
+"""JSON response helpers for the options analytics API"""
+
+from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
+import orjson
+from django.http import HttpResponse, StreamingHttpResponse
+
+# NumPy arrays/scalars and datetimes are serialized natively by orjson
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC
+
+def _default(obj):
+    """Serialize types orjson does not handle natively"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def json_response(data, status=200):
+    """
+    Build a JSON HttpResponse using orjson
+    
+    Args:
+        data: Object to serialize (dicts, lists, NumPy values, datetimes, Decimals)
+        status: HTTP status code
+        
+    Returns:
+        HttpResponse with application/json content
+    """
+    return HttpResponse(
+        orjson.dumps(data, default=_default, option=ORJSON_OPTIONS),
+        content_type='application/json',
+        status=status
+    )
+
+def raw_json_response(payload, status=200):
+    """
+    Build an HttpResponse from an already-serialized JSON document
+    
+    Args:
+        payload: JSON text or bytes (e.g. built by Postgres json_agg)
+        status: HTTP status code
+        
+    Returns:
+        HttpResponse with application/json content
+    """
+    return HttpResponse(payload, content_type='application/json', status=status)
+
+def _iter_grouped_json(rows, key, groups):
+    """Yield the chunks of a {name: [rows...]} document from rows sorted by key"""
+    sides = groupby(rows, key=itemgetter(key))
+    current, members = next(sides, (None, ()))
+    
+    for i, (value, name) in enumerate(groups):
+        yield (b',' if i else b'{') + orjson.dumps(name) + b':['
+        if current == value:
+            for j, row in enumerate(members):
+                yield (b',' if j else b'') + orjson.dumps(row, default=_default, option=ORJSON_OPTIONS)
+            current, members = next(sides, (None, ()))
+        yield b']'
+    
+    yield b'}'
+
+def streaming_grouped_json_response(rows, key, groups, status=200):
+    """
+    Stream rows as a JSON object of arrays, one array per value of a grouping key
+    
+    Rows are serialized one at a time as the response is sent, so the full
+    document is never held in memory.
+    
+    Args:
+        rows: Iterable of dictionaries, sorted in the order of groups
+        key: Dictionary key the rows are grouped by
+        groups: Sequence of (key value, output array name) pairs
+        status: HTTP status code
+        
+    Returns:
+        StreamingHttpResponse with application/json content
+    """
+    return StreamingHttpResponse(
+        _iter_grouped_json(rows, key, groups),
+        content_type='application/json',
+        status=status
+    )
\ No newline at end of file
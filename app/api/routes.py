@@ -1,17 +1,43 @@
 """API endpoints for options analytics platform"""
 
-from django.http import JsonResponse
+from django.urls import path
 from django.views.decorators.http import require_http_methods
+from django.utils import timezone
 from app.services.options_service import OptionsService
 from app.services.metrics_service import MetricsService
+from app.api.json_utils import json_response, raw_json_response, streaming_grouped_json_response
 from app.utils.logging_utils import get_logger
 import json
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 logger = get_logger(__name__)
 options_service = OptionsService()
 metrics_service = MetricsService()
 
+def _end_of_day(now):
+    """Same day expiration"""
+    # Whole-second bound so repeated requests share a gamma_strike cache key
+    return now.replace(hour=23, minute=59, second=59, microsecond=0)
+
+def _end_of_week(now):
+    """Current week expiration"""
+    return _end_of_day(now + timedelta(days=7-now.weekday()))
+
+def _end_of_month(now):
+    """Current month expiration"""
+    if now.month < 12:
+        first_of_next = now.replace(month=now.month+1, day=1)
+    else:
+        first_of_next = now.replace(year=now.year+1, month=1, day=1)
+    return _end_of_day(first_of_next - timedelta(days=1))
+
+# Upper expiration bound for each gamma_exposure expiry_filter ('All' has none)
+_EXPIRY_BOUND = {
+    '0DTE': _end_of_day,
+    'Weekly': _end_of_week,
+    'Monthly': _end_of_month,
+}
+
 @require_http_methods(["GET"])
 def market_metrics(request):
     """
@@ -22,10 +48,10 @@ def market_metrics(request):
     """
     try:
         metrics = metrics_service.get_latest_metrics()
-        return JsonResponse(metrics)
+        return json_response(metrics)
     except Exception as e:
         logger.error(f"Error fetching market metrics: {str(e)}")
-        return JsonResponse({"error": "Failed to fetch market metrics"}, status=500)
+        return json_response({"error": "Failed to fetch market metrics"}, status=500)
 
 @require_http_methods(["GET"])
 def historical_metrics(request):
@@ -41,10 +67,10 @@ def historical_metrics(request):
     try:
         days = int(request.GET.get('days', 7))
         metrics = metrics_service.get_historical_metrics(days=days)
-        return JsonResponse({"data": metrics})
+        return json_response({"data": metrics})
     except Exception as e:
         logger.error(f"Error fetching historical metrics: {str(e)}")
-        return JsonResponse({"error": "Failed to fetch historical metrics"}, status=500)
+        return json_response({"error": "Failed to fetch historical metrics"}, status=500)
 
 @require_http_methods(["GET"])
 def gamma_exposure(request):
@@ -54,6 +80,7 @@ def gamma_exposure(request):
     Query params:
         expiry_filter: Filter by expiry date (All, 0DTE, Weekly, Monthly)
         timestamp: Optional specific timestamp
+        layout: 'records' (default) or 'soa' for parallel per-column arrays
     
     Returns:
         JSON response with gamma exposure data
@@ -61,33 +88,18 @@ def gamma_exposure(request):
     try:
         expiry_filter = request.GET.get('expiry_filter', 'All')
         timestamp = request.GET.get('timestamp', None)
+        layout = 'soa' if request.GET.get('layout') == 'soa' else 'records'
         
-        data = options_service.get_gamma_exposure_by_strike(timestamp=timestamp)
+        # Convert filter to an upper bound on expiration date, applied in SQL
+        bound = _EXPIRY_BOUND.get(expiry_filter)
+        end_date = bound(timezone.localtime()) if bound else None
         
-        # Apply expiry filter if needed
-        if expiry_filter != 'All':
-            # Convert filter to appropriate date range
-            now = datetime.now()
-            
-            if expiry_filter == '0DTE':
-                # Same day expiration
-                end_date = now.replace(hour=23, minute=59, second=59)
-                data = [item for item in data if item['expiration_date'] <= end_date.isoformat()]
-            elif expiry_filter == 'Weekly':
-                # Current week expiration
-                end_date = now + timedelta(days=7-now.weekday())
-                data = [item for item in data if item['expiration_date'] <= end_date.isoformat()]
-            elif expiry_filter == 'Monthly':
-                # Current month expiration
-                end_date = now.replace(month=now.month+1 if now.month < 12 else 1, 
-                                     year=now.year if now.month < 12 else now.year+1, 
-                                     day=1) - timedelta(days=1)
-                data = [item for item in data if item['expiration_date'] <= end_date.isoformat()]
+        data = options_service.get_gamma_exposure_by_strike(timestamp=timestamp, expiry_end=end_date, layout=layout)
         
-        return JsonResponse(data, safe=False)
+        return json_response(data)
     except Exception as e:
         logger.error(f"Error fetching gamma exposure: {str(e)}")
-        return JsonResponse({"error": "Failed to fetch gamma exposure data"}, status=500)
+        return json_response({"error": "Failed to fetch gamma exposure data"}, status=500)
 
 @require_http_methods(["GET"])
 def gamma_by_expiry(request):
@@ -106,10 +118,10 @@ def gamma_by_expiry(request):
         timestamp = request.GET.get('timestamp', None)
         
         data = options_service.get_gamma_by_expiry(timestamp=timestamp, limit=limit)
-        return JsonResponse(data, safe=False)
+        return json_response(data)
     except Exception as e:
         logger.error(f"Error fetching gamma by expiry: {str(e)}")
-        return JsonResponse({"error": "Failed to fetch gamma by expiry data"}, status=500)
+        return json_response({"error": "Failed to fetch gamma by expiry data"}, status=500)
 
 @require_http_methods(["GET"])
 def highest_gamma_strikes(request):
@@ -128,10 +140,87 @@ def highest_gamma_strikes(request):
         timestamp = request.GET.get('timestamp', None)
         
         data = options_service.get_highest_gamma_strikes(timestamp=timestamp, limit=limit)
-        return JsonResponse(data, safe=False)
+        return json_response(data)
     except Exception as e:
         logger.error(f"Error fetching highest gamma strikes: {str(e)}")
-        return JsonResponse({"error": "Failed to fetch highest gamma strikes data"}, status=500)
+        return json_response({"error": "Failed to fetch highest gamma strikes data"}, status=500)
+
+@require_http_methods(["GET"])
+def dashboard_snapshot(request):
+    """
+    API endpoint to get gamma by strike, by expiry and highest strikes together
+    
+    Query params:
+        limit: Number of records for the by-expiry and highest-strike lists (default: 10)
+        timestamp: Optional specific timestamp
+    
+    Returns:
+        JSON response with by_strike, by_expiry and top gamma data
+    """
+    try:
+        limit = int(request.GET.get('limit', 10))
+        timestamp = request.GET.get('timestamp', None)
+        
+        data = options_service.get_dashboard_snapshot(timestamp=timestamp, top_n=limit)
+        return json_response(data)
+    except Exception as e:
+        logger.error(f"Error fetching dashboard snapshot: {str(e)}")
+        return json_response({"error": "Failed to fetch dashboard snapshot"}, status=500)
+
+@require_http_methods(["GET"])
+def gamma_profile(request):
+    """
+    API endpoint to get gamma by strike, highest strikes and gamma levels together
+    
+    Query params:
+        limit: Number of highest gamma strikes to return (default: 10)
+        timestamp: Optional specific timestamp
+        layout: 'records' (default) or 'soa' for by_strike as parallel arrays
+    
+    Returns:
+        JSON response with by_strike, top and levels gamma data
+    """
+    try:
+        limit = int(request.GET.get('limit', 10))
+        timestamp = request.GET.get('timestamp', None)
+        layout = 'soa' if request.GET.get('layout') == 'soa' else 'records'
+        
+        data = options_service.get_gamma_profile(timestamp=timestamp, top_n=limit, layout=layout)
+        return json_response(data)
+    except Exception as e:
+        logger.error(f"Error fetching gamma profile: {str(e)}")
+        return json_response({"error": "Failed to fetch gamma profile"}, status=500)
+
+@require_http_methods(["GET"])
+def options_chain(request):
+    """
+    API endpoint to get the calls and puts for one expiry
+    
+    Query params:
+        expiry_date: Optional ISO expiration datetime (default: nearest expiry)
+        timestamp: Optional specific timestamp
+        stream: 'true' to stream {"calls": [...], "puts": [...]} row by row, uncached
+    
+    Returns:
+        JSON response with the options chain
+    """
+    try:
+        expiry_date = request.GET.get('expiry_date', None)
+        timestamp = request.GET.get('timestamp', None)
+        
+        # Large chains can be streamed instead of built and cached whole
+        if request.GET.get('stream') == 'true':
+            contracts = options_service.iter_options_chain(expiry_date=expiry_date, timestamp=timestamp)
+            return streaming_grouped_json_response(
+                contracts, 'option_type', (('CALL', 'calls'), ('PUT', 'puts'))
+            )
+        
+        # Already serialized by the database
+        payload = options_service.get_options_chain_json(expiry_date=expiry_date, timestamp=timestamp)
+        return raw_json_response(payload)
+    except Exception as e:
+        logger.error(f"Error fetching options chain: {str(e)}")
+        return json_response({"error": "Failed to fetch options chain"}, status=500)
 
 @require_http_methods(["GET"])
 def options_data(request):
@@ -149,23 +238,22 @@ def options_data(request):
         expiry_filter = request.GET.get('expiry_filter', None)
         timestamp = request.GET.get('timestamp', None)
         
-        data = options_service.get_options_data(timestamp=timestamp, expiry_filter=expiry_filter)
-        return JsonResponse(data)
+        # Already serialized by the database
+        payload = options_service.get_options_data(timestamp=timestamp, expiry_filter=expiry_filter)
+        return raw_json_response(payload)
     except Exception as e:
         logger.error(f"Error fetching options data: {str(e)}")
-        return JsonResponse({"error": "Failed to fetch options data"}, status=500)
+        return json_response({"error": "Failed to fetch options data"}, status=500)
 
-def api_urls():
-    """
-    Define API URLs for inclusion in Django URLconf
-    """
-    from django.urls import path
-    
-    return [
-        path('market-metrics/', market_metrics, name='market_metrics'),
-        path('historical-metrics/', historical_metrics, name='historical_metrics'),
-        path('gamma-exposure/', gamma_exposure, name='gamma_exposure'),
-        path('gamma-by-expiry/', gamma_by_expiry, name='gamma_by_expiry'),
-        path('highest-gamma-strikes/', highest_gamma_strikes, name='highest_gamma_strikes'),
-        path('options-data/', options_data, name='options_data'),
-    ]
\ No newline at end of file
+# API URLs for inclusion in Django URLconf
+api_urls = [
+    path('market-metrics/', market_metrics, name='market_metrics'),
+    path('historical-metrics/', historical_metrics, name='historical_metrics'),
+    path('gamma-exposure/', gamma_exposure, name='gamma_exposure'),
+    path('gamma-by-expiry/', gamma_by_expiry, name='gamma_by_expiry'),
+    path('highest-gamma-strikes/', highest_gamma_strikes, name='highest_gamma_strikes'),
+    path('dashboard-snapshot/', dashboard_snapshot, name='dashboard_snapshot'),
+    path('gamma-profile/', gamma_profile, name='gamma_profile'),
+    path('options-chain/', options_chain, name='options_chain'),
+    path('options-data/', options_data, name='options_data'),
+]
\ No newline at end of file
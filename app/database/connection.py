@@ -1,38 +1,79 @@
 """Database connection utilities for the options analytics platform"""
 
 import psycopg2
-from psycopg2.extras import execute_values
-import os
+import psycopg2.extensions
+import psycopg2.extras
+from psycopg2.pool import ThreadedConnectionPool
+import threading
+from contextlib import contextmanager
 from django.conf import settings
+from django.db import connection as django_connection
 from app.utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
 
-def create_db_connection():
+# NUMERIC -> float typecaster for read-only analytics cursors; ingest keeps Decimal
+NUMERIC_AS_FLOAT = psycopg2.extensions.new_type(
+    psycopg2.extensions.DECIMAL.values,
+    'NUMERIC_AS_FLOAT',
+    lambda value, cursor: float(value) if value is not None else None
+)
+
+# Shared connection pool, built lazily on first checkout
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+def _get_pool():
     """
-    Create and return a connection to TimescaleDB database
+    Return the process-wide connection pool, creating it on first use
+    
+    Returns:
+        ThreadedConnectionPool shared by all callers in this process
+    """
+    global _POOL
+    
+    # Fast path once the pool exists
+    if _POOL is not None:
+        return _POOL
+    
+    with _POOL_LOCK:
+        # Another thread may have built the pool while we waited
+        if _POOL is None:
+            # Get DB config from settings
+            db_config = settings.DATABASES['default']
+            
+            _POOL = ThreadedConnectionPool(
+                minconn=getattr(settings, 'DB_POOL_MIN_SIZE', 1),
+                maxconn=getattr(settings, 'DB_POOL_SIZE', 10),
+                dbname=db_config['NAME'],
+                user=db_config['USER'],
+                password=db_config['PASSWORD'],
+                host=db_config['HOST'],
+                port=db_config['PORT']
+            )
+            logger.debug("Database connection pool created")
+    
+    return _POOL
+
+def create_db_connection(autocommit=True):
+    """
+    Check out a connection to TimescaleDB database from the shared pool
     using settings from Django settings or environment variables
     
+    Args:
+        autocommit: Whether the checked-out connection runs in autocommit mode.
+            Pass False when the caller manages its own transaction.
+    
     Returns:
-        Connection object to database
+        Connection object to database (return it with close_connection)
     """
     try:
-        # Get DB config from settings
-        db_config = settings.DATABASES['default']
+        connection = _get_pool().getconn()
         
-        # Create connection with these parameters
-        connection = psycopg2.connect(
-            dbname=db_config['NAME'],
-            user=db_config['USER'],
-            password=db_config['PASSWORD'],
-            host=db_config['HOST'],
-            port=db_config['PORT']
-        )
+        # Autocommit is per checkout since pooled connections are shared
+        connection.autocommit = autocommit
         
-        # Set autocommit mode to True
-        connection.autocommit = True
-        
-        logger.debug("Database connection established successfully")
+        logger.debug("Database connection checked out from pool")
         return connection
         
     except psycopg2.Error as e:
@@ -59,10 +100,10 @@ def create_cursor(connection):
 
 def close_connection(connection, cursor=None):
     """
-    Safely close database connection and cursor
+    Safely close cursor and return the connection to the pool
     
     Args:
-        connection: Database connection to close
+        connection: Database connection to return
         cursor: Optional cursor to close
     """
     try:
@@ -71,10 +112,41 @@ def close_connection(connection, cursor=None):
             cursor.close()
             logger.debug("Database cursor closed")
             
-        # Close connection
+        # Return connection to the pool; broken connections are discarded
         if connection is not None:
-            connection.close()
-            logger.debug("Database connection closed")
+            _get_pool().putconn(connection, close=bool(connection.closed))
+            logger.debug("Database connection returned to pool")
             
     except psycopg2.Error as e:
-        logger.error(f"Error closing database connection: {str(e)}")
\ No newline at end of file
+        logger.error(f"Error closing database connection: {str(e)}")
+
+def close_pool():
+    """
+    Close every pooled connection, e.g. on process shutdown
+    """
+    global _POOL
+    
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.closeall()
+            _POOL = None
+            logger.debug("Database connection pool closed")
+
+@contextmanager
+def analytics_cursor(chunked=False):
+    """
+    Open a cursor on Django's connection that returns NUMERIC columns as float
+    
+    The typecaster is registered on this cursor only, so other queries on the
+    same connection still get Decimal values.
+    
+    Args:
+        chunked: Use a server-side cursor so large results are fetched in batches
+    
+    Yields:
+        Django cursor wrapper
+    """
+    cursor_factory = django_connection.chunked_cursor if chunked else django_connection.cursor
+    with cursor_factory() as cursor:
+        psycopg2.extensions.register_type(NUMERIC_AS_FLOAT, cursor.cursor)
+        yield cursor
\ No newline at end of file
@@ -1,6 +1,6 @@
 """Database package initialization for LeafSense options analytics platform"""
 
-from app.database.connection import create_db_connection, create_cursor, close_connection
+from app.database.connection import create_db_connection, create_cursor, close_connection, close_pool
 from app.database.schema import initialize_database
 
 # Define publicly available imports
@@ -8,5 +8,6 @@ __all__ = [
     'create_db_connection',
     'create_cursor', 
     'close_connection',
+    'close_pool',
     'initialize_database'
 ]
\ No newline at end of file
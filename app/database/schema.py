@@ -1,19 +1,87 @@
 """Database schema definition for TimescaleDB"""
 
 import logging
-from app.database.connection import create_db_connection
+from django.conf import settings
+from app.database.connection import create_db_connection, close_connection
 
 logger = logging.getLogger("options_etl.schema")
 
+def _migrate_options_data_types(cursor, dry_run=False):
+    """
+    Convert an options_data table created with VARCHAR symbol/option_type
+    columns to the symbols id and option_side types used by the ETL and readers
+    
+    The continuous aggregate depending on those columns is dropped, and
+    compressed chunks are decompressed first; initialize_database recreates
+    both afterwards. Safe to run repeatedly: converted tables are left alone.
+    
+    Args:
+        cursor: Cursor on an autocommit connection
+        dry_run: Log the conversion statements instead of executing them
+        
+    Returns:
+        True if any column was converted
+    """
+    cursor.execute("""
+    SELECT column_name, udt_name FROM information_schema.columns
+    WHERE table_schema = current_schema() AND table_name = 'options_data'
+        AND column_name IN ('symbol', 'option_type');
+    """)
+    column_types = dict(cursor.fetchall())
+    convert_symbol = column_types.get('symbol') == 'varchar'
+    convert_side = column_types.get('option_type') == 'varchar'
+    if not (convert_symbol or convert_side):
+        return False
+    
+    logger.info("Converting options_data symbol/option_type columns to narrow types")
+    
+    cursor.execute("""
+    SELECT compression_enabled FROM timescaledb_information.hypertables
+    WHERE hypertable_name = 'options_data';
+    """)
+    row = cursor.fetchone()
+    
+    # Sent as one query string, so the conversion commits or rolls back as a whole
+    statements = ["DROP MATERIALIZED VIEW IF EXISTS gamma_by_strike_5m;"]
+    if row and row[0]:
+        statements += [
+            "SELECT remove_compression_policy('options_data', if_exists => TRUE);",
+            "SELECT decompress_chunk(c, if_not_compressed => TRUE) FROM show_chunks('options_data') c;",
+            "ALTER TABLE options_data SET (timescaledb.compress = false);",
+        ]
+    if convert_symbol:
+        # USING cannot contain a subquery, so the code -> id lookup goes through a function
+        statements += [
+            "INSERT INTO symbols (code) SELECT DISTINCT symbol FROM options_data ON CONFLICT (code) DO NOTHING;",
+            """CREATE OR REPLACE FUNCTION pg_temp.symbol_id(symbol_code text) RETURNS smallint
+                LANGUAGE sql STABLE AS 'SELECT id FROM symbols WHERE code = symbol_code';""",
+            "ALTER TABLE options_data ALTER COLUMN symbol TYPE SMALLINT USING pg_temp.symbol_id(symbol);",
+            "ALTER TABLE options_data ADD FOREIGN KEY (symbol) REFERENCES symbols (id);",
+        ]
+    if convert_side:
+        statements.append(
+            "ALTER TABLE options_data ALTER COLUMN option_type TYPE option_side USING option_type::option_side;"
+        )
+    if dry_run:
+        logger.warning("DB_MIGRATION_DRY_RUN is set; options_data conversion not executed:\n" + "\n".join(statements))
+        return False
+    cursor.execute("\n".join(statements))
+    return True
+
 def initialize_database():
     """
     Initialize the TimescaleDB database with the necessary tables and hypertables.
     This should be run once to set up the database.
     
     Creates:
+        - symbols lookup table and option_side enum
         - market_metrics table/hypertable
         - options_data table/hypertable
         - Indexes for optimized queries
+        - gex_snapshot per-strike summary table/hypertable
+        - options_snapshot_summary per-snapshot gamma summary table/hypertable
+        - Compression policies for chunks older than one day
+        - gamma_by_strike_5m continuous aggregate
         - Views for common queries (like latest metrics)
     """
     conn = create_db_connection()
@@ -36,19 +104,37 @@ def initialize_database():
         );
         """)
         
+        # Narrow key types for options_data: an enum for the option side and a
+        # SMALLINT lookup for the underlying symbol
+        cursor.execute("""
+        DO $$ BEGIN
+            CREATE TYPE option_side AS ENUM ('CALL', 'PUT');
+        EXCEPTION
+            WHEN duplicate_object THEN NULL;
+        END $$;
+        """)
+        
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS symbols (
+            id SMALLSERIAL PRIMARY KEY,
+            code VARCHAR(10) NOT NULL UNIQUE
+        );
+        INSERT INTO symbols (code) VALUES ('_SPX') ON CONFLICT (code) DO NOTHING;
+        """)
+        
         # Create options_data table for the filtered options data
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS options_data (
             timestamp TIMESTAMPTZ NOT NULL,
-            symbol VARCHAR(10) NOT NULL,
-            option_type VARCHAR(4) NOT NULL,  -- 'CALL' or 'PUT'
+            symbol SMALLINT NOT NULL REFERENCES symbols (id),
+            option_type option_side NOT NULL,
             option_symbol VARCHAR(50) NOT NULL,
             expiration_date TIMESTAMPTZ NOT NULL,
             strike_price NUMERIC NOT NULL,
             iv NUMERIC,
             delta NUMERIC,
             gamma NUMERIC,
-            open_interest INTEGER,
+            open_interest INTEGER,  -- SPX open interest and volume overflow SMALLINT's 32767
             volume INTEGER,
             gamma_exposure NUMERIC,
             time_till_exp NUMERIC,
@@ -56,22 +142,144 @@ def initialize_database():
         );
         """)
         
-        # Convert tables to hypertables
+        # Tables created before the narrow key types still have VARCHAR columns
+        options_data_migrated = _migrate_options_data_types(
+            cursor, dry_run=getattr(settings, 'DB_MIGRATION_DRY_RUN', False)
+        )
+        
+        # Convert tables to hypertables. Six hour chunks keep a trading session
+        # together so each compressed chunk holds many snapshots per segment.
+        for table in ('market_metrics', 'options_data'):
+            cursor.execute(f"""
+            SELECT create_hypertable('{table}', 'timestamp',
+                chunk_time_interval => INTERVAL '6 hours', if_not_exists => TRUE);
+            """)
+            # Applies to new chunks on hypertables created before this setting existed
+            cursor.execute(f"SELECT set_chunk_time_interval('{table}', INTERVAL '6 hours');")
+        
+        # Enable native compression for chunks older than a day. Primary key columns
+        # must appear in segmentby/orderby, hence option_symbol in the ordering.
+        compression_settings = {
+            'market_metrics': ("symbol", "timestamp DESC"),
+            'options_data': ("symbol,option_type", "timestamp DESC, strike_price, option_symbol"),
+        }
+        for table, (segmentby, orderby) in compression_settings.items():
+            cursor.execute("""
+            SELECT compression_enabled FROM timescaledb_information.hypertables
+            WHERE hypertable_name = %s;
+            """, (table,))
+            row = cursor.fetchone()
+            if not (row and row[0]):
+                cursor.execute(f"""
+                ALTER TABLE {table} SET (
+                    timescaledb.compress,
+                    timescaledb.compress_segmentby = '{segmentby}',
+                    timescaledb.compress_orderby = '{orderby}'
+                );
+                """)
+            cursor.execute(f"""
+            SELECT add_compression_policy('{table}', INTERVAL '1 day', if_not_exists => TRUE);
+            """)
+        
+        # Per-strike gamma exposure summary written by the ETL loader for each
+        # snapshot, so unfiltered by-strike reads are a point lookup
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS gex_snapshot (
+            ts TIMESTAMPTZ NOT NULL,
+            symbol SMALLINT NOT NULL REFERENCES symbols (id),
+            strike_price NUMERIC NOT NULL,
+            call_gex NUMERIC,
+            put_gex NUMERIC,
+            gex NUMERIC,
+            oi NUMERIC,
+            earliest_expiry TIMESTAMPTZ,
+            latest_expiry TIMESTAMPTZ,
+            PRIMARY KEY (ts, symbol, strike_price)
+        );
+        """)
+        
         cursor.execute("""
-        SELECT create_hypertable('market_metrics', 'timestamp', if_not_exists => TRUE);
+        SELECT create_hypertable('gex_snapshot', 'ts', if_not_exists => TRUE);
         """)
         
+        # One row of headline gamma figures per snapshot, also written by the ETL
+        # loader, so the summary and levels endpoints are a primary-key lookup
         cursor.execute("""
-        SELECT create_hypertable('options_data', 'timestamp', if_not_exists => TRUE);
+        CREATE TABLE IF NOT EXISTS options_snapshot_summary (
+            ts TIMESTAMPTZ NOT NULL,
+            symbol SMALLINT NOT NULL REFERENCES symbols (id),
+            total_gamma NUMERIC,
+            near_term_gamma NUMERIC,
+            mid_term_gamma NUMERIC,
+            long_term_gamma NUMERIC,
+            zero_gamma_level NUMERIC,
+            top_positive_strikes NUMERIC[],
+            top_negative_strikes NUMERIC[],
+            PRIMARY KEY (ts, symbol)
+        );
+        """)
+        
+        cursor.execute("""
+        SELECT create_hypertable('options_snapshot_summary', 'ts', if_not_exists => TRUE);
         """)
         
         # Create indexes for faster queries
         cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_mm_symbol ON market_metrics (symbol, timestamp DESC);
+        DROP INDEX IF EXISTS idx_mm_symbol;
+        CREATE INDEX IF NOT EXISTS idx_mm_symbol_cover ON market_metrics (symbol, timestamp DESC)
+            INCLUDE (spot_price, prev_day_close, price_change, price_change_pct);
         CREATE INDEX IF NOT EXISTS idx_od_symbol_expiry ON options_data (symbol, expiration_date, timestamp DESC);
         CREATE INDEX IF NOT EXISTS idx_od_strike ON options_data (strike_price);
         """)
         
+        # Covering indexes for the per-snapshot API aggregates (index-only scans)
+        cursor.execute("""
+        DROP INDEX IF EXISTS idx_od_snapshot;
+        CREATE INDEX IF NOT EXISTS idx_od_snapshot_expiry ON options_data (symbol, timestamp DESC, expiration_date)
+            INCLUDE (option_type, strike_price, gamma_exposure, open_interest);
+        CREATE INDEX IF NOT EXISTS idx_od_gex_abs ON options_data (symbol, timestamp DESC, (abs(gamma_exposure)) DESC);
+        """)
+        
+        # Highest-gamma strikes read gex_snapshot in ABS(gex) DESC NULLS LAST order,
+        # so the top-K is an index-only range scan that stops after LIMIT rows
+        cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_gex_snapshot_abs ON gex_snapshot (symbol, ts DESC, (abs(gex)) DESC NULLS LAST)
+            INCLUDE (strike_price, gex);
+        """)
+        
+        # Continuous aggregate of gamma exposure per strike/expiry in 5 minute buckets.
+        # ETL snapshots are at least this far apart, so each bucket holds one snapshot.
+        cursor.execute("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS gamma_by_strike_5m
+        WITH (timescaledb.continuous) AS
+        SELECT
+            symbol,
+            time_bucket('5 minutes', timestamp) AS bucket,
+            strike_price,
+            expiration_date,
+            SUM(CASE WHEN option_type = 'CALL' THEN gamma_exposure ELSE 0 END) AS call_gex,
+            SUM(CASE WHEN option_type = 'PUT' THEN gamma_exposure ELSE 0 END) AS put_gex,
+            SUM(gamma_exposure) AS gex,
+            SUM(CASE WHEN option_type = 'CALL' THEN open_interest ELSE 0 END) AS call_oi,
+            SUM(CASE WHEN option_type = 'PUT' THEN open_interest ELSE 0 END) AS put_oi,
+            SUM(open_interest) AS oi
+        FROM options_data
+        GROUP BY symbol, bucket, strike_price, expiration_date
+        WITH NO DATA;
+        """)
+        
+        cursor.execute("""
+        SELECT add_continuous_aggregate_policy('gamma_by_strike_5m',
+            start_offset => INTERVAL '1 day',
+            end_offset => INTERVAL '5 minutes',
+            schedule_interval => INTERVAL '5 minutes',
+            if_not_exists => TRUE);
+        """)
+        
+        if options_data_migrated:
+            # The aggregate was recreated empty; backfill it from the converted history
+            cursor.execute("CALL refresh_continuous_aggregate('gamma_by_strike_5m', NULL, NULL);")
+        
         # Create a view for latest market metrics
         cursor.execute("""
         CREATE OR REPLACE VIEW latest_market_metrics AS
@@ -85,5 +293,4 @@ def initialize_database():
         logger.error(f"Database initialization error: {e}")
         raise
     finally:
-        cursor.close()
-        conn.close()
\ No newline at end of file
+        close_connection(conn, cursor)
\ No newline at end of file
@@ -2,92 +2,165 @@
 
 import requests
 import logging
-import time
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.conf import settings
+from django.core.cache import cache
+from app.utils.cache_utils import upstream_validators_cache_key
 from app.utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
 
-def fetch_spx_options_data(api_url=None):
+# Request headers sent with every API call
+_HEADERS = {
+    'User-Agent': 'LeafSense Options Analytics/1.0',
+    'Accept': 'application/json'
+}
+
+def build_api_url(symbol=None):
+    """
+    Build the CBOE delayed quotes URL for a symbol
+    
+    Args:
+        symbol: Symbol to fetch (defaults to settings.API_DEFAULT_SYMBOL)
+        
+    Returns:
+        URL of the symbol's options JSON
+    """
+    if symbol is None:
+        symbol = getattr(settings, 'API_DEFAULT_SYMBOL', '_SPX')
+    base_url = getattr(settings, 'API_BASE_URL', 'https://cdn.cboe.com/api/global/delayed_quotes/options/')
+    if not symbol.endswith('.json'):
+        symbol += '.json'
+    return f"{base_url}{symbol}"
+
+def _build_session():
+    """
+    Build the HTTP session used for API requests
+    
+    Connections are kept alive between ETL cycles and transient failures
+    are retried by urllib3 with exponential backoff.
+    
+    Returns:
+        Configured requests.Session
+    """
+    retry = Retry(
+        total=3,
+        backoff_factor=2,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=8, max_retries=retry)
+    
+    session = requests.Session()
+    session.headers.update(_HEADERS)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+_SESSION = _build_session()
+
+def _remember_validators(api_url, response):
+    """Store the response's ETag/Last-Modified as headers for the next conditional request"""
+    validators = {}
+    if response.headers.get('ETag'):
+        validators['If-None-Match'] = response.headers['ETag']
+    if response.headers.get('Last-Modified'):
+        validators['If-Modified-Since'] = response.headers['Last-Modified']
+    if validators:
+        cache.set(upstream_validators_cache_key(api_url), validators, None)
+
+def forget_upstream_validators(api_url=None):
+    """
+    Drop the stored validators so the next conditional fetch downloads the payload
+    
+    Args:
+        api_url: URL for CBOE options data API
+    """
+    if api_url is None:
+        api_url = build_api_url()
+    cache.delete(upstream_validators_cache_key(api_url))
+
+def fetch_spx_options_data(api_url=None, conditional=False):
     """
     Fetches SPX options data from CBOE API with retry logic
     
     Args:
         api_url: URL for CBOE options data API
+        conditional: Send the validators of the last fetch and return None
+            if the API answers 304 Not Modified
         
     Returns:
-        JSON response from API
+        JSON response from API, or None if unchanged
         
     Raises:
         Exception if data fetch fails after retries
     """
     # Set default API URL if none provided
     if api_url is None:
-        symbol = getattr(settings, 'API_DEFAULT_SYMBOL', '_SPX')
-        base_url = getattr(settings, 'API_BASE_URL', 'https://cdn.cboe.com/api/global/delayed_quotes/options/')
-        if not symbol.endswith('.json'):
-            symbol += '.json'
-        api_url = f"{base_url}{symbol}"
-    
-    # Implement retry logic (3 attempts)
-    max_retries = 3
-    retry_delay = 5  # seconds
+        api_url = build_api_url()
     
-    for attempt in range(max_retries):
-        try:
-            logger.info(f"Fetching options data from {api_url} (attempt {attempt + 1}/{max_retries})")
-            
-            # Make the request with appropriate headers
-            headers = {
-                'User-Agent': 'LeafSense Options Analytics/1.0',
-                'Accept': 'application/json'
-            }
-            
-            response = requests.get(api_url, headers=headers, timeout=30)
-            
-            # Handle HTTP errors
-            response.raise_for_status()
-            
-            # Parse JSON data
-            data = response.json()
-            
-            logger.info(f"Successfully fetched options data: {len(data)} bytes")
-            return data
-            
-        except requests.exceptions.RequestException as e:
-            logger.warning(f"Request failed (attempt {attempt + 1}/{max_retries}): {str(e)}")
-            
-            if attempt < max_retries - 1:
-                logger.info(f"Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-            else:
-                logger.error(f"Failed to fetch options data after {max_retries} attempts")
-                raise Exception(f"Failed to fetch options data: {str(e)}")
+    try:
+        logger.info(f"Fetching options data from {api_url}")
+        
+        # Default headers live on the session; only the validators vary per request
+        headers = None
+        if conditional:
+            headers = cache.get(upstream_validators_cache_key(api_url))
+        
+        # Retries are handled by the session's adapter
+        response = _SESSION.get(api_url, headers=headers, timeout=30)
         
-        except ValueError as e:
-            logger.error(f"Invalid JSON response: {str(e)}")
-            raise Exception(f"Invalid JSON response: {str(e)}")
+        if conditional and response.status_code == 304:
+            logger.info("Options data not modified since last fetch")
+            return None
+        
+        # Handle HTTP errors
+        response.raise_for_status()
+        
+        # Parse JSON data (orjson.JSONDecodeError subclasses ValueError)
+        data = orjson.loads(response.content)
+        
+        if conditional:
+            _remember_validators(api_url, response)
+        
+        logger.info(f"Successfully fetched options data: {len(response.content)} bytes")
+        return data
+        
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Failed to fetch options data after retries: {str(e)}")
+        raise Exception(f"Failed to fetch options data: {str(e)}")
+    
+    except ValueError as e:
+        logger.error(f"Invalid JSON response: {str(e)}")
+        raise Exception(f"Invalid JSON response: {str(e)}")
 
-def fetch_market_data():
+def fetch_market_data(options_data=None):
     """
     Fetch additional market data from other sources if needed
 
+    Args:
+        options_data: Already-fetched options API payload; fetched if not provided
+
     Returns:
         Dictionary with market data
     """
     try:
         # For now, we'll extract market data from the options API response.
         # This could be expanded to fetch from additional sources as needed.
-        options_data = fetch_spx_options_data()
+        if options_data is None:
+            options_data = fetch_spx_options_data()
         
-        # Safely get the data dictionary; adjust key names as appropriate.
+        # Underlying quote fields live alongside the options chain under "data"
         data = options_data.get("data", {})
+        
         market_data = {
-            "symbol": options_data.get("symbol", "_SPX"),
-            "spot_price": float(data.get("current_price", [0])),
-            "prev_day_close": float(data.get("prev_day_close", [0])),
-            "price_change": float(data.get("price_change", [0])),
-            "price_change_pct": float(data.get("price_change_percent", [0])),
+            "symbol": data.get("symbol", "_SPX"),
+            "spot_price": float(data.get("current_price") or 0),
+            "prev_day_close": float(data.get("prev_day_close") or 0),
+            "price_change": float(data.get("price_change") or 0),
+            "price_change_pct": float(data.get("price_change_percent") or 0),
         }
         
         logger.info(f"Market data fetched successfully for {market_data['symbol']}")
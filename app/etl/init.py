@@ -2,7 +2,7 @@
 
 from app.etl.fetch import fetch_spx_options_data, fetch_market_data
 from app.etl.process import process_options_data, filter_options_by_range, calculate_gamma_exposure
-from app.etl.load import transform_options_data, load_market_metrics, load_options_data
+from app.etl.load import transform_options_data, load_market_metrics, load_options_data, load_etl_tick
 from app.etl.run import etl_process, run_etl
 
 # Define publicly available imports
@@ -20,6 +20,7 @@ __all__ = [
     'transform_options_data',
     'load_market_metrics',
     'load_options_data',
+    'load_etl_tick',
     
     # Runner functions
     'etl_process',
@@ -1,73 +1,436 @@
 """Data loading functions for options analytics database"""
 
+import csv
+import io
+import os
+from itertools import repeat
+import numpy as np
+import pandas as pd
 from psycopg2.extras import execute_values
+from django.conf import settings
+from django.core.cache import cache
 from app.database.connection import create_db_connection, create_cursor, close_connection
+from app.utils.cache_utils import latest_metrics_cache_key, last_snapshot_cache_key, invalidate_snapshot_cache
 from app.utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
 
+# Column order of options_data rows produced by transform_options_data
+OPTIONS_COLUMNS = (
+    'timestamp', 'symbol', 'option_type', 'option_symbol', 'expiration_date',
+    'strike_price', 'iv', 'delta', 'gamma', 'open_interest', 'volume',
+    'gamma_exposure', 'time_till_exp'
+)
+
+# Row template for the options_data columns used by execute_values
+OPTIONS_ROW_TEMPLATE = "(" + ",".join(["%s"] * len(OPTIONS_COLUMNS)) + ")"
+
+# Upsert clause shared by the INSERT and COPY load paths
+OPTIONS_UPSERT_CLAUSE = """
+ON CONFLICT (timestamp, option_symbol) 
+DO UPDATE SET 
+    iv = EXCLUDED.iv,
+    delta = EXCLUDED.delta,
+    gamma = EXCLUDED.gamma,
+    open_interest = EXCLUDED.open_interest,
+    volume = EXCLUDED.volume,
+    gamma_exposure = EXCLUDED.gamma_exposure
+"""
+
+# Positions of the snapshot timestamp and symbol code (stored as a symbols.id) in transformed rows
+_TIMESTAMP_INDEX = OPTIONS_COLUMNS.index('timestamp')
+_SYMBOL_INDEX = OPTIONS_COLUMNS.index('symbol')
+
+# Cache of symbol code -> symbols.id (ids never change once assigned)
+_SYMBOL_IDS = {}
+
+def _get_symbol_id(cursor, code):
+    """
+    Resolve a symbol code to its SMALLINT id in the symbols table
+    
+    Args:
+        cursor: Database cursor
+        code: Symbol code (e.g. '_SPX')
+        
+    Returns:
+        Integer symbol id, registering the code if it is new
+    """
+    if code not in _SYMBOL_IDS:
+        cursor.execute("""
+        INSERT INTO symbols (code) VALUES (%s)
+        ON CONFLICT (code) DO UPDATE SET code = EXCLUDED.code
+        RETURNING id
+        """, (code,))
+        _SYMBOL_IDS[code] = cursor.fetchone()[0]
+    return _SYMBOL_IDS[code]
+
+# Per-side value columns of the processed frame, keyed by options_data column
+_SIDE_COLUMNS = {
+    'option_symbol': '{side}s',
+    'iv': '{side}_iv',
+    'delta': '{side}_delta',
+    'gamma': '{side}_gamma',
+    'open_interest': '{side}_open_interest',
+    'volume': '{side}_volume',
+    'gamma_exposure': '{side}_gamma_exposure',
+}
+
+# INTEGER columns of options_data
+_INTEGER_COLUMNS = ('open_interest', 'volume')
+
+# Columns shared by the call and put row of a strike
+_SHARED_COLUMNS = ('expiration_date', 'strike_price', 'time_till_exp')
+
+def _column_array(df, name):
+    """Column as a NumPy array (object dtype keeps tz-aware timestamps), NaN-filled when absent"""
+    if name in df:
+        return df[name].to_numpy(dtype=object if name == 'expiration_date' else None)
+    return np.full(len(df), np.nan)
+
+def _to_python(values, integer=False):
+    """Convert an array to a list of Python objects, with NaN/NaT as None"""
+    if values.dtype == np.float32:
+        # Widen via the shortest repr so 0.2 is stored as 0.2, not 0.20000000298
+        values = values.astype(str).astype(np.float64)
+    if values.dtype.kind in 'fO':
+        missing = pd.isna(values)
+        out = values.astype(object)
+        if integer:
+            # NaN-padded integer columns come through as floats; COPY needs integer text
+            out[~missing] = values[~missing].astype(np.int64).tolist()
+        out[missing] = None
+        return out.tolist()
+    return values.tolist()
+
 def transform_options_data(filtered_data, timestamp):
     """
     Transform options data for database insertion
     
+    Calls and puts are laid out as parallel column arrays (calls first) and
+    zipped into rows once, without building per-row objects in between.
+    
     Args:
-        filtered_data: Processed options data
+        filtered_data: Processed options data, or the path of a Feather file staged by the ETL runner
         timestamp: Timestamp for the data
         
     Returns:
-        List of records ready for database insertion
+        List of row tuples in OPTIONS_COLUMNS order ready for database insertion
     """
-    records = []
     symbol = "_SPX"  # Default symbol
     
     try:
-        # Process each row in the filtered data
-        for _, row in filtered_data.iterrows():
-            # Create call record
-            if row.get('calls') and row.get('call_gamma') is not None:
-                call_record = {
-                    'timestamp': timestamp,
-                    'symbol': symbol,
-                    'option_type': 'CALL',
-                    'option_symbol': row['calls'],
-                    'expiration_date': row['expiration_date'],
-                    'strike_price': row['strike_price'],
-                    'iv': row.get('call_iv'),
-                    'delta': row.get('call_delta'),
-                    'gamma': row.get('call_gamma'),
-                    'open_interest': row.get('call_open_interest'),
-                    'volume': row.get('call_volume'),
-                    'gamma_exposure': row.get('call_gamma_exposure'),
-                    'time_till_exp': row.get('time_till_exp')
-                }
-                records.append(call_record)
-            
-            # Create put record
-            if row.get('puts') and row.get('put_gamma') is not None:
-                put_record = {
-                    'timestamp': timestamp,
-                    'symbol': symbol,
-                    'option_type': 'PUT',
-                    'option_symbol': row['puts'],
-                    'expiration_date': row['expiration_date'],
-                    'strike_price': row['strike_price'],
-                    'iv': row.get('put_iv'),
-                    'delta': row.get('put_delta'),
-                    'gamma': row.get('put_gamma'),
-                    'open_interest': row.get('put_open_interest'),
-                    'volume': row.get('put_volume'),
-                    'gamma_exposure': row.get('put_gamma_exposure'),
-                    'time_till_exp': row.get('time_till_exp')
-                }
-                records.append(put_record)
-                
-        logger.info(f"Transformed {len(records)} options records for database insertion")
-        return records
+        if isinstance(filtered_data, (str, os.PathLike)):
+            filtered_data = pd.read_feather(filtered_data)
+        
+        n = len(filtered_data)
+        if n == 0:
+            logger.info("Transformed 0 options records for database insertion")
+            return []
+        
+        columns = {}
+        for column, source in _SIDE_COLUMNS.items():
+            columns[column] = np.concatenate([
+                _column_array(filtered_data, source.format(side='call')),
+                _column_array(filtered_data, source.format(side='put')),
+            ])
+        for column in _SHARED_COLUMNS:
+            values = _column_array(filtered_data, column)
+            columns[column] = np.concatenate([values, values])
+        columns['option_type'] = np.repeat(np.array(['CALL', 'PUT'], dtype=object), n)
+        
+        # Keep contracts that have a symbol and a gamma value
+        option_symbols = columns['option_symbol']
+        keep = pd.notna(option_symbols) & (option_symbols != '') & pd.notna(columns['gamma'])
+        
+        series = {
+            column: _to_python(values[keep], integer=column in _INTEGER_COLUMNS)
+            for column, values in columns.items()
+        }
+        series['timestamp'] = repeat(timestamp)
+        series['symbol'] = repeat(symbol)
+        rows = list(zip(*(series[column] for column in OPTIONS_COLUMNS)))
+        
+        logger.info(f"Transformed {len(rows)} options records for database insertion")
+        return rows
     
     except Exception as e:
         logger.error(f"Error transforming options data: {str(e)}")
         raise Exception(f"Failed to transform options data: {str(e)}")
 
+def _upsert_market_metrics(cursor, market_metrics, timestamp):
+    """
+    Upsert a market metrics row using an open cursor
+    
+    Args:
+        cursor: Database cursor
+        market_metrics: Dictionary with market metrics
+        timestamp: Timestamp for the data
+    """
+    insert_query = """
+    INSERT INTO market_metrics 
+    (timestamp, symbol, spot_price, prev_day_close, price_change, price_change_pct)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON CONFLICT (timestamp, symbol) 
+    DO UPDATE SET 
+        spot_price = EXCLUDED.spot_price,
+        prev_day_close = EXCLUDED.prev_day_close,
+        price_change = EXCLUDED.price_change,
+        price_change_pct = EXCLUDED.price_change_pct
+    """
+    
+    cursor.execute(
+        insert_query, 
+        (
+            timestamp,
+            market_metrics['symbol'],
+            market_metrics['spot_price'],
+            market_metrics['prev_day_close'],
+            market_metrics['price_change'],
+            market_metrics['price_change_pct']
+        )
+    )
+
+def _options_values(cursor, options_records):
+    """
+    Yield options rows with symbol codes swapped for their lookup ids
+    
+    Args:
+        cursor: Database cursor
+        options_records: List of row tuples in OPTIONS_COLUMNS order
+        
+    Returns:
+        Generator of row tuples ready for insertion
+    """
+    symbol_ids = {
+        code: _get_symbol_id(cursor, code)
+        for code in {record[_SYMBOL_INDEX] for record in options_records}
+    }
+    return (
+        record[:_SYMBOL_INDEX] + (symbol_ids[record[_SYMBOL_INDEX]],) + record[_SYMBOL_INDEX + 1:]
+        for record in options_records
+    )
+
+def _insert_options_rows(cursor, options_records):
+    """
+    Upsert options rows with paged multi-row INSERTs
+    
+    Args:
+        cursor: Database cursor
+        options_records: List of row tuples in OPTIONS_COLUMNS order
+    """
+    insert_query = f"""
+    INSERT INTO options_data ({', '.join(OPTIONS_COLUMNS)}) VALUES %s
+    {OPTIONS_UPSERT_CLAUSE}
+    """
+    
+    # Execute batch insert, sending one multi-row INSERT per page
+    execute_values(
+        cursor,
+        insert_query,
+        _options_values(cursor, options_records),
+        template=OPTIONS_ROW_TEMPLATE,
+        page_size=getattr(settings, 'DB_INSERT_PAGE_SIZE', 1000)
+    )
+
+def _copy_options_rows(cursor, options_records):
+    """
+    Upsert options rows by streaming them through COPY into a staging table
+    
+    Must run inside a transaction; the staging table is dropped on commit.
+    
+    Args:
+        cursor: Database cursor
+        options_records: List of row tuples in OPTIONS_COLUMNS order
+    """
+    columns = ', '.join(OPTIONS_COLUMNS)
+    
+    cursor.execute("""
+    CREATE TEMP TABLE options_stage (LIKE options_data INCLUDING DEFAULTS) ON COMMIT DROP
+    """)
+    
+    # None is written as an empty unquoted field, which CSV COPY reads as NULL
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(_options_values(cursor, options_records))
+    buffer.seek(0)
+    
+    cursor.copy_expert(f"COPY options_stage ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+    cursor.execute(f"""
+    INSERT INTO options_data ({columns})
+    SELECT {columns} FROM options_stage
+    {OPTIONS_UPSERT_CLAUSE}
+    """)
+
+def _write_gex_snapshot(cursor, options_records):
+    """
+    Summarize the loaded snapshots' gamma exposure per strike into gex_snapshot
+    
+    Args:
+        cursor: Database cursor
+        options_records: List of row tuples in OPTIONS_COLUMNS order
+    """
+    timestamps = list({record[_TIMESTAMP_INDEX] for record in options_records})
+    
+    cursor.execute("""
+    INSERT INTO gex_snapshot
+        (ts, symbol, strike_price, call_gex, put_gex, gex, oi, earliest_expiry, latest_expiry)
+    SELECT 
+        timestamp,
+        symbol,
+        strike_price,
+        SUM(CASE WHEN option_type = 'CALL' THEN gamma_exposure ELSE 0 END),
+        SUM(CASE WHEN option_type = 'PUT' THEN gamma_exposure ELSE 0 END),
+        SUM(gamma_exposure),
+        SUM(open_interest),
+        MIN(expiration_date),
+        MAX(expiration_date)
+    FROM options_data
+    WHERE timestamp = ANY(%s)
+    GROUP BY timestamp, symbol, strike_price
+    ON CONFLICT (ts, symbol, strike_price)
+    DO UPDATE SET 
+        call_gex = EXCLUDED.call_gex,
+        put_gex = EXCLUDED.put_gex,
+        gex = EXCLUDED.gex,
+        oi = EXCLUDED.oi,
+        earliest_expiry = EXCLUDED.earliest_expiry,
+        latest_expiry = EXCLUDED.latest_expiry
+    """, (timestamps,))
+
+def _write_snapshot_summary(cursor, options_records):
+    """
+    Summarize the loaded snapshots into options_snapshot_summary
+    
+    Reads the per-strike rows written by _write_gex_snapshot, so it must run after it.
+    Expiry buckets are relative to the snapshot's own date: near-term within 7 days,
+    mid-term within 30 days, long-term after that.
+    
+    Args:
+        cursor: Database cursor
+        options_records: List of row tuples in OPTIONS_COLUMNS order
+    """
+    timestamps = list({record[_TIMESTAMP_INDEX] for record in options_records})
+    
+    cursor.execute("""
+    WITH buckets AS (
+        SELECT 
+            timestamp AS ts,
+            symbol,
+            SUM(gamma_exposure) FILTER (WHERE expiry_day <= snapshot_day + 7) AS near_term_gamma,
+            SUM(gamma_exposure) FILTER (WHERE expiry_day > snapshot_day + 7 AND expiry_day <= snapshot_day + 30) AS mid_term_gamma,
+            SUM(gamma_exposure) FILTER (WHERE expiry_day > snapshot_day + 30) AS long_term_gamma
+        FROM (
+            SELECT 
+                timestamp,
+                symbol,
+                gamma_exposure,
+                (expiration_date AT TIME ZONE 'UTC')::date AS expiry_day,
+                (timestamp AT TIME ZONE 'UTC')::date AS snapshot_day
+            FROM options_data
+            WHERE timestamp = ANY(%(timestamps)s)
+        ) o
+        GROUP BY timestamp, symbol
+    ),
+    strikes AS (
+        SELECT 
+            ts,
+            symbol,
+            strike_price,
+            gex,
+            SUM(gex) OVER w AS cumulative_gamma,
+            LAG(strike_price) OVER w AS prev_strike
+        FROM gex_snapshot
+        WHERE ts = ANY(%(timestamps)s)
+        WINDOW w AS (PARTITION BY ts, symbol ORDER BY strike_price)
+    ),
+    steps AS (
+        SELECT *, LAG(cumulative_gamma) OVER (PARTITION BY ts, symbol ORDER BY strike_price) AS prev_cumulative
+        FROM strikes
+    ),
+    levels AS (
+        SELECT 
+            ts,
+            symbol,
+            SUM(gex) AS total_gamma,
+            (array_agg(strike_price ORDER BY ABS(gex) DESC, strike_price) FILTER (WHERE gex > 0))[1:5] AS top_positive_strikes,
+            (array_agg(strike_price ORDER BY ABS(gex) DESC, strike_price) FILTER (WHERE gex < 0))[1:5] AS top_negative_strikes
+        FROM strikes
+        GROUP BY ts, symbol
+    ),
+    zero AS (
+        -- First strike interval where cumulative gamma crosses zero, linearly interpolated
+        SELECT DISTINCT ON (ts, symbol)
+            ts,
+            symbol,
+            prev_strike + (strike_price - prev_strike) * (-prev_cumulative) / (cumulative_gamma - prev_cumulative) AS zero_gamma_level
+        FROM steps
+        WHERE (prev_cumulative <= 0 AND cumulative_gamma > 0) OR (prev_cumulative >= 0 AND cumulative_gamma < 0)
+        ORDER BY ts, symbol, strike_price
+    )
+    INSERT INTO options_snapshot_summary
+        (ts, symbol, total_gamma, near_term_gamma, mid_term_gamma, long_term_gamma,
+         zero_gamma_level, top_positive_strikes, top_negative_strikes)
+    SELECT 
+        b.ts,
+        b.symbol,
+        COALESCE(l.total_gamma, 0),
+        COALESCE(b.near_term_gamma, 0),
+        COALESCE(b.mid_term_gamma, 0),
+        COALESCE(b.long_term_gamma, 0),
+        z.zero_gamma_level,
+        COALESCE(l.top_positive_strikes, '{}'),
+        COALESCE(l.top_negative_strikes, '{}')
+    FROM buckets b
+    LEFT JOIN levels l USING (ts, symbol)
+    LEFT JOIN zero z USING (ts, symbol)
+    ON CONFLICT (ts, symbol)
+    DO UPDATE SET 
+        total_gamma = EXCLUDED.total_gamma,
+        near_term_gamma = EXCLUDED.near_term_gamma,
+        mid_term_gamma = EXCLUDED.mid_term_gamma,
+        long_term_gamma = EXCLUDED.long_term_gamma,
+        zero_gamma_level = EXCLUDED.zero_gamma_level,
+        top_positive_strikes = EXCLUDED.top_positive_strikes,
+        top_negative_strikes = EXCLUDED.top_negative_strikes
+    """, {'timestamps': timestamps})
+
+def _analyze_after_load(cursor, row_count):
+    """Refresh planner statistics after large loads"""
+    if row_count > getattr(settings, 'DB_ANALYZE_THRESHOLD', 50000):
+        cursor.execute("ANALYZE options_data")
+
+def is_snapshot_loaded(symbol, timestamp):
+    """
+    Check whether the ETL tick for a symbol and timestamp is already stored
+    
+    Args:
+        symbol: Underlying symbol code
+        timestamp: Snapshot timestamp from the API payload
+        
+    Returns:
+        True if the tick is loaded, False if not or if the check fails
+    """
+    if cache.get(last_snapshot_cache_key(symbol)) == timestamp.isoformat():
+        return True
+    
+    connection = None
+    cursor = None
+    
+    try:
+        connection = create_db_connection()
+        cursor = create_cursor(connection)
+        cursor.execute(
+            "SELECT 1 FROM market_metrics WHERE timestamp = %s AND symbol = %s",
+            (timestamp, symbol)
+        )
+        return cursor.fetchone() is not None
+        
+    except Exception as e:
+        logger.warning(f"Could not check for a loaded snapshot: {str(e)}")
+        return False
+        
+    finally:
+        close_connection(connection, cursor)
+
 def load_market_metrics(market_metrics, timestamp):
     """
     Load market metrics data into database
@@ -88,29 +451,10 @@ def load_market_metrics(market_metrics, timestamp):
         cursor = create_cursor(connection)
         
         # Insert market metrics
-        insert_query = """
-        INSERT INTO market_metrics 
-        (timestamp, symbol, spot_price, prev_day_close, price_change, price_change_pct)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        ON CONFLICT (timestamp, symbol) 
-        DO UPDATE SET 
-            spot_price = EXCLUDED.spot_price,
-            prev_day_close = EXCLUDED.prev_day_close,
-            price_change = EXCLUDED.price_change,
-            price_change_pct = EXCLUDED.price_change_pct
-        """
+        _upsert_market_metrics(cursor, market_metrics, timestamp)
         
-        cursor.execute(
-            insert_query, 
-            (
-                timestamp,
-                market_metrics['symbol'],
-                market_metrics['spot_price'],
-                market_metrics['prev_day_close'],
-                market_metrics['price_change'],
-                market_metrics['price_change_pct']
-            )
-        )
+        # Drop the cached latest metrics so the API picks up the new row
+        cache.delete(latest_metrics_cache_key(market_metrics['symbol']))
         
         logger.info(f"Market metrics loaded successfully for {market_metrics['symbol']} at {timestamp}")
         return True
@@ -128,7 +472,7 @@ def load_options_data(options_records):
     Load options data into database
     
     Args:
-        options_records: List of options data records
+        options_records: List of row tuples in OPTIONS_COLUMNS order
         
     Returns:
         Success status
@@ -146,44 +490,13 @@ def load_options_data(options_records):
         cursor = create_cursor(connection)
         
         # Insert options data using execute_values for better performance
-        insert_query = """
-        INSERT INTO options_data (
-            timestamp, symbol, option_type, option_symbol, expiration_date, 
-            strike_price, iv, delta, gamma, open_interest, volume, 
-            gamma_exposure, time_till_exp
-        ) VALUES %s
-        ON CONFLICT (timestamp, option_symbol) 
-        DO UPDATE SET 
-            iv = EXCLUDED.iv,
-            delta = EXCLUDED.delta,
-            gamma = EXCLUDED.gamma,
-            open_interest = EXCLUDED.open_interest,
-            volume = EXCLUDED.volume,
-            gamma_exposure = EXCLUDED.gamma_exposure
-        """
-        
-        # Prepare values for batch insert
-        values = [
-            (
-                record['timestamp'],
-                record['symbol'],
-                record['option_type'],
-                record['option_symbol'],
-                record['expiration_date'],
-                record['strike_price'],
-                record['iv'],
-                record['delta'],
-                record['gamma'],
-                record['open_interest'],
-                record['volume'],
-                record['gamma_exposure'],
-                record['time_till_exp']
-            )
-            for record in options_records
-        ]
-        
-        # Execute batch insert
-        execute_values(cursor, insert_query, values)
+        _insert_options_rows(cursor, options_records)
+        _write_gex_snapshot(cursor, options_records)
+        _write_snapshot_summary(cursor, options_records)
+        _analyze_after_load(cursor, len(options_records))
+        
+        # Let the API recompute anything cached for the previous snapshot
+        invalidate_snapshot_cache()
         
         logger.info(f"Successfully loaded {len(options_records)} options records")
         return True
@@ -192,6 +505,65 @@ def load_options_data(options_records):
         logger.error(f"Error loading options data: {str(e)}")
         return False
         
+    finally:
+        # Close connection
+        close_connection(connection, cursor)
+
+def load_etl_tick(market_metrics, options_records, timestamp):
+    """
+    Load one ETL tick's market metrics and options data in a single transaction
+    
+    Large ticks (backfills, cold loads) are streamed with COPY through a
+    staging table; smaller ones use paged multi-row INSERTs.
+    
+    Args:
+        market_metrics: Dictionary with market metrics
+        options_records: List of row tuples in OPTIONS_COLUMNS order
+        timestamp: Timestamp for the data
+        
+    Returns:
+        Success status
+    """
+    if not options_records:
+        logger.warning("No options records to load")
+        return False
+    
+    connection = None
+    cursor = None
+    
+    try:
+        # One pooled connection and one commit for the whole tick
+        connection = create_db_connection(autocommit=False)
+        cursor = create_cursor(connection)
+        
+        _upsert_market_metrics(cursor, market_metrics, timestamp)
+        
+        if len(options_records) > getattr(settings, 'DB_COPY_THRESHOLD', 5000):
+            _copy_options_rows(cursor, options_records)
+        else:
+            _insert_options_rows(cursor, options_records)
+        _write_gex_snapshot(cursor, options_records)
+        _write_snapshot_summary(cursor, options_records)
+        _analyze_after_load(cursor, len(options_records))
+        
+        connection.commit()
+        
+        # Drop the cached latest metrics and snapshot results so the API picks up the new tick
+        cache.delete(latest_metrics_cache_key(market_metrics['symbol']))
+        invalidate_snapshot_cache()
+        cache.set(last_snapshot_cache_key(market_metrics['symbol']), timestamp.isoformat(), None)
+        
+        logger.info(f"ETL tick loaded: market metrics and {len(options_records)} options records at {timestamp}")
+        return True
+        
+    except Exception as e:
+        logger.error(f"Error loading ETL tick: {str(e)}")
+        if connection is not None and not connection.closed:
+            connection.rollback()
+        # Symbol ids registered in the rolled-back transaction no longer exist
+        _SYMBOL_IDS.clear()
+        return False
+        
     finally:
         # Close connection
         close_connection(connection, cursor)
\ No newline at end of file
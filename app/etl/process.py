@@ -3,15 +3,16 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from dateparser.date import DateDataParser
-from pytz import timezone
-import exchange_calendars as xcals
 from calendar import monthrange
-from app.utils.date_utils import find_monthly_expiration
+from app.utils.date_utils import find_monthly_expiration, get_tz, get_busday_calendar
 from app.utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
 
+# Per-side greek and count columns of the formatted options frame
+GREEK_COLUMNS = ('call_iv', 'call_delta', 'call_gamma', 'put_iv', 'put_delta', 'put_gamma')
+COUNT_COLUMNS = ('call_open_interest', 'call_volume', 'put_open_interest', 'put_volume')
+
 def process_options_data(json_data, tz="America/New_York"):
     """
     Process raw options data from JSON to structured format
@@ -25,8 +26,9 @@ def process_options_data(json_data, tz="America/New_York"):
     """
     try:
         # Parse timestamp to get current date
-        tzinfo = timezone(tz)
-        timestamp_str = json_data.get('data', {}).get('timestamp')
+        tzinfo = get_tz(tz)
+        data = json_data.get('data') or {}
+        timestamp_str = data.get('timestamp')
         
         if timestamp_str:
             timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00')).astimezone(tzinfo)
@@ -36,7 +38,7 @@ def process_options_data(json_data, tz="America/New_York"):
         logger.info(f"Processing options data for timestamp: {timestamp}")
         
         # Extract options data from JSON
-        options_data = json_data.get('data', {}).get('options', [])
+        options_data = data.get('options', [])
         
         if not options_data:
             logger.warning("No options data found in JSON response")
@@ -45,11 +47,8 @@ def process_options_data(json_data, tz="America/New_York"):
         # Format options data into DataFrame
         options_df = format_options_data(options_data, timestamp, tzinfo)
         
-        # Filter expired options
-        options_df = options_df[options_df['expiration_date'] > timestamp]
-        
-        # Calculate spot price from data if available
-        spot_price = json_data.get('data', {}).get('option', {}).get('current_price')
+        # Spot price is reported next to the options chain, under the payload's "data" object
+        spot_price = data.get('current_price')
         if spot_price:
             spot_price = float(spot_price)
             
@@ -73,53 +72,76 @@ def format_options_data(data, today_ddt, tzinfo):
         tzinfo: Timezone info
         
     Returns:
-        DataFrame with formatted options data
+        DataFrame with formatted options data, excluding contracts expired as of today_ddt
     """
     try:
-        keys_to_keep = ["option", "iv", "open_interest", "volume", "delta", "gamma", "strike_price"]
-        df = pd.DataFrame([{k: d[k] for k in keys_to_keep if k in d} for d in data])
-        formatted_df = pd.concat(
-            [
-                df.rename(
-                    columns={
-                        "option": "calls",
-                        "iv": "call_iv",
-                        "open_interest": "call_open_int",
-                        "delta": "call_delta",
-                        "gamma": "call_gamma",
-                        "volume": "call_volume",
-                    }
-                ).iloc[0::2].reset_index(drop=True),
-                df.rename(
-                    columns={
-                        "option": "puts",
-                        "iv": "put_iv",
-                        "open_interest": "put_open_int",
-                        "delta": "put_delta",
-                        "gamma": "put_gamma",
-                        "volume": "put_volume",
-                    }
-                ).iloc[1::2].reset_index(drop=True),
-            ],
-            axis=1,
-        )
-        # Extract strike price from calls column using a regex
-        formatted_df["strike_price"] = (
-            formatted_df["calls"].str.extract(r"\d[A-Z](\d+)\d\d\d").astype(float)
+        # Strike price is parsed from the option symbol below, so only per-contract fields are read
+        keys_to_keep = ["option", "iv", "open_interest", "volume", "delta", "gamma"]
+        # One array per field straight from the records, skipping the intermediate frame
+        fields = {key: np.array([contract.get(key) for contract in data], dtype=object) for key in keys_to_keep}
+        # Contracts alternate call/put, so strided views of each array split the sides
+        pairs = len(data) // 2
+        if len(data) % 2:
+            logger.warning(f"Odd number of option contracts ({len(data)}); dropping unpaired last row")
+        columns = {}
+        for side, symbol_column, offset in (("call", "calls", 0), ("put", "puts", 1)):
+            for key in keys_to_keep:
+                name = symbol_column if key == "option" else f"{side}_{key}"
+                columns[name] = fields[key][offset:2 * pairs:2]
+        formatted_df = pd.DataFrame(columns)
+        
+        # OCC symbols end in fixed-width fields: YYMMDD, C/P, then strike * 1000 in 8 digits
+        call_symbols = formatted_df["calls"].astype("string")
+        
+        # Extract expiration date from calls column, parsing each distinct expiry once
+        expiry_codes, expiry_keys = pd.factorize(call_symbols.str.slice(-15, -9))
+        expiries = pd.to_datetime(
+            np.asarray(expiry_keys, dtype=object), format="%y%m%d", errors="coerce"
+        ).tz_localize(tzinfo) + timedelta(hours=16)
+        
+        # Extract strike price from calls column (whole points, as before)
+        strikes = pd.to_numeric(call_symbols.str.slice(-8, -3), errors="coerce").to_numpy(
+            dtype=np.float64, na_value=np.nan
         )
-        # Extract expiration date from calls column
-        formatted_df["expiration_date"] = formatted_df["calls"].str.extract(r"[A-Z](\d+)")
-        formatted_df["expiration_date"] = pd.to_datetime(
-            formatted_df["expiration_date"], format="%y%m%d"
-        ).dt.tz_localize(tzinfo) + timedelta(hours=16)
+        
+        # A malformed symbol (unparseable expiry or strike) drops its row, not the whole tick
+        valid = (expiry_codes >= 0) & ~np.isnan(strikes)
+        valid[valid] = np.asarray(expiries.notna())[expiry_codes[valid]]
+        if not valid.all():
+            logger.warning(f"Dropping {int((~valid).sum())} contracts with malformed option symbols")
+        
+        # Drop expired contracts before any per-column numeric work
+        live = valid.copy()
+        live[live] = np.asarray(expiries > today_ddt)[expiry_codes[live]]
+        if not live.all():
+            formatted_df = formatted_df[live].reset_index(drop=True)
+            expiry_codes = expiry_codes[live]
+            strikes = strikes[live]
+        formatted_df["expiration_date"] = expiries.take(expiry_codes)
+        formatted_df["strike_price"] = strikes
+        
+        # Greeks need no more than float32; counts fit in narrow unsigned ints
+        for column in GREEK_COLUMNS:
+            formatted_df[column] = pd.to_numeric(formatted_df[column], errors='coerce', downcast='float')
+        for column in COUNT_COLUMNS:
+            formatted_df[column] = pd.to_numeric(formatted_df[column], errors='coerce', downcast='unsigned')
     
-        # Calculate business day counts and time till expiration in years
+        # Calculate trading day counts (skipping exchange holidays) and time till expiration in years,
+        # once per distinct expiry and then broadcast to its rows
+        today_day = np.datetime64(today_ddt.date(), "D")
+        expiry_days = expiries.tz_localize(None).values.astype("datetime64[D]")
         busday_counts = np.busday_count(
-            today_ddt.date(), formatted_df["expiration_date"].values.astype("datetime64[D]")
+            today_day,
+            # Unparseable expiries have no rows left; any valid date keeps the count defined
+            np.where(np.isnat(expiry_days), today_day, expiry_days),
+            busdaycal=get_busday_calendar(),
         )
-        formatted_df["time_till_exp"] = np.where(busday_counts == 0, 1/252, busday_counts/252)
+        expiry_tte = np.where(busday_counts == 0, 1/252, busday_counts/252)
+        formatted_df["time_till_exp"] = expiry_tte[expiry_codes]
     
-        formatted_df = formatted_df.sort_values(by=["expiration_date", "strike_price"]).reset_index(drop=True)
+        # Chains usually arrive ordered by expiry then strike; only sort when they do not
+        if not _is_sorted_by_expiry_strike(formatted_df):
+            formatted_df = formatted_df.sort_values(by=["expiration_date", "strike_price"]).reset_index(drop=True)
         logger.info(f"Formatted {len(formatted_df)} options rows")
         return formatted_df
 
@@ -127,6 +149,20 @@ def format_options_data(data, today_ddt, tzinfo):
         logger.error(f"Error formatting options data: {str(e)}")
         raise Exception(f"Failed to format options data: {str(e)}")
     
+def _is_sorted_by_expiry_strike(options_df):
+    """
+    Check in one pass whether rows are ordered by expiration_date, then strike_price
+    
+    Args:
+        options_df: DataFrame with expiration_date and strike_price columns
+        
+    Returns:
+        Boolean indicating the frame is already in (expiry, strike) order
+    """
+    expiry_steps = np.diff(options_df["expiration_date"].values.view("int64"))
+    strike_steps = np.diff(options_df["strike_price"].to_numpy())
+    return bool(np.all(expiry_steps >= 0) and np.all((expiry_steps > 0) | (strike_steps >= 0)))
+
 def calculate_gamma_exposure(option_data, spot_price):
     """
     Calculate gamma exposure for options based on open interest and spot price
@@ -139,8 +175,7 @@ def calculate_gamma_exposure(option_data, spot_price):
         DataFrame with gamma exposure calculations
     """
     try:
-        # Make a copy to avoid modifying the original
-        df = option_data.copy()
+        df = option_data
         
         # Skip calculation if DataFrame is empty
         if df.empty:
@@ -151,18 +186,35 @@ def calculate_gamma_exposure(option_data, spot_price):
         
         # Gamma exposure is gamma * open_interest * contract_multiplier * (spot_price^2 / 100)
         # The division by 100 is to scale the exposure to a more manageable number
+        spot_scale = spot_price ** 2 / 100
+        
+        # Scalar factors are folded together so each side takes one scaling pass
+        scale = contract_multiplier * spot_scale
         
-        # Calculate gamma exposure for calls (positive gamma)
-        df['call_gamma_exposure'] = df['call_gamma'] * df['call_open_interest'] * \
-                                   contract_multiplier * (spot_price ** 2 / 100)
+        # Work on contiguous float64 arrays, multiplying in place
+        call_gex = np.multiply(
+            df['call_gamma'].to_numpy(dtype=np.float64),
+            df['call_open_interest'].to_numpy(dtype=np.float64)
+        )
+        call_gex *= scale
         
-        # Calculate gamma exposure for puts (negative gamma for dealers with long put positions)
-        df['put_gamma_exposure'] = -1 * df['put_gamma'] * df['put_open_interest'] * \
-                                  contract_multiplier * (spot_price ** 2 / 100)
+        # Puts carry negative gamma for dealers with long put positions
+        put_gex = np.multiply(
+            df['put_gamma'].to_numpy(dtype=np.float64),
+            df['put_open_interest'].to_numpy(dtype=np.float64)
+        )
+        put_gex *= -scale
         
-        # Calculate total gamma exposure per strike
-        df['total_gamma_exposure'] = (df['call_gamma_exposure'] + df['put_gamma_exposure']) / 1e9
-        df['total_gamma_exposure'] = df['total_gamma_exposure'].round(2)  # Round to 2 decimal places
+        # Total gamma exposure per strike, in billions rounded to 2 decimal places
+        total_gex = np.add(call_gex, put_gex)
+        total_gex /= 1e9
+        
+        # assign returns a new frame sharing the existing column data, leaving the input untouched
+        df = df.assign(
+            call_gamma_exposure=call_gex,
+            put_gamma_exposure=put_gex,
+            total_gamma_exposure=np.round(total_gex, 2, out=total_gex),
+        )
         
         logger.info(f"Calculated gamma exposure with spot price {spot_price}")
         return df
@@ -171,6 +223,46 @@ def calculate_gamma_exposure(option_data, spot_price):
         logger.error(f"Error calculating gamma exposure: {str(e)}")
         raise Exception(f"Failed to calculate gamma exposure: {str(e)}")
 
+def _strike_range_positions(options_df, lower_bound, upper_bound):
+    """
+    Find row positions with strikes in [lower_bound, upper_bound] by binary search
+    
+    Relies on the (expiration_date, strike_price) ordering produced by
+    format_options_data: each expiry is a contiguous run of ascending strikes.
+    
+    Args:
+        options_df: DataFrame with options data
+        lower_bound: Lowest strike to keep
+        upper_bound: Highest strike to keep
+        
+    Returns:
+        Array of row positions, or None if the frame is not ordered that way
+    """
+    strikes = options_df['strike_price'].to_numpy(dtype=np.float64)
+    if len(strikes) == 0:
+        return np.arange(0)
+    
+    # Start offsets of each expiry run (a single run without an expiry column)
+    if 'expiration_date' in options_df.columns:
+        expiries = options_df['expiration_date'].to_numpy(dtype='datetime64[ns]')
+        new_run = expiries[1:] != expiries[:-1]
+        starts = np.concatenate(([0], np.flatnonzero(new_run) + 1))
+    else:
+        new_run = np.zeros(len(strikes) - 1, dtype=bool)
+        starts = np.array([0])
+    
+    # Strikes must ascend within every run (NaN strikes fail this check)
+    if not np.all((strikes[1:] >= strikes[:-1]) | new_run):
+        return None
+    
+    ends = np.append(starts[1:], len(strikes))
+    segments = []
+    for start, end in zip(starts, ends):
+        lo = np.searchsorted(strikes[start:end], lower_bound, side='left')
+        hi = np.searchsorted(strikes[start:end], upper_bound, side='right')
+        segments.append(np.arange(start + lo, start + hi))
+    return np.concatenate(segments)
+
 def filter_options_by_range(options_df, spot_price, range_percent=0.10):
     """
     Filter options to those within a specific range from spot price
@@ -189,8 +281,12 @@ def filter_options_by_range(options_df, spot_price, range_percent=0.10):
         upper_bound = spot_price * (1 + range_percent)
         
         # Filter by strike price
-        filtered_df = options_df[(options_df['strike_price'] >= lower_bound) & 
-                                (options_df['strike_price'] <= upper_bound)]
+        positions = _strike_range_positions(options_df, lower_bound, upper_bound)
+        if positions is not None:
+            filtered_df = options_df.iloc[positions]
+        else:
+            filtered_df = options_df[(options_df['strike_price'] >= lower_bound) & 
+                                    (options_df['strike_price'] <= upper_bound)]
         
         logger.info(f"Filtered options to strikes between {lower_bound:.2f} and {upper_bound:.2f}")
         logger.info(f"Retained {len(filtered_df)} out of {len(options_df)} options")
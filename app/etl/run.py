@@ -1,29 +1,37 @@
 """Main ETL runner for options analytics platform"""
 
-from app.etl.fetch import fetch_spx_options_data, fetch_market_data
+import os
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+from app.etl.fetch import fetch_spx_options_data, fetch_market_data, forget_upstream_validators
 from app.etl.process import process_options_data, filter_options_by_range
-from app.etl.load import transform_options_data, load_market_metrics, load_options_data
-from app.utils.logging_utils import get_logger
+from app.etl.load import transform_options_data, load_etl_tick, is_snapshot_loaded
+from app.utils.logging_utils import get_logger, configure_logging
 import traceback
 from django.conf import settings
 
 logger = get_logger(__name__)
 
-def extract_data():
+def extract_data(conditional=False):
     """
     Extract data from the API sources
     
+    Args:
+        conditional: Skip extraction if the API reports the payload unchanged
+    
     Returns:
-        Tuple of (filtered_data, market_metrics, timestamp)
+        Tuple of (filtered_data, market_metrics, timestamp), or None if unchanged
     """
     try:
         logger.info("Starting data extraction process")
         
         # Fetch options data from API
-        json_data = fetch_spx_options_data()
+        json_data = fetch_spx_options_data(conditional=conditional)
+        if json_data is None:
+            return None
         
-        # Extract market metrics
-        market_data = fetch_market_data()
+        # Extract market metrics from the same payload (no second request)
+        market_data = fetch_market_data(json_data)
         
         # Process options data
         options_df, timestamp = process_options_data(json_data)
@@ -46,23 +54,58 @@ def extract_data():
         logger.error(traceback.format_exc())
         raise Exception(f"Data extraction failed: {str(e)}")
 
+def stage_options_data(filtered_data, stage_dir):
+    """
+    Write the filtered options chain to an uncompressed Feather file for the load stage
+    
+    Args:
+        filtered_data: Filtered options DataFrame
+        stage_dir: Directory to stage into (ideally tmpfs such as /dev/shm)
+        
+    Returns:
+        Path of the staged file
+    """
+    path = os.path.join(stage_dir, "leaf_chain.arrow")
+    filtered_data.reset_index(drop=True).to_feather(path, compression="uncompressed")
+    logger.info(f"Staged {len(filtered_data)} options rows to {path}")
+    return path
+
 def etl_process():
     """
     Execute the full ETL process
     
+    Transform and load are skipped when the API payload or its snapshot
+    timestamp is unchanged since the last successful load.
+    
     Returns:
         Boolean indicating success/failure
     """
+    loaded = False
     try:
         logger.info("Starting ETL process")
         
         # Extract data
-        filtered_data, market_metrics, timestamp = extract_data()
+        extracted = extract_data(conditional=True)
+        if extracted is None:
+            logger.info("Upstream options data unchanged. ETL process skipped.")
+            loaded = True
+            return True
+        filtered_data, market_metrics, timestamp = extracted
+        
+        if is_snapshot_loaded(market_metrics['symbol'], timestamp):
+            logger.info(f"Snapshot at {timestamp} already loaded. ETL process skipped.")
+            loaded = True
+            return True
         
         if filtered_data.empty:
             logger.warning("No options data to process. ETL process terminated.")
             return False
         
+        # Optionally hand the chain to the transform stage through an Arrow file
+        stage_dir = getattr(settings, 'ETL_STAGE_DIR', None)
+        if stage_dir:
+            filtered_data = stage_options_data(filtered_data, stage_dir)
+        
         # Transform options data for database
         options_records = transform_options_data(filtered_data, timestamp)
         
@@ -70,27 +113,26 @@ def etl_process():
             logger.warning("No options records after transformation. ETL process terminated.")
             return False
         
-        # Load market metrics into database
-        market_metrics_success = load_market_metrics(market_metrics, timestamp)
+        # Load market metrics and options data in one transaction
+        load_success = load_etl_tick(market_metrics, options_records, timestamp)
         
-        if not market_metrics_success:
-            logger.error("Failed to load market metrics")
-            return False
-        
-        # Load options data into database
-        options_success = load_options_data(options_records)
-        
-        if not options_success:
-            logger.error("Failed to load options data")
+        if not load_success:
+            logger.error("Failed to load ETL tick")
             return False
             
         logger.info(f"ETL process completed successfully: {len(options_records)} options records processed")
+        loaded = True
         return True
         
     except Exception as e:
         logger.error(f"ETL process failed: {str(e)}")
         logger.error(traceback.format_exc())
         return False
+    
+    finally:
+        # Refetch the full payload next time rather than skipping a tick that never loaded
+        if not loaded:
+            forget_upstream_validators()
 
 def run_etl():
     """
@@ -107,13 +149,33 @@ def run_etl():
         logger.critical(traceback.format_exc())
         return False
 
-if __name__ == "__main__":
-    # Allow direct execution for manual ETL runs
-    import os
-    import django
+def main(argv=None):
+    """
+    Run the ETL once from the command line
+    
+    Args:
+        argv: Command-line arguments (default: sys.argv[1:])
+        
+    Returns:
+        Process exit code
+    """
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Run the options ETL once")
+    parser.add_argument('--no-load', action='store_true',
+                        help='Extract and transform only; skip Django setup and the database load')
+    args = parser.parse_args(argv)
+    configure_logging()
+    
+    if args.no_load:
+        # Settings are read lazily, so the extract/transform path needs no app registry
+        filtered_data, market_metrics, timestamp = extract_data()
+        options_records = transform_options_data(filtered_data, timestamp)
+        print(f"Extracted {len(options_records)} options records at {timestamp} (not loaded).")
+        return 0
     
     # Setup Django environment if not already done
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
     django.setup()
     
     # Run ETL process
@@ -123,4 +185,9 @@ if __name__ == "__main__":
         print("ETL process completed successfully.")
     else:
         print("ETL process failed. Check logs for details.")
-        exit(1)
\ No newline at end of file
+    return 0 if success else 1
+
+if __name__ == "__main__":
+    # Allow direct execution for manual ETL runs
+    import sys
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""Celery tasks and beat schedule for running the ETL on distributed workers"""
+
+import os
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import secrets
+from datetime import timedelta
+import redis
+from celery import Celery
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from app.etl.run import etl_process
+from app.utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Cache key holding the token of the run currently executing the ETL
+ETL_LOCK_KEY = "etl_process_lock"
+
+# Deletes the lock only while it still holds this run's token
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# DJANGO_SETTINGS_MODULE is set above, so Celery's Django fixup runs django.setup()
+# when a worker starts instead of this module doing it on import
+app = Celery('leafsense', broker=getattr(settings, 'CELERY_BROKER_URL', None))
+app.conf.task_default_queue = 'etl'
+app.conf.beat_schedule = {
+    'etl': {
+        'task': 'app.etl.tasks.run_etl_task',
+        'schedule': timedelta(minutes=getattr(settings, 'ETL_INTERVAL_MINUTES', 15)),
+    },
+}
+
+def lock_is_shared():
+    """Whether the default cache is shared between processes, so the ETL lock spans workers"""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+def _release_lock(token):
+    """
+    Delete the ETL lock if this run still holds it
+    
+    Args:
+        token: Integer token stored when the lock was taken
+    """
+    cache = caches['default']
+    redis_url = getattr(settings, 'REDIS_URL', None)
+    if redis_url:
+        # Atomic compare-and-delete on the cache's own key; the Redis cache
+        # stores integers unpickled, so Lua can compare the token as text
+        client = redis.Redis.from_url(redis_url)
+        client.eval(_RELEASE_LOCK_SCRIPT, 1, cache.make_key(ETL_LOCK_KEY), token)
+    elif cache.get(ETL_LOCK_KEY) == token:
+        cache.delete(ETL_LOCK_KEY)
+
+@app.task(bind=True, acks_late=True, name='app.etl.tasks.run_etl_task')
+def run_etl_task(self):
+    """
+    Run one ETL tick unless another worker is already running one
+    
+    The lock is taken with cache.add, which is atomic on the Redis cache, and
+    expires after one interval so a crashed worker cannot hold it forever.
+    
+    Returns:
+        Success status, or False if the run was skipped
+    """
+    if not lock_is_shared():
+        logger.warning("ETL lock uses a process-local cache; set REDIS_URL to keep workers from overlapping")
+    
+    token = secrets.randbits(62)
+    lock_timeout = getattr(settings, 'ETL_INTERVAL_MINUTES', 15) * 60
+    if not caches['default'].add(ETL_LOCK_KEY, token, timeout=lock_timeout):
+        logger.warning("Previous ETL run still in progress, skipping this one")
+        return False
+    
+    try:
+        return etl_process()
+    finally:
+        # A lock that expired mid-run may now belong to another worker
+        _release_lock(token)
\ No newline at end of file
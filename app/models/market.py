@@ -5,6 +5,9 @@ from django.utils import timezone
 from datetime import timedelta
 import json
 
+# Columns served by the covering index, so latest/historical reads stay index-only
+METRIC_FIELDS = ('timestamp', 'symbol', 'spot_price', 'prev_day_close', 'price_change', 'price_change_pct')
+
 class MarketMetrics(models.Model):
     """
     Model for market metrics data with TimescaleDB hypertable
@@ -19,7 +22,11 @@ class MarketMetrics(models.Model):
     class Meta:
         unique_together = ('timestamp', 'symbol')
         indexes = [
-            models.Index(fields=['symbol', '-timestamp']),
+            models.Index(
+                fields=['symbol', '-timestamp'],
+                include=['spot_price', 'prev_day_close', 'price_change', 'price_change_pct'],
+                name='mm_sym_ts_cover',
+            ),
         ]
         verbose_name = 'Market Metric'
         verbose_name_plural = 'Market Metrics'
@@ -30,7 +37,7 @@ class MarketMetrics(models.Model):
     @classmethod
     def get_latest(cls, symbol="_SPX"):
         """Get the latest market metrics for a symbol"""
-        return cls.objects.filter(symbol=symbol).order_by('-timestamp').first()
+        return cls.objects.filter(symbol=symbol).only(*METRIC_FIELDS).order_by('-timestamp').first()
     
     @classmethod
     def get_historical(cls, symbol="_SPX", days=7):
@@ -48,7 +55,7 @@ class MarketMetrics(models.Model):
         return cls.objects.filter(
             symbol=symbol,
             timestamp__gte=start_date
-        ).order_by('timestamp')
+        ).only(*METRIC_FIELDS).order_by('timestamp')
     
     @classmethod
     def get_daily_summary(cls, symbol="_SPX", days=30):
@@ -63,25 +70,26 @@ class MarketMetrics(models.Model):
             List of daily metrics
         """
         # Use raw SQL for better performance with TimescaleDB
-        from django.db import connection
+        from app.database.connection import analytics_cursor
         
-        start_date = (timezone.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        start_date = timezone.now() - timedelta(days=days)
         
-        with connection.cursor() as cursor:
+        # One row per day; first()/last() replace the per-row window functions
+        with analytics_cursor() as cursor:
             cursor.execute("""
                 SELECT 
-                    date_trunc('day', timestamp) AS day,
+                    time_bucket('1 day', timestamp) AS day,
                     AVG(spot_price) AS avg_price,
                     MAX(spot_price) AS high_price,
                     MIN(spot_price) AS low_price,
-                    FIRST_VALUE(spot_price) OVER (PARTITION BY date_trunc('day', timestamp) ORDER BY timestamp) AS open_price,
-                    LAST_VALUE(spot_price) OVER (PARTITION BY date_trunc('day', timestamp) ORDER BY timestamp) AS close_price
+                    first(spot_price, timestamp) AS open_price,
+                    last(spot_price, timestamp) AS close_price
                 FROM 
                     market_metrics
                 WHERE 
                     symbol = %s AND timestamp >= %s
                 GROUP BY 
-                    day, timestamp
+                    day
                 ORDER BY 
                     day
             """, [symbol, start_date])
@@ -2,18 +2,178 @@
 
 from django.db import models
 from django.contrib.postgres.fields import ArrayField
-from django.db.models import Sum, Avg, F, Q, Max
+from django.db.models import Avg, F, Q, Max
+from django.conf import settings
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
 import json
+import pandas as pd
+from app.utils.cache_utils import cached_result
+from app.utils.request_cache import per_request
+from app.database.connection import analytics_cursor
+
+# Bucket width of the gamma_by_strike_5m continuous aggregate (see app.database.schema)
+GAMMA_AGGREGATE_BUCKET = timedelta(minutes=5)
+
+# options_data stores the underlying as a SMALLINT id into the symbols table;
+# takes the symbol code as its parameter
+SYMBOL_ID_SQL = "(SELECT id FROM symbols WHERE code = %s)"
+
+# SQL fragments over a single snapshot, shared by the per-endpoint queries and
+# the fused dashboard snapshot. SNAPSHOT_CTE takes (timestamp, symbol[, expiry_end]);
+# it projects only the columns the aggregates read, since the dashboard query
+# references it several times and Postgres materializes it there.
+SNAPSHOT_CTE = """
+    WITH snap AS (
+        SELECT option_type, strike_price, expiration_date, gamma_exposure, open_interest
+        FROM options_data
+        WHERE timestamp = %s AND symbol = """ + SYMBOL_ID_SQL + """ {expiry_clause}
+    )
+"""
+
+GAMMA_BY_STRIKE_SQL = """
+    SELECT 
+        strike_price,
+        SUM(CASE WHEN option_type = 'CALL' THEN gamma_exposure ELSE 0 END) AS call_gamma_exposure,
+        SUM(CASE WHEN option_type = 'PUT' THEN gamma_exposure ELSE 0 END) AS put_gamma_exposure,
+        SUM(gamma_exposure) AS total_gamma_exposure,
+        MIN(expiration_date) AS earliest_expiry,
+        MAX(expiration_date) AS latest_expiry
+    FROM snap
+    GROUP BY strike_price
+    ORDER BY strike_price
+"""
+
+# Per-strike summary written at ETL load time; takes (timestamp, symbol)
+GEX_SNAPSHOT_BY_STRIKE_SQL = """
+    SELECT 
+        strike_price,
+        call_gex AS call_gamma_exposure,
+        put_gex AS put_gamma_exposure,
+        gex AS total_gamma_exposure,
+        earliest_expiry,
+        latest_expiry
+    FROM gex_snapshot
+    WHERE ts = %s AND symbol = """ + SYMBOL_ID_SQL + """
+    ORDER BY strike_price
+"""
+
+# Per-strike sums from the continuous aggregate; takes (timestamp, symbol[, expiry_end])
+AGGREGATE_BY_STRIKE_SQL = """
+    SELECT 
+        strike_price,
+        SUM(call_gex) AS call_gamma_exposure,
+        SUM(put_gex) AS put_gamma_exposure,
+        SUM(gex) AS total_gamma_exposure,
+        MIN(expiration_date) AS earliest_expiry,
+        MAX(expiration_date) AS latest_expiry
+    FROM gamma_by_strike_5m
+    WHERE bucket = time_bucket('5 minutes', %s::timestamptz) AND symbol = """ + SYMBOL_ID_SQL + """ {expiry_clause}
+    GROUP BY strike_price
+    ORDER BY strike_price
+"""
+
+# Wraps any by-strike query with the running total and the absolute-exposure rank
+GAMMA_PROFILE_SQL = """
+    SELECT 
+        g.*,
+        SUM(g.total_gamma_exposure) OVER (ORDER BY g.strike_price) AS cumulative_gamma,
+        ROW_NUMBER() OVER (ORDER BY ABS(g.total_gamma_exposure) DESC NULLS LAST, g.strike_price) AS abs_rank
+    FROM ({by_strike}) g
+    ORDER BY g.strike_price
+"""
+
+# Expiries not yet passed at the snapshot's own time, nearest first; takes
+# (timestamp, limit), so past snapshots keep the expiries they had then
+GAMMA_BY_EXPIRY_SQL = """
+    SELECT 
+        expiration_date,
+        SUM(CASE WHEN option_type = 'CALL' THEN gamma_exposure ELSE 0 END) AS call_gamma_exposure,
+        SUM(CASE WHEN option_type = 'PUT' THEN gamma_exposure ELSE 0 END) AS put_gamma_exposure,
+        SUM(gamma_exposure) AS total_gamma_exposure,
+        SUM(CASE WHEN option_type = 'CALL' THEN open_interest ELSE 0 END) AS call_open_interest,
+        SUM(CASE WHEN option_type = 'PUT' THEN open_interest ELSE 0 END) AS put_open_interest
+    FROM snap
+    WHERE expiration_date >= %s
+    GROUP BY expiration_date
+    ORDER BY expiration_date
+    LIMIT %s
+"""
+
+# Takes a LIMIT parameter
+HIGHEST_GAMMA_STRIKES_SQL = """
+    SELECT 
+        strike_price,
+        SUM(gamma_exposure) AS total_gamma_exposure
+    FROM snap
+    GROUP BY strike_price
+    ORDER BY ABS(SUM(gamma_exposure)) DESC NULLS LAST
+    LIMIT %s
+"""
+
+# One expiry of a snapshot in to_dict() field order. Numerics are cast to float8
+# in SQL and the two fixed datetimes are passed in pre-formatted, so rows need no
+# per-field conversion. Calls come before puts. Takes (timestamp_iso, expiry_iso,
+# timestamp, symbol, expiry).
+OPTIONS_CHAIN_SQL = """
+    SELECT 
+        %s::text AS timestamp,
+        s.code AS symbol,
+        o.option_type::text AS option_type,
+        o.option_symbol,
+        %s::text AS expiration_date,
+        o.strike_price::float8 AS strike_price,
+        o.iv::float8 AS iv,
+        o.delta::float8 AS delta,
+        o.gamma::float8 AS gamma,
+        o.open_interest,
+        o.volume,
+        o.gamma_exposure::float8 AS gamma_exposure,
+        o.time_till_exp::float8 AS time_till_exp
+    FROM options_data o
+    JOIN symbols s ON s.id = o.symbol
+    WHERE o.timestamp = %s AND o.symbol = """ + SYMBOL_ID_SQL + """ AND o.expiration_date = %s
+    ORDER BY o.option_type, o.strike_price
+"""
+
+# Aggregated exposure sums reported as 0 rather than null
+GAMMA_SUM_FIELDS = ['call_gamma_exposure', 'put_gamma_exposure', 'total_gamma_exposure']
+
+def _rows_to_records(rows, columns, float_fields=(), datetime_fields=(), layout="records"):
+    """
+    Convert raw aggregate rows into JSON-ready dictionaries column by column
+    
+    Args:
+        rows: Rows from cursor.fetchall()
+        columns: Column names
+        float_fields: Numeric columns cast to float, with null reported as 0
+        datetime_fields: Datetime columns rendered as ISO strings
+        layout: 'records' for a list of row dictionaries, 'soa' for one list per column
+        
+    Returns:
+        List of dictionaries, or a dictionary of column lists for layout='soa'
+    """
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    
+    for field in float_fields:
+        df[field] = df[field].astype('float64').fillna(0)
+    
+    # Aggregates repeat a handful of expiries, so each distinct value is formatted once
+    for field in datetime_fields:
+        codes, uniques = pd.factorize(df[field])
+        iso = [value.isoformat() for value in uniques]
+        iso.append(None)
+        df[field] = pd.Series(iso, dtype=object).to_numpy()[codes]
+    
+    return df.astype(object).where(df.notna(), None).to_dict('list' if layout == 'soa' else 'records')
 
 class OptionsData(models.Model):
     """
     Model for options data with TimescaleDB hypertable
     """
     timestamp = models.DateTimeField()
-    symbol = models.CharField(max_length=10)
-    option_type = models.CharField(max_length=4)  # 'CALL' or 'PUT'
+    symbol = models.SmallIntegerField()  # symbols.id of the underlying
+    option_type = models.CharField(max_length=4)  # option_side enum: 'CALL' or 'PUT'
     option_symbol = models.CharField(max_length=50)
     expiration_date = models.DateTimeField()
     strike_price = models.DecimalField(max_digits=10, decimal_places=2)
@@ -63,65 +223,148 @@ class OptionsData(models.Model):
         }
     
     @classmethod
+    @per_request
+    @cached_result("latest_options_timestamp", ttl=getattr(settings, 'LATEST_TIMESTAMP_CACHE_TTL', 5))
     def get_latest_timestamp(cls):
-        """Get the latest timestamp in the options data"""
+        """Get the latest timestamp in the options data (memoized per request, cached for a few seconds)"""
         return cls.objects.aggregate(latest=Max('timestamp'))['latest']
     
     @classmethod
-    def get_gamma_exposure_by_strike(cls, timestamp=None, symbol="_SPX"):
+    def _use_gamma_aggregate(cls, timestamp):
+        """
+        Check whether the gamma_by_strike_5m continuous aggregate covers a timestamp
+        
+        Buckets newer than the refresh policy's end offset are not materialized yet,
+        so those requests are served from the hypertable instead.
+        
+        Args:
+            timestamp: Snapshot timestamp (datetime or ISO string)
+            
+        Returns:
+            Boolean indicating whether the aggregate should be queried
+        """
+        if not getattr(settings, 'TIMESCALEDB_ENABLED', False) or timestamp is None:
+            return False
+        
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        if timezone.is_naive(timestamp):
+            timestamp = timezone.make_aware(timestamp)
+            
+        return timestamp <= timezone.now() - GAMMA_AGGREGATE_BUCKET
+    
+    @classmethod
+    def _fetch_by_strike(cls, cursor, timestamp, params, expiry_clause="", wrapper="{by_strike}"):
+        """
+        Run a by-strike gamma query against the cheapest source holding the snapshot
+        
+        Args:
+            cursor: Open database cursor
+            timestamp: Snapshot timestamp
+            params: Query parameters (timestamp, symbol[, expiry_end])
+            expiry_clause: Optional SQL filter on expiration_date
+            wrapper: SQL template wrapping the by-strike query as {by_strike}
+            
+        Returns:
+            Tuple of (rows, column names)
+        """
+        rows = []
+        
+        # Unfiltered snapshots are summarized per strike at ETL load time
+        if not expiry_clause:
+            cursor.execute(wrapper.format(by_strike=GEX_SNAPSHOT_BY_STRIKE_SQL), params)
+            rows = cursor.fetchall()
+        
+        # Settled snapshots are read from the pre-summed continuous aggregate
+        if not rows and cls._use_gamma_aggregate(timestamp):
+            cursor.execute(
+                wrapper.format(by_strike=AGGREGATE_BY_STRIKE_SQL.format(expiry_clause=expiry_clause)),
+                params
+            )
+            rows = cursor.fetchall()
+        
+        # Fall back to the hypertable for the current bucket
+        if not rows:
+            cursor.execute(
+                SNAPSHOT_CTE.format(expiry_clause=expiry_clause) + wrapper.format(by_strike=GAMMA_BY_STRIKE_SQL),
+                params
+            )
+            rows = cursor.fetchall()
+        
+        return rows, [col[0] for col in cursor.description]
+    
+    @classmethod
+    def get_gamma_exposure_by_strike(cls, timestamp=None, symbol="_SPX", expiry_end=None, layout="records"):
         """
         Get gamma exposure grouped by strike price
         
         Args:
             timestamp: Optional specific timestamp
             symbol: Symbol to filter by
+            expiry_end: Optional datetime; only contracts expiring on or before it are included
+            layout: 'records' for per-strike dictionaries, 'soa' for chart-ready column arrays
             
         Returns:
-            List of dictionaries with strike price and gamma exposure data
+            List of dictionaries with strike price and gamma exposure data, or a
+            dictionary of parallel column lists for layout='soa'
         """
-        from django.db import connection
-        
         # Get latest timestamp if not provided
         if timestamp is None:
             timestamp = cls.get_latest_timestamp()
+        
+        params = [timestamp, symbol]
+        expiry_clause = ""
+        if expiry_end is not None:
+            expiry_clause = "AND expiration_date <= %s"
+            params.append(expiry_end)
             
         # Use raw SQL for better performance with complex aggregations
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                WITH latest_data AS (
-                    SELECT * FROM options_data
-                    WHERE timestamp = %s AND symbol = %s
-                )
-                SELECT 
-                    strike_price,
-                    SUM(CASE WHEN option_type = 'CALL' THEN gamma_exposure ELSE 0 END) AS call_gamma_exposure,
-                    SUM(CASE WHEN option_type = 'PUT' THEN gamma_exposure ELSE 0 END) AS put_gamma_exposure,
-                    SUM(gamma_exposure) AS total_gamma_exposure,
-                    MIN(expiration_date) AS earliest_expiry,
-                    MAX(expiration_date) AS latest_expiry
-                FROM latest_data
-                GROUP BY strike_price
-                ORDER BY strike_price
-            """, [timestamp, symbol])
-            
-            columns = [col[0] for col in cursor.description]
-            results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        with analytics_cursor() as cursor:
+            rows, columns = cls._fetch_by_strike(cursor, timestamp, params, expiry_clause)
+        
+        return _rows_to_records(
+            rows, columns,
+            float_fields=['strike_price'] + GAMMA_SUM_FIELDS,
+            datetime_fields=('earliest_expiry', 'latest_expiry'),
+            layout=layout
+        )
+    
+    @classmethod
+    def get_gamma_profile(cls, timestamp=None, symbol="_SPX", layout="records"):
+        """
+        Get gamma exposure by strike with its running total and absolute-exposure rank
+        
+        One query serves the by-strike chart, the highest-gamma strikes and the
+        gamma levels (see OptionsService.get_gamma_profile).
+        
+        Args:
+            timestamp: Optional specific timestamp
+            symbol: Symbol to filter by
+            layout: 'records' for per-strike dictionaries, 'soa' for column arrays
             
-            # Convert decimal and datetime objects to primitives
-            for row in results:
-                row['strike_price'] = float(row['strike_price'])
-                row['call_gamma_exposure'] = float(row['call_gamma_exposure']) if row['call_gamma_exposure'] is not None else 0
-                row['put_gamma_exposure'] = float(row['put_gamma_exposure']) if row['put_gamma_exposure'] is not None else 0
-                row['total_gamma_exposure'] = float(row['total_gamma_exposure']) if row['total_gamma_exposure'] is not None else 0
-                row['earliest_expiry'] = row['earliest_expiry'].isoformat() if row['earliest_expiry'] else None
-                row['latest_expiry'] = row['latest_expiry'].isoformat() if row['latest_expiry'] else None
-                
-        return results
+        Returns:
+            By-strike data ordered by strike, with cumulative_gamma and abs_rank
+        """
+        # Get latest timestamp if not provided
+        if timestamp is None:
+            timestamp = cls.get_latest_timestamp()
+        
+        with analytics_cursor() as cursor:
+            rows, columns = cls._fetch_by_strike(cursor, timestamp, [timestamp, symbol], wrapper=GAMMA_PROFILE_SQL)
+        
+        # Match the by-strike payload, where missing sums are reported as 0
+        return _rows_to_records(
+            rows, columns,
+            float_fields=['strike_price'] + GAMMA_SUM_FIELDS + ['cumulative_gamma'],
+            datetime_fields=('earliest_expiry', 'latest_expiry'),
+            layout=layout
+        )
     
     @classmethod
     def get_gamma_by_expiry(cls, timestamp=None, symbol="_SPX", limit=10):
         """
-        Get gamma exposure grouped by expiry date
+        Get gamma exposure grouped by expiry date for the nearest expiries
+        not yet expired at the snapshot's timestamp
         
         Args:
             timestamp: Optional specific timestamp
@@ -131,43 +374,170 @@ class OptionsData(models.Model):
         Returns:
             List of dictionaries with gamma by expiry
         """
-        from django.db import connection
-        
         # Get latest timestamp if not provided
         if timestamp is None:
             timestamp = cls.get_latest_timestamp()
             
         # Use raw SQL for better performance
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                WITH latest_data AS (
-                    SELECT * FROM options_data
-                    WHERE timestamp = %s AND symbol = %s
+        with analytics_cursor() as cursor:
+            rows = []
+            
+            # Settled snapshots are read from the pre-summed continuous aggregate
+            if cls._use_gamma_aggregate(timestamp):
+                cursor.execute(f"""
+                    SELECT 
+                        expiration_date,
+                        SUM(call_gex) AS call_gamma_exposure,
+                        SUM(put_gex) AS put_gamma_exposure,
+                        SUM(gex) AS total_gamma_exposure,
+                        SUM(call_oi) AS call_open_interest,
+                        SUM(put_oi) AS put_open_interest
+                    FROM gamma_by_strike_5m
+                    WHERE bucket = time_bucket('5 minutes', %s::timestamptz) AND symbol = {SYMBOL_ID_SQL}
+                        AND expiration_date >= %s
+                    GROUP BY expiration_date
+                    ORDER BY expiration_date
+                    LIMIT %s
+                """, [timestamp, symbol, timestamp, limit])
+                rows = cursor.fetchall()
+            
+            # Fall back to the hypertable for the current bucket
+            if not rows:
+                cursor.execute(
+                    SNAPSHOT_CTE.format(expiry_clause="") + GAMMA_BY_EXPIRY_SQL,
+                    [timestamp, symbol, timestamp, limit]
                 )
+                rows = cursor.fetchall()
+            
+            columns = [col[0] for col in cursor.description]
+        
+        return _rows_to_records(
+            rows, columns,
+            float_fields=GAMMA_SUM_FIELDS,
+            datetime_fields=('expiration_date',)
+        )
+    
+    @classmethod
+    def get_gamma_time_buckets(cls, timestamp=None, symbol="_SPX", near_end=None, mid_end=None):
+        """
+        Get total gamma exposure bucketed into near, mid and long-term expiries
+        
+        Args:
+            timestamp: Optional specific timestamp
+            symbol: Symbol to filter by
+            near_end: Last expiry date (inclusive) counted as near-term
+            mid_end: Last expiry date (inclusive) counted as mid-term
+            
+        Returns:
+            Dictionary with near_term_gamma, mid_term_gamma and long_term_gamma
+        """
+        # Get latest timestamp if not provided
+        if timestamp is None:
+            timestamp = cls.get_latest_timestamp()
+        
+        with analytics_cursor() as cursor:
+            cursor.execute(SNAPSHOT_CTE.format(expiry_clause="") + """
                 SELECT 
-                    expiration_date,
-                    SUM(CASE WHEN option_type = 'CALL' THEN gamma_exposure ELSE 0 END) AS call_gamma_exposure,
-                    SUM(CASE WHEN option_type = 'PUT' THEN gamma_exposure ELSE 0 END) AS put_gamma_exposure,
-                    SUM(gamma_exposure) AS total_gamma_exposure,
-                    SUM(CASE WHEN option_type = 'CALL' THEN open_interest ELSE 0 END) AS call_open_interest,
-                    SUM(CASE WHEN option_type = 'PUT' THEN open_interest ELSE 0 END) AS put_open_interest
-                FROM latest_data
-                GROUP BY expiration_date
-                ORDER BY expiration_date
-                LIMIT %s
-            """, [timestamp, symbol, limit])
+                    SUM(gamma_exposure) FILTER (WHERE expiry_day <= %s) AS near_term_gamma,
+                    SUM(gamma_exposure) FILTER (WHERE expiry_day > %s AND expiry_day <= %s) AS mid_term_gamma,
+                    SUM(gamma_exposure) FILTER (WHERE expiry_day > %s) AS long_term_gamma
+                FROM (SELECT gamma_exposure, (expiration_date AT TIME ZONE 'UTC')::date AS expiry_day FROM snap) e
+            """, [timestamp, symbol, near_end, near_end, mid_end, mid_end])
+            row = cursor.fetchone()
+            columns = [col[0] for col in cursor.description]
+        
+        return {column: value or 0 for column, value in zip(columns, row)}
+    
+    @classmethod
+    def get_snapshot_summary(cls, timestamp=None, symbol="_SPX"):
+        """
+        Get the gamma summary row written for a snapshot at load time
+        
+        Args:
+            timestamp: Optional specific timestamp
+            symbol: Symbol to filter by
             
+        Returns:
+            Dictionary with total, near/mid/long-term gamma and zero_gamma_level,
+            or None if the snapshot has no summary row
+        """
+        # Get latest timestamp if not provided
+        if timestamp is None:
+            timestamp = cls.get_latest_timestamp()
+        
+        with analytics_cursor() as cursor:
+            cursor.execute(f"""
+                SELECT total_gamma, near_term_gamma, mid_term_gamma, long_term_gamma, zero_gamma_level
+                FROM options_snapshot_summary
+                WHERE ts = %s AND symbol = {SYMBOL_ID_SQL}
+            """, [timestamp, symbol])
+            row = cursor.fetchone()
             columns = [col[0] for col in cursor.description]
-            results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        
+        return dict(zip(columns, row)) if row else None
+    
+    @classmethod
+    def get_snapshot_levels(cls, timestamp=None, symbol="_SPX"):
+        """
+        Get gamma levels from the snapshot summary row and its gex_snapshot strikes
+        
+        Args:
+            timestamp: Optional specific timestamp
+            symbol: Symbol to filter by
             
-            # Convert decimal and datetime objects to primitives
-            for row in results:
-                row['expiration_date'] = row['expiration_date'].isoformat()
-                row['call_gamma_exposure'] = float(row['call_gamma_exposure']) if row['call_gamma_exposure'] is not None else 0
-                row['put_gamma_exposure'] = float(row['put_gamma_exposure']) if row['put_gamma_exposure'] is not None else 0
-                row['total_gamma_exposure'] = float(row['total_gamma_exposure']) if row['total_gamma_exposure'] is not None else 0
-                
-        return results
+        Returns:
+            Dictionary in the OptionsService.get_gamma_levels shape, or None if the
+            snapshot has no summary row
+        """
+        summary = cls.get_snapshot_summary(timestamp=timestamp, symbol=symbol)
+        if summary is None:
+            return None
+        
+        if timestamp is None:
+            timestamp = cls.get_latest_timestamp()
+        
+        # Point lookups of the stored top strikes, in their absolute-exposure order
+        with analytics_cursor() as cursor:
+            cursor.execute(f"""
+                SELECT 
+                    t.side,
+                    g.strike_price,
+                    g.call_gex AS call_gamma_exposure,
+                    g.put_gex AS put_gamma_exposure,
+                    g.gex AS total_gamma_exposure,
+                    g.earliest_expiry,
+                    g.latest_expiry
+                FROM options_snapshot_summary s
+                CROSS JOIN LATERAL (
+                    SELECT 'positive' AS side, strike, rank
+                    FROM unnest(s.top_positive_strikes) WITH ORDINALITY AS u(strike, rank)
+                    UNION ALL
+                    SELECT 'negative', strike, rank
+                    FROM unnest(s.top_negative_strikes) WITH ORDINALITY AS u(strike, rank)
+                ) t
+                JOIN gex_snapshot g ON g.ts = s.ts AND g.symbol = s.symbol AND g.strike_price = t.strike
+                WHERE s.ts = %s AND s.symbol = {SYMBOL_ID_SQL}
+                ORDER BY t.side DESC, t.rank
+            """, [timestamp, symbol])
+            rows, columns = cursor.fetchall(), [col[0] for col in cursor.description]
+        
+        records = _rows_to_records(
+            rows, columns,
+            float_fields=['strike_price'] + GAMMA_SUM_FIELDS,
+            datetime_fields=('earliest_expiry', 'latest_expiry')
+        )
+        
+        positive_levels = []
+        negative_levels = []
+        for record in records:
+            (positive_levels if record.pop('side') == 'positive' else negative_levels).append(record)
+        
+        return {
+            "top_positive_gamma_strikes": positive_levels,
+            "top_negative_gamma_strikes": negative_levels,
+            "zero_gamma_level": summary['zero_gamma_level'],
+            "total_gamma_exposure": summary['total_gamma'] or 0
+        }
     
     @classmethod
     def get_highest_gamma_strikes(cls, timestamp=None, symbol="_SPX", limit=10):
@@ -186,74 +556,213 @@ class OptionsData(models.Model):
         if timestamp is None:
             timestamp = cls.get_latest_timestamp()
             
-        # Use Django ORM for this query
-        from django.db.models import Func, F
-        
-        # Get total gamma exposure by strike
-        result = cls.objects.filter(
-            timestamp=timestamp,
-            symbol=symbol
-        ).values(
-            'strike_price'
-        ).annotate(
-            total_gamma=Sum('gamma_exposure'),
-            abs_gamma=Func(F('total_gamma'), function='ABS')
-        ).order_by(
-            '-abs_gamma'
-        )[:limit]
+        with analytics_cursor() as cursor:
+            # Per-strike totals are summarized at ETL load time
+            cursor.execute(f"""
+                SELECT 
+                    strike_price,
+                    gex AS total_gamma_exposure
+                FROM gex_snapshot
+                WHERE ts = %s AND symbol = {SYMBOL_ID_SQL}
+                ORDER BY ABS(gex) DESC NULLS LAST
+                LIMIT %s
+            """, [timestamp, symbol, limit])
+            rows = cursor.fetchall()
+            
+            # Settled snapshots are read from the pre-summed continuous aggregate
+            if not rows and cls._use_gamma_aggregate(timestamp):
+                cursor.execute(f"""
+                    SELECT 
+                        strike_price,
+                        SUM(gex) AS total_gamma_exposure
+                    FROM gamma_by_strike_5m
+                    WHERE bucket = time_bucket('5 minutes', %s::timestamptz) AND symbol = {SYMBOL_ID_SQL}
+                    GROUP BY strike_price
+                    ORDER BY ABS(SUM(gex)) DESC NULLS LAST
+                    LIMIT %s
+                """, [timestamp, symbol, limit])
+                rows = cursor.fetchall()
+            
+            # Fall back to the hypertable for the current bucket
+            if not rows:
+                cursor.execute(
+                    SNAPSHOT_CTE.format(expiry_clause="") + HIGHEST_GAMMA_STRIKES_SQL,
+                    [timestamp, symbol, limit]
+                )
+                rows = cursor.fetchall()
         
         # Format the response
         data = []
-        for row in result:
+        for strike_price, total_gamma in rows:
             data.append({
-                'strike_price': float(row['strike_price']),
-                'total_gamma_exposure': float(row['total_gamma']) if row['total_gamma'] else 0
+                'strike_price': float(strike_price),
+                'total_gamma_exposure': float(total_gamma) if total_gamma else 0
             })
             
         return data
     
     @classmethod
-    def get_options_chain(cls, expiry_date=None, timestamp=None, symbol="_SPX"):
+    def get_dashboard_snapshot(cls, timestamp=None, symbol="_SPX", limit=10):
         """
-        Get options chain for a specific expiry date
+        Get by-strike, by-expiry and highest-strike gamma projections in one query
+        
+        The snapshot is scanned once and the three projections are built
+        server-side with json_agg, so the dashboard needs a single round-trip.
         
         Args:
-            expiry_date: Expiry date to filter by
             timestamp: Optional specific timestamp
             symbol: Symbol to filter by
+            limit: Number of records for the by-expiry and highest-strike lists
             
         Returns:
-            Dictionary with options chain data
+            Dictionary with 'by_strike', 'by_expiry' and 'top' lists
         """
+        from django.db import connection
+        
         # Get latest timestamp if not provided
         if timestamp is None:
             timestamp = cls.get_latest_timestamp()
             
+        with connection.cursor() as cursor:
+            cursor.execute(SNAPSHOT_CTE.format(expiry_clause="") + f"""
+                SELECT json_build_object(
+                    'by_strike', COALESCE((SELECT json_agg(s) FROM ({GAMMA_BY_STRIKE_SQL}) s), '[]'::json),
+                    'by_expiry', COALESCE((SELECT json_agg(e) FROM ({GAMMA_BY_EXPIRY_SQL}) e), '[]'::json),
+                    'top', COALESCE((SELECT json_agg(t) FROM ({HIGHEST_GAMMA_STRIKES_SQL}) t), '[]'::json)
+                )
+            """, [timestamp, symbol, timestamp, limit, limit])
+            payload = cursor.fetchone()[0]
+        
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        
+        # Match the per-endpoint payloads, where missing sums are reported as 0
+        for key in ('by_strike', 'by_expiry', 'top'):
+            for row in payload[key]:
+                for field in ('call_gamma_exposure', 'put_gamma_exposure', 'total_gamma_exposure'):
+                    if field in row:
+                        row[field] = float(row[field]) if row[field] is not None else 0
+                if 'strike_price' in row:
+                    row['strike_price'] = float(row['strike_price'])
+        
+        payload['timestamp'] = timestamp.isoformat() if isinstance(timestamp, datetime) else timestamp
+        return payload
+    
+    @classmethod
+    def get_options_snapshot_json(cls, timestamp, symbol="_SPX", expiry_start=None, expiry_end=None):
+        """
+        Get every contract in a snapshot as a JSON document built by Postgres
+        
+        Args:
+            timestamp: Snapshot timestamp
+            symbol: Symbol to filter by
+            expiry_start: Optional datetime; only contracts expiring at or after it
+            expiry_end: Optional datetime; only contracts expiring before it
+            
+        Returns:
+            JSON string with timestamp, expiry_dates, options_count and options
+        """
+        from django.db import connection
+        
+        params = [timestamp, symbol]
+        expiry_clause = ""
+        if expiry_start is not None:
+            expiry_clause += " AND o.expiration_date >= %s"
+            params.append(expiry_start)
+        if expiry_end is not None:
+            expiry_clause += " AND o.expiration_date < %s"
+            params.append(expiry_end)
+        params.append(timestamp)
+        
+        with connection.cursor() as cursor:
+            # Cast to text so the document is passed through without decoding
+            cursor.execute(f"""
+                WITH snap AS (
+                    SELECT 
+                        o.timestamp, s.code AS symbol, o.option_type, o.option_symbol,
+                        o.expiration_date, o.strike_price, o.iv, o.delta, o.gamma,
+                        o.open_interest, o.volume, o.gamma_exposure, o.time_till_exp
+                    FROM options_data o
+                    JOIN symbols s ON s.id = o.symbol
+                    WHERE o.timestamp = %s AND o.symbol = {SYMBOL_ID_SQL} {expiry_clause}
+                )
+                SELECT json_build_object(
+                    'timestamp', %s::timestamptz,
+                    'expiry_dates', COALESCE(
+                        (SELECT json_agg(DISTINCT expiration_date ORDER BY expiration_date) FROM snap), '[]'::json),
+                    'options_count', (SELECT COUNT(*) FROM snap),
+                    'options', COALESCE(
+                        (SELECT json_agg(snap ORDER BY strike_price, option_type) FROM snap), '[]'::json)
+                )::text
+            """, params)
+            return cursor.fetchone()[0]
+    
+    @classmethod
+    def _resolve_chain_snapshot(cls, cursor, timestamp, expiry_date, symbol):
+        """
+        Resolve the snapshot and expiry an options chain is read from
+        
+        Args:
+            cursor: Open database cursor
+            timestamp: Optional timestamp (datetime or ISO string); defaults to the latest
+            expiry_date: Optional expiry (datetime or ISO string); defaults to the nearest unexpired
+            symbol: Symbol to filter by
+            
+        Returns:
+            Tuple of (timestamp, expiry_date), either of which may be None
+        """
+        # Get latest timestamp if not provided
+        if timestamp is None:
+            timestamp = cls.get_latest_timestamp()
+        elif isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        if isinstance(expiry_date, str):
+            expiry_date = datetime.fromisoformat(expiry_date.replace('Z', '+00:00'))
+        
         # If expiry_date not provided, get nearest expiry
         if expiry_date is None:
-            expiry_date = cls.objects.filter(
-                timestamp=timestamp,
-                symbol=symbol,
-                expiration_date__gte=timezone.now()
-            ).order_by('expiration_date').values_list('expiration_date', flat=True).first()
-        
-        # Query for options data
-        options = cls.objects.filter(
-            timestamp=timestamp,
-            symbol=symbol,
-            expiration_date=expiry_date
-        ).order_by('strike_price')
-        
-        # Format response
+            cursor.execute(f"""
+                SELECT MIN(expiration_date) FROM options_data
+                WHERE timestamp = %s AND symbol = {SYMBOL_ID_SQL} AND expiration_date >= now()
+            """, [timestamp, symbol])
+            expiry_date = cursor.fetchone()[0]
+        
+        return timestamp, expiry_date
+    
+    @staticmethod
+    def _chain_params(timestamp, expiry_date, symbol):
+        """Build the OPTIONS_CHAIN_SQL parameters, formatting both fixed datetimes once"""
+        return [
+            timestamp.astimezone(dt_timezone.utc).isoformat(),
+            expiry_date.astimezone(dt_timezone.utc).isoformat(),
+            timestamp, symbol, expiry_date
+        ]
+    
+    @classmethod
+    def get_options_chain(cls, expiry_date=None, timestamp=None, symbol="_SPX"):
+        """
+        Get options chain for a specific expiry date
+        
+        Args:
+            expiry_date: Expiry date to filter by
+            timestamp: Optional specific timestamp
+            symbol: Symbol to filter by
+            
+        Returns:
+            Dictionary with options chain data
+        """
         calls = []
         puts = []
         
-        for option in options:
-            option_dict = option.to_dict()
-            if option.option_type == 'CALL':
-                calls.append(option_dict)
-            else:
-                puts.append(option_dict)
+        with analytics_cursor() as cursor:
+            timestamp, expiry_date = cls._resolve_chain_snapshot(cursor, timestamp, expiry_date, symbol)
+            
+            if timestamp is not None and expiry_date is not None:
+                cursor.execute(OPTIONS_CHAIN_SQL, cls._chain_params(timestamp, expiry_date, symbol))
+                columns = [col[0] for col in cursor.description]
+                
+                for row in cursor.fetchall():
+                    (calls if row[2] == 'CALL' else puts).append(dict(zip(columns, row)))
                 
         return {
             'timestamp': timestamp.isoformat() if timestamp else None,
@@ -261,4 +770,88 @@ class OptionsData(models.Model):
             'symbol': symbol,
             'calls': calls,
             'puts': puts
-        }
\ No newline at end of file
+        }
+    
+    @classmethod
+    def get_options_chain_json(cls, expiry_date=None, timestamp=None, symbol="_SPX"):
+        """
+        Get options chain for a specific expiry date as a JSON document built by Postgres
+        
+        Args:
+            expiry_date: Expiry date to filter by
+            timestamp: Optional specific timestamp
+            symbol: Symbol to filter by
+            
+        Returns:
+            JSON string in the get_options_chain shape
+        """
+        from django.db import connection
+        
+        with connection.cursor() as cursor:
+            timestamp, expiry_date = cls._resolve_chain_snapshot(cursor, timestamp, expiry_date, symbol)
+            
+            if timestamp is None or expiry_date is None:
+                return json.dumps({
+                    'timestamp': timestamp.isoformat() if timestamp else None,
+                    'expiry_date': expiry_date.isoformat() if expiry_date else None,
+                    'symbol': symbol,
+                    'calls': [],
+                    'puts': []
+                })
+            
+            # Cast to text so the document is passed through without decoding
+            cursor.execute(f"""
+                WITH chain AS ({OPTIONS_CHAIN_SQL})
+                SELECT json_build_object(
+                    'timestamp', %s::text,
+                    'expiry_date', %s::text,
+                    'symbol', %s::text,
+                    'calls', COALESCE(json_agg(chain ORDER BY strike_price) FILTER (WHERE option_type = 'CALL'), '[]'::json),
+                    'puts', COALESCE(json_agg(chain ORDER BY strike_price) FILTER (WHERE option_type = 'PUT'), '[]'::json)
+                )::text
+                FROM chain
+            """, cls._chain_params(timestamp, expiry_date, symbol) + [
+                timestamp.isoformat(), expiry_date.isoformat(), symbol
+            ])
+            return cursor.fetchone()[0]
+    
+    @classmethod
+    def iter_options_chain(cls, expiry_date=None, timestamp=None, symbol="_SPX", chunk_size=500):
+        """
+        Stream an options chain contract by contract
+        
+        The snapshot and expiry are resolved before returning, so lookup errors are
+        raised here rather than part-way through a response. Rows are then read
+        through a server-side cursor in batches of chunk_size.
+        
+        Args:
+            expiry_date: Expiry date to filter by
+            timestamp: Optional specific timestamp
+            symbol: Symbol to filter by
+            chunk_size: Number of rows fetched per round trip
+            
+        Returns:
+            Iterator of contract dictionaries, calls first, each side ordered by strike
+        """
+        with analytics_cursor() as cursor:
+            timestamp, expiry_date = cls._resolve_chain_snapshot(cursor, timestamp, expiry_date, symbol)
+        
+        if timestamp is None or expiry_date is None:
+            return iter(())
+        
+        return cls._iter_chain_rows(cls._chain_params(timestamp, expiry_date, symbol), chunk_size)
+    
+    @staticmethod
+    def _iter_chain_rows(params, chunk_size):
+        """Yield OPTIONS_CHAIN_SQL rows as dictionaries from a server-side cursor"""
+        with analytics_cursor(chunked=True) as cursor:
+            cursor.execute(OPTIONS_CHAIN_SQL, params)
+            
+            # Named cursors only describe their columns after the first fetch
+            rows = cursor.fetchmany(chunk_size)
+            columns = [col[0] for col in cursor.description] if rows else []
+            
+            while rows:
+                for row in rows:
+                    yield dict(zip(columns, row))
+                rows = cursor.fetchmany(chunk_size)
\ No newline at end of file
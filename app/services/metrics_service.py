@@ -1,9 +1,29 @@
 """Business logic for market metrics"""
 
 from app.models.market import MarketMetrics
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.db.models import Max
 from django.utils import timezone
 from datetime import timedelta
+from app.utils.cache_utils import latest_metrics_cache_key, cached_result
+from app.database.connection import analytics_cursor
+
+# Reference prices for the 5/30 day changes and the 30 day volatility in one pass;
+# {volatility} is the STDDEV column, or NULL when retrying without it
+REFERENCE_PRICES_SQL = """
+    WITH m AS (
+        SELECT timestamp, spot_price, price_change_pct
+        FROM market_metrics
+        WHERE symbol = %s AND timestamp >= %s
+    )
+    SELECT 
+        (SELECT spot_price FROM m WHERE timestamp >= %s ORDER BY timestamp LIMIT 1) AS week_price,
+        (SELECT spot_price FROM m ORDER BY timestamp LIMIT 1) AS month_price,
+        {volatility} AS daily_volatility
+"""
+VOLATILITY_COLUMN = "(SELECT STDDEV(price_change_pct) FROM m)"
 
 class MetricsService:
     """Service for interacting with market metrics data"""
@@ -18,12 +38,20 @@ class MetricsService:
         Returns:
             Dictionary with market metrics
         """
+        # Serve from cache until the next ETL load invalidates it
+        cache_key = latest_metrics_cache_key(symbol)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+        
         # Get the latest metrics from DB for the symbol
         metrics = MarketMetrics.get_latest(symbol=symbol)
         
         if metrics:
             # Convert to dictionary format
-            return metrics.to_dict()
+            result = metrics.to_dict()
+            cache.set(cache_key, result, getattr(settings, 'API_CACHE_TTL', 30))
+            return dict(result)
         else:
             # Return empty metrics if no data found
             return {
@@ -66,6 +94,7 @@ class MetricsService:
         
         return metrics_list
     
+    @cached_result("price_change_metrics")
     def get_price_change_metrics(self, symbol="_SPX"):
         """
         Get price change metrics with additional calculations
@@ -82,55 +111,40 @@ class MetricsService:
         # Calculate additional metrics
         if metrics.get('spot_price') and metrics.get('prev_day_close'):
             spot = float(metrics['spot_price'])
-            prev = float(metrics['prev_day_close'])
             
             # Add 1-day metrics (already in base metrics)
             metrics['1d_change'] = metrics['price_change']
             metrics['1d_change_pct'] = metrics['price_change_pct']
             
-            # Get weekly data for 5-day change
-            week_ago = timezone.now() - timedelta(days=7)
-            week_metrics = MarketMetrics.objects.filter(
-                symbol=symbol,
-                timestamp__gte=week_ago
-            ).order_by('timestamp').first()
+            # Reference prices and volatility come from one pass over the last 30 days
+            now = timezone.now()
+            params = [symbol, now - timedelta(days=30), now - timedelta(days=7)]
+            with analytics_cursor() as cursor:
+                try:
+                    # Savepoint so a failed volatility column leaves the connection usable
+                    with transaction.atomic():
+                        cursor.execute(REFERENCE_PRICES_SQL.format(volatility=VOLATILITY_COLUMN), params)
+                        week_price, month_price, daily_volatility = cursor.fetchone()
+                except Exception:
+                    # Volatility calculation is optional
+                    cursor.execute(REFERENCE_PRICES_SQL.format(volatility="NULL"), params)
+                    week_price, month_price, daily_volatility = cursor.fetchone()
             
-            if week_metrics:
-                week_price = float(week_metrics.spot_price)
+            if week_price:
+                week_price = float(week_price)
                 metrics['5d_change'] = spot - week_price
-                metrics['5d_change_pct'] = (metrics['5d_change'] / week_price * 100) if week_price else 0
-            
-            # Get monthly data for 30-day change
-            month_ago = timezone.now() - timedelta(days=30)
-            month_metrics = MarketMetrics.objects.filter(
-                symbol=symbol,
-                timestamp__gte=month_ago
-            ).order_by('timestamp').first()
+                metrics['5d_change_pct'] = metrics['5d_change'] / week_price * 100
             
-            if month_metrics:
-                month_price = float(month_metrics.spot_price)
+            if month_price:
+                month_price = float(month_price)
                 metrics['30d_change'] = spot - month_price
-                metrics['30d_change_pct'] = (metrics['30d_change'] / month_price * 100) if month_price else 0
+                metrics['30d_change_pct'] = metrics['30d_change'] / month_price * 100
                 
-            # Calculate volatility (standard deviation of daily returns)
-            try:
-                from django.db import connection
-                with connection.cursor() as cursor:
-                    cursor.execute("""
-                        SELECT STDDEV(price_change_pct) AS daily_volatility
-                        FROM market_metrics
-                        WHERE symbol = %s
-                        AND timestamp >= %s
-                    """, [symbol, timezone.now() - timedelta(days=30)])
-                    
-                    result = cursor.fetchone()
-                    if result and result[0]:
-                        metrics['30d_volatility'] = float(result[0])
-                        # Annualized volatility (approximate using trading days)
-                        metrics['annualized_volatility'] = float(result[0]) * (252 ** 0.5)
-            except Exception:
-                # Volatility calculation is optional
-                pass
+            # Volatility (standard deviation of daily returns) is optional
+            if daily_volatility:
+                metrics['30d_volatility'] = float(daily_volatility)
+                # Annualized volatility (approximate using trading days)
+                metrics['annualized_volatility'] = float(daily_volatility) * (252 ** 0.5)
         
         return metrics
     
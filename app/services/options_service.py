@@ -1,15 +1,18 @@
 """Business logic for options data"""
 
 import pandas as pd
+import numpy as np
 from app.models.options import OptionsData
+from app.utils.cache_utils import cached_result
 from django.db import connection
 from django.db.models import Sum, Case, When, F, Value, DecimalField, Func
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta, timezone as dt_timezone
 
 class OptionsService:
     """Service for interacting with options data"""
     
+    @cached_result("options_data")
     def get_options_data(self, timestamp=None, expiry_filter=None):
         """
         Get options data with optional filters
@@ -19,7 +22,7 @@ class OptionsService:
             expiry_filter: Optional expiry date filter
             
         Returns:
-            Dictionary with options data
+            JSON string with options data, serialized by the database
         """
         # Get the latest timestamp if not specified
         if timestamp is None:
@@ -27,67 +30,50 @@ class OptionsService:
         elif isinstance(timestamp, str):
             timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
             
-        # Base query
-        query = OptionsData.objects.filter(timestamp=timestamp)
-        
-        # Apply expiry filter if provided
-        if expiry_filter:
-            today = timezone.now().date()
+        # Convert the expiry filter to [start, end) bounds on expiration date
+        expiry_start = expiry_end = None
+        if expiry_filter in ('0DTE', 'weekly', 'monthly'):
+            today = timezone.localdate()
             
             if expiry_filter == '0DTE':
                 # Same day expiration
-                query = query.filter(expiration_date__date=today)
+                end_day = today + timedelta(days=1)
             elif expiry_filter == 'weekly':
                 # Weekly expiration (within next 7 days)
-                next_week = today + timedelta(days=7)
-                query = query.filter(
-                    expiration_date__date__gte=today,
-                    expiration_date__date__lte=next_week
-                )
-            elif expiry_filter == 'monthly':
+                end_day = today + timedelta(days=8)
+            else:
                 # Monthly expiration (closest monthly expiry - typically 3rd Friday)
                 # For simplicity, let's consider options expiring this month
-                next_month = today.replace(day=1, month=today.month+1 if today.month < 12 else 1,
-                                          year=today.year if today.month < 12 else today.year+1)
-                query = query.filter(
-                    expiration_date__date__gte=today,
-                    expiration_date__date__lt=next_month
-                )
-        
-        # Execute query efficiently
-        options = query.order_by('strike_price', 'option_type')
-        
-        # Format results
-        options_data = []
-        for opt in options:
-            options_data.append(opt.to_dict())
-        
-        # Group options by expiry date
-        expiry_dates = sorted(set(opt['expiration_date'] for opt in options_data))
-        
-        # Structure the response
-        result = {
-            "timestamp": timestamp.isoformat() if timestamp else None,
-            "expiry_dates": expiry_dates,
-            "options_count": len(options_data),
-            "options": options_data
-        }
+                end_day = today.replace(day=1, month=today.month+1 if today.month < 12 else 1,
+                                        year=today.year if today.month < 12 else today.year+1)
+            
+            expiry_start = timezone.make_aware(datetime.combine(today, time.min))
+            expiry_end = timezone.make_aware(datetime.combine(end_day, time.min))
         
-        return result
+        return OptionsData.get_options_snapshot_json(
+            timestamp,
+            expiry_start=expiry_start,
+            expiry_end=expiry_end
+        )
     
-    def get_gamma_exposure_by_strike(self, timestamp=None):
+    @cached_result("gamma_strike")
+    def get_gamma_exposure_by_strike(self, timestamp=None, expiry_end=None, layout="records"):
         """
         Get gamma exposure data grouped by strike price
         
         Args:
             timestamp: Optional specific timestamp
+            expiry_end: Optional datetime upper bound on expiration date
+            layout: 'records' for per-strike dictionaries, 'soa' for chart-ready column arrays
             
         Returns:
-            List of dictionaries with strike price and gamma exposure data
+            List of dictionaries with strike price and gamma exposure data, or a
+            dictionary of parallel column lists for layout='soa'
         """
         # Use the model's method for this query
-        return OptionsData.get_gamma_exposure_by_strike(timestamp=timestamp)
+        return OptionsData.get_gamma_exposure_by_strike(timestamp=timestamp, expiry_end=expiry_end, layout=layout)
     
+    @cached_result("highest_gamma_strikes")
     def get_highest_gamma_strikes(self, timestamp=None, limit=10):
         """
         Get strikes with highest gamma exposure
@@ -102,6 +88,7 @@ class OptionsService:
         # Use the model's method for this query
         return OptionsData.get_highest_gamma_strikes(timestamp=timestamp, limit=limit)
     
+    @cached_result("gamma_expiry")
     def get_gamma_by_expiry(self, timestamp=None, limit=10):
         """
         Get gamma exposure grouped by expiry date
@@ -116,72 +103,103 @@ class OptionsService:
         # Use the model's method for this query
         return OptionsData.get_gamma_by_expiry(timestamp=timestamp, limit=limit)
     
-    def get_gamma_levels(self, timestamp=None):
+    @cached_result("dashboard_snapshot")
+    def get_dashboard_snapshot(self, timestamp=None, top_n=10):
         """
-        Get key gamma levels for analysis
+        Get the gamma projections used by the dashboard in a single query
         
         Args:
             timestamp: Optional specific timestamp
+            top_n: Number of records for the by-expiry and highest-strike lists
             
         Returns:
-            Dictionary with gamma levels data
+            Dictionary with by_strike, by_expiry and top gamma data
         """
-        # Get gamma exposure by strike
-        gamma_exposure = self.get_gamma_exposure_by_strike(timestamp=timestamp)
+        return OptionsData.get_dashboard_snapshot(timestamp=timestamp, limit=top_n)
+    
+    @cached_result("gamma_profile")
+    def get_gamma_profile(self, timestamp=None, top_n=10, layout="records"):
+        """
+        Get gamma by strike, the highest-gamma strikes and gamma levels from one query
         
-        if not gamma_exposure:
-            return {"error": "No gamma exposure data available"}
+        Args:
+            timestamp: Optional specific timestamp
+            top_n: Number of highest absolute gamma strikes to return
+            layout: 'records' for per-strike by_strike dictionaries, 'soa' for column arrays
             
-        # Sort by absolute gamma exposure
-        gamma_exposure_sorted = sorted(
-            gamma_exposure,
-            key=lambda x: abs(x['total_gamma_exposure']),
-            reverse=True
-        )
+        Returns:
+            Dictionary with by_strike, top and levels, or an error if there is no data
+        """
+        by_strike = OptionsData.get_gamma_profile(timestamp=timestamp, layout="soa")
         
-        # Get top positive and negative gamma levels
-        positive_levels = [item for item in gamma_exposure_sorted 
-                          if item['total_gamma_exposure'] > 0][:5]
-        negative_levels = [item for item in gamma_exposure_sorted 
-                          if item['total_gamma_exposure'] < 0][:5]
+        if not by_strike['strike_price']:
+            return {"error": "No gamma exposure data available"}
+        
+        # Columns arrive in strike order with the running total and abs rank computed in SQL
+        strikes = np.asarray(by_strike['strike_price'], dtype=np.float64)
+        exposures = np.asarray(by_strike['total_gamma_exposure'], dtype=np.float64)
+        cumulative_gamma = np.asarray(by_strike.pop('cumulative_gamma'), dtype=np.float64)
+        by_magnitude = np.argsort(np.asarray(by_strike.pop('abs_rank'), dtype=np.int64))
         
-        # Calculate cumulative gamma exposure
-        cumulative_gamma = 0
-        strikes = []
+        def strike_row(i):
+            return {field: values[i] for field, values in by_strike.items()}
         
-        for strike in sorted(gamma_exposure, key=lambda x: x['strike_price']):
-            cumulative_gamma += strike['total_gamma_exposure']
-            strikes.append({
-                'strike_price': strike['strike_price'],
-                'gamma_exposure': strike['total_gamma_exposure'],
-                'cumulative_gamma': cumulative_gamma
-            })
+        top = [
+            {'strike_price': by_strike['strike_price'][i], 'total_gamma_exposure': by_strike['total_gamma_exposure'][i]}
+            for i in by_magnitude[:top_n]
+        ]
         
-        # Calculate zero-gamma level (strike where cumulative gamma crosses zero)
+        # Top positive and negative levels by absolute exposure
+        positive_levels = [strike_row(i) for i in by_magnitude[exposures[by_magnitude] > 0][:5]]
+        negative_levels = [strike_row(i) for i in by_magnitude[exposures[by_magnitude] < 0][:5]]
+        
+        # Zero-gamma level: first strike interval where cumulative gamma crosses zero
         zero_gamma_level = None
-        for i in range(1, len(strikes)):
-            if (strikes[i-1]['cumulative_gamma'] <= 0 and strikes[i]['cumulative_gamma'] > 0) or \
-               (strikes[i-1]['cumulative_gamma'] >= 0 and strikes[i]['cumulative_gamma'] < 0):
-                # Linear interpolation to find zero crossing
-                s1 = strikes[i-1]['strike_price']
-                s2 = strikes[i]['strike_price']
-                g1 = strikes[i-1]['cumulative_gamma']
-                g2 = strikes[i]['cumulative_gamma']
-                
-                # Avoid division by zero
-                if g1 != g2:
-                    zero_gamma_level = s1 + (s2 - s1) * (-g1) / (g2 - g1)
-                else:
-                    zero_gamma_level = (s1 + s2) / 2
-                break
+        g1, g2 = cumulative_gamma[:-1], cumulative_gamma[1:]
+        crossings = np.flatnonzero(((g1 <= 0) & (g2 > 0)) | ((g1 >= 0) & (g2 < 0)))
+        if crossings.size:
+            i = crossings[0]
+            s1, s2 = strikes[i], strikes[i + 1]
+            
+            # Linear interpolation to find zero crossing, avoiding division by zero
+            if g1[i] != g2[i]:
+                zero_gamma_level = float(s1 + (s2 - s1) * (-g1[i]) / (g2[i] - g1[i]))
+            else:
+                zero_gamma_level = float((s1 + s2) / 2)
+        
+        if layout != "soa":
+            by_strike = pd.DataFrame(by_strike).to_dict('records')
         
         return {
-            "top_positive_gamma_strikes": positive_levels,
-            "top_negative_gamma_strikes": negative_levels,
-            "zero_gamma_level": zero_gamma_level,
-            "total_gamma_exposure": sum(s['total_gamma_exposure'] for s in gamma_exposure)
+            "by_strike": by_strike,
+            "top": top,
+            "levels": {
+                "top_positive_gamma_strikes": positive_levels,
+                "top_negative_gamma_strikes": negative_levels,
+                "zero_gamma_level": zero_gamma_level,
+                "total_gamma_exposure": float(cumulative_gamma[-1])
+            }
         }
     
+    def get_gamma_levels(self, timestamp=None):
+        """
+        Get key gamma levels for analysis
+        
+        Args:
+            timestamp: Optional specific timestamp
+            
+        Returns:
+            Dictionary with gamma levels data
+        """
+        # Summarized at load time; older snapshots fall back to the live profile
+        levels = OptionsData.get_snapshot_levels(timestamp=timestamp)
+        if levels is not None:
+            return levels
+        
+        profile = self.get_gamma_profile(timestamp=timestamp, layout="soa")
+        return profile.get("levels", profile)
+    
+    @cached_result("options_chain")
     def get_options_chain(self, expiry_date=None, timestamp=None):
         """
         Get options chain for specific expiry date
@@ -195,6 +213,34 @@ class OptionsService:
         """
         return OptionsData.get_options_chain(expiry_date=expiry_date, timestamp=timestamp)
     
+    @cached_result("options_chain_json")
+    def get_options_chain_json(self, expiry_date=None, timestamp=None):
+        """
+        Get options chain for specific expiry date, serialized by the database
+        
+        Args:
+            expiry_date: Expiry date for options chain
+            timestamp: Optional specific timestamp
+            
+        Returns:
+            JSON string with options chain data
+        """
+        return OptionsData.get_options_chain_json(expiry_date=expiry_date, timestamp=timestamp)
+    
+    def iter_options_chain(self, expiry_date=None, timestamp=None):
+        """
+        Stream the options chain for a specific expiry date, uncached
+        
+        Args:
+            expiry_date: Expiry date for options chain
+            timestamp: Optional specific timestamp
+            
+        Returns:
+            Iterator of contract dictionaries, calls first
+        """
+        return OptionsData.iter_options_chain(expiry_date=expiry_date, timestamp=timestamp)
+    
+    @cached_result("gamma_summary")
     def get_gamma_exposure_summary(self, timestamp=None):
         """
         Get summary of gamma exposure across different time frames
@@ -208,33 +254,26 @@ class OptionsService:
         if timestamp is None:
             timestamp = OptionsData.get_latest_timestamp()
             
-        # Get gamma by expiry with a higher limit to capture more data
+        # The per-expiry breakdown is reported alongside the bucket totals
         gamma_by_expiry = self.get_gamma_by_expiry(timestamp=timestamp, limit=20)
         
-        # Calculate near-term gamma (options expiring within 7 days)
-        today = timezone.now().date().isoformat() if isinstance(timestamp, datetime) else timestamp.split('T')[0]
-        next_week = (timezone.now().date() + timedelta(days=7)).isoformat()
-        
-        near_term_gamma = sum(
-            item['total_gamma_exposure'] 
-            for item in gamma_by_expiry 
-            if item['expiration_date'].split('T')[0] <= next_week
-        )
-        
-        # Calculate mid-term gamma (options expiring within 30 days)
-        next_month = (timezone.now().date() + timedelta(days=30)).isoformat()
-        mid_term_gamma = sum(
-            item['total_gamma_exposure'] 
-            for item in gamma_by_expiry 
-            if item['expiration_date'].split('T')[0] <= next_month
-        ) - near_term_gamma
-        
-        # Calculate long-term gamma (options expiring after 30 days)
-        long_term_gamma = sum(
-            item['total_gamma_exposure'] 
-            for item in gamma_by_expiry 
-            if item['expiration_date'].split('T')[0] > next_month
-        )
+        # Near-term: expiring within 7 days; mid-term: within 30 days; long-term: after.
+        # Snapshots summarized at load time skip the aggregate entirely.
+        buckets = OptionsData.get_snapshot_summary(timestamp=timestamp)
+        if buckets is None:
+            # Bucket against the snapshot's own UTC date, as the load-time summary does
+            snapshot_time = timestamp
+            if isinstance(snapshot_time, str):
+                snapshot_time = datetime.fromisoformat(snapshot_time.replace('Z', '+00:00'))
+            snapshot_day = snapshot_time.astimezone(dt_timezone.utc).date() if snapshot_time else timezone.now().date()
+            buckets = OptionsData.get_gamma_time_buckets(
+                timestamp=timestamp,
+                near_end=snapshot_day + timedelta(days=7),
+                mid_end=snapshot_day + timedelta(days=30)
+            )
+        near_term_gamma = buckets['near_term_gamma']
+        mid_term_gamma = buckets['mid_term_gamma']
+        long_term_gamma = buckets['long_term_gamma']
         
         # Calculate total gamma
         total_gamma = near_term_gamma + mid_term_gamma + long_term_gamma
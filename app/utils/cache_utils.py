@@ -0,0 +1,82 @@
+"""Cache helpers shared by the ETL loaders and API services"""
+
+import inspect
+from datetime import date, datetime
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+
+# Bumped on every ETL load; part of every cached_result key
+SNAPSHOT_GENERATION_KEY = "snapshot_generation"
+
+# Stored in place of a None result, since cache.get returns None on a miss
+_CACHED_NONE = "__cached_result_none__"
+
+def latest_metrics_cache_key(symbol):
+    """Cache key for the latest market metrics of a symbol"""
+    return f"latest_metrics:{symbol}"
+
+def last_snapshot_cache_key(symbol):
+    """Cache key for the timestamp of the last ETL tick loaded for a symbol"""
+    return f"last_snapshot:{symbol}"
+
+def upstream_validators_cache_key(api_url):
+    """Cache key for the conditional-request headers of an upstream URL"""
+    return f"upstream_validators:{api_url}"
+
+def snapshot_generation():
+    """Get the current snapshot generation, starting it at 0 if unset"""
+    return cache.get_or_set(SNAPSHOT_GENERATION_KEY, 0, None)
+
+def invalidate_snapshot_cache():
+    """
+    Start a new snapshot generation so results cached for the previous
+    one (including 'latest' lookups) are no longer served
+    """
+    try:
+        cache.incr(SNAPSHOT_GENERATION_KEY)
+    except ValueError:
+        cache.set(SNAPSHOT_GENERATION_KEY, 1, None)
+
+def _key_part(value):
+    """Render an argument value for use in a cache key"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+def cached_result(prefix, ttl=None):
+    """
+    Cache a function's return value under its call arguments
+    
+    Args:
+        prefix: Cache key prefix
+        ttl: Timeout in seconds (default: settings.API_CACHE_TTL)
+        
+    Returns:
+        Decorator for service methods and model classmethods
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            parts = [
+                f"{name}={_key_part(value)}"
+                for name, value in bound.arguments.items()
+                if name not in ('self', 'cls')
+            ]
+            cache_key = ":".join([prefix, str(snapshot_generation())] + parts)
+            
+            result = cache.get(cache_key)
+            if result is None:
+                result = func(*args, **kwargs)
+                timeout = getattr(settings, 'API_CACHE_TTL', 30) if ttl is None else ttl
+                cache.set(cache_key, _CACHED_NONE if result is None else result, timeout)
+            elif isinstance(result, str) and result == _CACHED_NONE:
+                return None
+            return result
+        
+        return wrapper
+    return decorator
\ No newline at end of file
@@ -1,63 +1,132 @@
 """Date handling utilities for options analytics"""
 
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pytz import timezone
 import exchange_calendars as xcals
 import numpy as np
 import pandas as pd
-from calendar import monthrange
 
-def find_monthly_expiration(date, tz):
+@lru_cache(maxsize=32)
+def get_tz(name):
     """
-    Identifies the third Friday of the month or Thursday if Friday is a holiday
+    Get a cached pytz timezone by name
     
     Args:
-        date: Date to find monthly expiration for
-        tz: Timezone
+        name: IANA timezone name (e.g. 'America/New_York')
         
     Returns:
-        Tuple of (expiration_date, trading_days)
+        pytz timezone object
     """
-    # Get first day of the month
-    first_day = datetime(date.year, date.month, 1, tzinfo=timezone(tz))
+    return timezone(name)
+
+@lru_cache(maxsize=8)
+def _get_calendar(calendar_name="XNYS"):
+    """Get a cached exchange calendar; constructing one builds its full schedule"""
+    return xcals.get_calendar(calendar_name)
+
+@lru_cache(maxsize=8)
+def _get_sessions(calendar_name="XNYS"):
+    """
+    Get the cached, sorted session dates of an exchange calendar
     
-    # Get number of days in the month
-    _, last_day_num = monthrange(date.year, date.month)
-    last_day = datetime(date.year, date.month, last_day_num, tzinfo=timezone(tz))
+    Args:
+        calendar_name: Exchange calendar name (default: NYSE)
+        
+    Returns:
+        Read-only datetime64[D] array for np.searchsorted lookups
+    """
+    sessions = _get_calendar(calendar_name).sessions.values.astype("datetime64[D]")
+    sessions.flags.writeable = False
+    return sessions
+
+def _tz_name(tz):
+    """Get the IANA name of a pytz, zoneinfo or other tzinfo object"""
+    return getattr(tz, 'zone', None) or getattr(tz, 'key', None) or str(tz)
+
+def _count_sessions(sessions, start_day, end_day):
+    """Count the sessions from start_day through end_day (datetime64[D]), both inclusive"""
+    return int(
+        np.searchsorted(sessions, end_day, side="right")
+        - np.searchsorted(sessions, start_day, side="left")
+    )
+
+@lru_cache(maxsize=4)
+def get_busday_calendar(calendar_name="XNYS"):
+    """
+    Get a cached NumPy business day calendar with exchange holidays
     
-    # Find all Fridays in the month
-    all_days = pd.date_range(start=first_day, end=last_day)
-    fridays = [day for day in all_days if day.weekday() == 4]  # 4 = Friday
+    Args:
+        calendar_name: Exchange calendar name (default: NYSE)
+        
+    Returns:
+        np.busdaycalendar for use with np.busday_count / np.is_busday
+    """
+    sessions = _get_sessions(calendar_name)
     
-    # Get the third Friday
-    if len(fridays) >= 3:
-        third_friday = fridays[2]
-    else:
-        # Fallback if not enough Fridays in the month
-        third_friday = fridays[-1]
+    # Holidays are the weekdays inside the calendar range that are not sessions
+    weekdays = np.arange(sessions[0], sessions[-1] + np.timedelta64(1, "D"), dtype="datetime64[D]")
+    weekdays = weekdays[np.is_busday(weekdays)]
+    holidays = np.setdiff1d(weekdays, sessions, assume_unique=True)
     
-    # Check if the third Friday is a holiday (using US calendar)
-    us_calendar = xcals.get_calendar("XNYS")  # NYSE calendar
+    return np.busdaycalendar(weekmask="1111100", holidays=holidays)
+
+def find_monthly_expiration(date, tz):
+    """
+    Identifies the third Friday of the month or Thursday if Friday is a holiday
     
-    if not us_calendar.is_session(third_friday.strftime("%Y-%m-%d")):
-        # If the third Friday is a holiday, use the previous trading day
-        prev_trading_day = us_calendar.previous_session(third_friday.strftime("%Y-%m-%d"))
-        expiration_date = pd.Timestamp(prev_trading_day).to_pydatetime().replace(tzinfo=timezone(tz))
+    Args:
+        date: Date to find monthly expiration for
+        tz: Timezone
+        
+    Returns:
+        Tuple of (expiration_date, trading_days)
+    """
+    # The third Friday falls on day 15-21: 15 plus the days from the 1st to its first Friday
+    first_day = datetime(date.year, date.month, 1)
+    offset = (4 - first_day.weekday()) % 7  # 4 = Friday
+    third_friday = np.datetime64(first_day.date(), "D") + (14 + offset)
+    
+    # Roll back to the last NYSE session on or before it if the Friday is a holiday
+    sessions = _get_sessions("XNYS")
+    if sessions[0] <= third_friday <= sessions[-1]:
+        expiration_day = sessions[np.searchsorted(sessions, third_friday, side="right") - 1]
     else:
-        expiration_date = third_friday
+        # Holidays are unknown outside the calendar's session range; keep the Friday
+        expiration_day = third_friday
+    expiration_date = get_tz(tz).localize(expiration_day.astype("datetime64[s]").astype(datetime))
     
     # Calculate trading days between current date and expiration
-    if date <= expiration_date:
-        trading_days = us_calendar.sessions_in_range(
-            date.strftime("%Y-%m-%d"), 
-            expiration_date.strftime("%Y-%m-%d")
-        ).size
+    start_day = np.datetime64(date.date() if isinstance(date, datetime) else date, "D")
+    if start_day <= expiration_day:
+        if sessions[0] <= start_day and expiration_day <= sessions[-1]:
+            trading_days = _count_sessions(sessions, start_day, expiration_day)
+        else:
+            trading_days = int(np.busday_count(
+                start_day, expiration_day + np.timedelta64(1, "D"), busdaycal=get_busday_calendar()
+            ))
     else:
         # If the date is past expiration, return 0 trading days
         trading_days = 0
     
     return expiration_date, trading_days
 
+@lru_cache(maxsize=64)
+def _monthly_expiration_day(year, month, tz):
+    """
+    Get the monthly expiration day of a month, cached since it only depends on the month
+    
+    Args:
+        year: Year
+        month: Month number
+        tz: Timezone name
+        
+    Returns:
+        datetime.date of the expiration
+    """
+    expiration_date, _ = find_monthly_expiration(get_tz(tz).localize(datetime(year, month, 1)), tz)
+    return expiration_date.date()
+
 def get_business_days_count(start_date, end_date):
     """
     Calculate number of business days between two dates
@@ -79,24 +148,55 @@ def get_business_days_count(start_date, end_date):
     if start_date > end_date:
         start_date, end_date = end_date, start_date
     
-    # Use exchange_calendars to get accurate trading days
-    us_calendar = xcals.get_calendar("XNYS")  # NYSE calendar
-    
-    # Convert datetime to string format required by exchange_calendars
-    start_str = start_date.strftime("%Y-%m-%d")
-    end_str = end_date.strftime("%Y-%m-%d")
-    
-    # Get business days count
-    try:
-        trading_days = us_calendar.sessions_in_range(start_str, end_str).size
-        return trading_days
-    except Exception:
-        # Fallback to numpy business days calculation
-        business_days = np.busday_count(
-            np.datetime64(start_date.date()),
-            np.datetime64(end_date.date())
-        )
-        return business_days
+    start_day = np.datetime64(start_date.date(), "D")
+    end_day = np.datetime64(end_date.date(), "D")
+    
+    return int(_count_business_days(start_day, end_day))
+
+def _count_business_days(start_days, end_days):
+    """
+    Count business days between datetime64[D] values or arrays with start <= end
+    
+    NYSE sessions are counted inclusively on the cached session array, falling
+    back to the plain weekday count outside the calendar's range.
+    """
+    sessions = _get_sessions("XNYS")
+    in_range = (start_days >= sessions[0]) & (end_days <= sessions[-1])
+    counts = (
+        np.searchsorted(sessions, end_days, side="right")
+        - np.searchsorted(sessions, start_days, side="left")
+    )
+    return np.where(in_range, counts, np.busday_count(start_days, end_days))
+
+def get_business_days_count_array(start_dates, end_dates, tz=None):
+    """
+    Calculate business days between paired dates for whole arrays at once
+    
+    Same counting as get_business_days_count, with each value's calendar day
+    taken in tz (aware values are converted, naive values are taken as is).
+    
+    Args:
+        start_dates: Array-like of ISO strings, datetimes or datetime64 values
+        end_dates: Array-like of the same length
+        tz: Optional timezone name whose calendar days are compared (default: UTC)
+        
+    Returns:
+        Integer NumPy array of business day counts
+    """
+    def to_days(values):
+        # One C-level ISO parse for the whole array; naive values are taken as UTC
+        instants = pd.to_datetime(values, utc=True, format='ISO8601')
+        if tz is not None:
+            instants = instants.tz_convert(get_tz(tz))
+        return instants.tz_localize(None).to_numpy().astype('datetime64[D]')
+    
+    start_days = to_days(start_dates)
+    end_days = to_days(end_dates)
+    
+    # Ensure start <= end per element
+    start_days, end_days = np.minimum(start_days, end_days), np.maximum(start_days, end_days)
+    
+    return _count_business_days(start_days, end_days)
 
 def format_expiry_dates(options_df, tzinfo):
     """
@@ -109,8 +209,9 @@ def format_expiry_dates(options_df, tzinfo):
     Returns:
         DataFrame with formatted expiration dates
     """
-    # Make a copy to avoid modifying the original
-    df = options_df.copy()
+    # Shallow copy: columns are only added or replaced whole, never written into,
+    # so the caller's frame is left unchanged without duplicating its data
+    df = options_df.copy(deep=False)
     
     if df.empty or 'expiration_date' not in df.columns:
         return df
@@ -120,45 +221,56 @@ def format_expiry_dates(options_df, tzinfo):
         # Parse string dates to datetime objects
         df['expiration_date'] = pd.to_datetime(df['expiration_date'], errors='coerce')
     
-    # Make timezone aware if not already
-    if df['expiration_date'].dt.tz is None:
+    # Make timezone aware if not already; zones are compared by name, since the same
+    # zone from pytz, zoneinfo or dateutil objects compares unequal
+    current_tz = df['expiration_date'].dt.tz
+    if current_tz is None:
         df['expiration_date'] = df['expiration_date'].dt.tz_localize(tzinfo)
-    elif df['expiration_date'].dt.tz != tzinfo:
+    elif _tz_name(current_tz) != _tz_name(tzinfo):
         df['expiration_date'] = df['expiration_date'].dt.tz_convert(tzinfo)
     
     # Add additional date-related columns useful for analysis
     today = datetime.now(tzinfo)
     
-    # Days till expiration
-    df['days_till_expiry'] = (df['expiration_date'] - today).dt.total_seconds() / (24 * 60 * 60)
-    
-    # Business days till expiration
-    df['business_days_till_expiry'] = df.apply(
-        lambda row: get_business_days_count(today, row['expiration_date']),
-        axis=1
+    # Monthly (identify third Friday) for the current and next month
+    next_month = (today.replace(day=1) + timedelta(days=32)).replace(day=1)
+    monthly_exp_days = np.array([
+        _monthly_expiration_day(today.year, today.month, tzinfo.zone),
+        _monthly_expiration_day(next_month.year, next_month.month, tzinfo.zone),
+    ], dtype='datetime64[D]')
+    
+    # Read the column once as UTC instants and once as local calendar days; every
+    # derived column below is computed from these two arrays and assigned at the end
+    expiry_instants = df['expiration_date'].to_numpy(dtype='datetime64[ns]')
+    expiry_days = df['expiration_date'].dt.tz_localize(None).to_numpy().astype('datetime64[D]')
+    
+    # Days till expiration, fractional so same-day expiries stay below 1
+    now_utc = pd.Timestamp(today).tz_convert('UTC').tz_localize(None).to_datetime64()
+    days_till_expiry = (expiry_instants - now_utc) / np.timedelta64(1, 'D')
+    
+    # Business days till expiration: sessions from today through the expiry day,
+    # both inclusive, counted as get_business_days_count does
+    today_day = np.datetime64(today.date())
+    business_days = _count_business_days(
+        np.minimum(expiry_days, today_day),
+        np.maximum(expiry_days, today_day)
     )
     
-    # Add expiry type classification
-    df['expiry_type'] = 'Other'
-    
-    # Classify expirations
-    # 0DTE (0 days to expiry)
-    df.loc[df['days_till_expiry'] < 1, 'expiry_type'] = '0DTE'
-    
-    # Weekly (1-5 business days)
-    df.loc[(df['days_till_expiry'] >= 1) & (df['business_days_till_expiry'] <= 5), 'expiry_type'] = 'Weekly'
-    
-    # Monthly (identify third Friday)
-    current_month = today.replace(day=1)
-    next_month = (current_month + timedelta(days=32)).replace(day=1)
-    
-    # Get current month expiration
-    current_month_exp, _ = find_monthly_expiration(current_month, tzinfo.zone)
-    next_month_exp, _ = find_monthly_expiration(next_month, tzinfo.zone)
+    # Classify expirations; the first matching condition wins, so monthly
+    # expirations take precedence
+    expiry_type = np.select(
+        [
+            np.isin(expiry_days, monthly_exp_days),
+            days_till_expiry < 1,                               # 0DTE (0 days to expiry)
+            (days_till_expiry >= 1) & (business_days <= 5),     # Weekly (1-5 business days)
+        ],
+        ['Monthly', '0DTE', 'Weekly'],
+        default='Other'
+    )
     
-    # Mark monthly expirations
-    df.loc[df['expiration_date'].dt.date == current_month_exp.date(), 'expiry_type'] = 'Monthly'
-    df.loc[df['expiration_date'].dt.date == next_month_exp.date(), 'expiry_type'] = 'Monthly'
+    df['days_till_expiry'] = days_till_expiry
+    df['business_days_till_expiry'] = business_days
+    df['expiry_type'] = expiry_type
     
     return df
 
@@ -174,27 +286,16 @@ def trading_days_between(date1, date2, calendar_name="XNYS"):
     Returns:
         Number of trading days between the dates
     """
-    # Convert dates to string format
-    if isinstance(date1, datetime):
-        date1_str = date1.strftime("%Y-%m-%d")
-    else:
-        date1_str = date1
-        
-    if isinstance(date2, datetime):
-        date2_str = date2.strftime("%Y-%m-%d")
-    else:
-        date2_str = date2
-    
-    # Get the calendar
-    calendar = xcals.get_calendar(calendar_name)
+    # Convert dates (datetimes or YYYY-MM-DD strings) to days
+    day1 = np.datetime64(date1.date() if isinstance(date1, datetime) else date1, "D")
+    day2 = np.datetime64(date2.date() if isinstance(date2, datetime) else date2, "D")
     
-    # Ensure date1 <= date2
-    if date1_str > date2_str:
-        date1_str, date2_str = date2_str, date1_str
+    # Ensure day1 <= day2
+    if day1 > day2:
+        day1, day2 = day2, day1
     
-    # Get trading days between the dates
-    trading_days = calendar.sessions_in_range(date1_str, date2_str)
-    return len(trading_days)
+    # Get trading days between the dates from the cached session array
+    return _count_sessions(_get_sessions(calendar_name), day1, day2)
 
 def is_third_friday(date):
     """
@@ -1,24 +1,44 @@
 """Utilities package initialization for LeafSense options analytics platform"""
 
-from app.utils.logging_utils import get_logger, setup_logging
+from app.utils.logging_utils import get_logger, setup_logging, configure_logging
 from app.utils.date_utils import (
+    get_tz,
+    get_busday_calendar,
     find_monthly_expiration, 
     get_business_days_count, 
+    get_business_days_count_array,
     format_expiry_dates,
     trading_days_between,
     is_third_friday
 )
+from app.utils.cache_utils import (
+    latest_metrics_cache_key,
+    cached_result,
+    invalidate_snapshot_cache
+)
+from app.utils.request_cache import per_request, RequestCacheMiddleware
 
 # Define publicly available imports
 __all__ = [
     # Logging utilities
     'get_logger',
     'setup_logging',
+    'configure_logging',
     
     # Date utilities
+    'get_tz',
+    'get_busday_calendar',
     'find_monthly_expiration',
     'get_business_days_count',
+    'get_business_days_count_array',
     'format_expiry_dates',
     'trading_days_between',
-    'is_third_friday'
+    'is_third_friday',
+    
+    # Cache utilities
+    'latest_metrics_cache_key',
+    'cached_result',
+    'invalidate_snapshot_cache',
+    'per_request',
+    'RequestCacheMiddleware'
 ]
\ No newline at end of file
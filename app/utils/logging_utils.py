@@ -1,41 +1,77 @@
 """Logging utilities for options analytics application"""
 
+import atexit
 import logging
 import os
+import queue
 from pathlib import Path
-from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
+from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler, QueueHandler, QueueListener
 from django.conf import settings
 
 
-def get_logger(name):
+# Shared formatters; logging.Formatter is stateless, so one instance serves every handler
+CONSOLE_FORMATTER = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+FILE_FORMATTER = logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - [%(process)d] - %(threadName)s - %(filename)s:%(lineno)d - %(message)s'
+)
+
+# Background listeners started by setup_logging, stopped (and flushed) at exit
+_listeners = []
+
+
+def _queue_handler(*handlers):
     """
-    Get a configured logger instance
+    Put handlers behind a queue so logging calls never wait on their I/O
     
     Args:
-        name: Logger name (usually __name__)
+        *handlers: Handlers run by a background QueueListener thread
         
     Returns:
-        Configured logger instance
+        QueueHandler to attach in place of the handlers
     """
-    # Create logger with appropriate name
-    logger = logging.getLogger(name)
-    
-    # Avoid duplicate handlers if logger already exists
-    if logger.handlers:
-        return logger
-    
-    # Set log level from settings
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    return QueueHandler(log_queue)
+
+
+def _stop_listeners():
+    """Stop the background listeners, writing out any queued records"""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+atexit.register(_stop_listeners)
+
+
+def _settings_level():
+    """Numeric log level from settings.LOG_LEVEL"""
     log_level = getattr(settings, 'LOG_LEVEL', 'INFO')
-    level = getattr(logging, log_level.upper(), logging.INFO)
-    logger.setLevel(level)
+    return getattr(logging, log_level.upper(), logging.INFO)
+
+
+def configure_logging():
+    """
+    Give the root logger a queued console and optional file handler, unless
+    setup_logging (or anything else) has already configured it
     
-    # Configure handlers
-    # 1. Console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(level)
+    Called explicitly by entry points such as the WSGI app and the ETL command
+    line; importing modules and get_logger attach no handlers, so imports and
+    test runs write no log files.
     
-    # 2. File handler (if log file is configured)
+    Returns:
+        Root logger
+    """
+    root_logger = logging.getLogger()
+    if root_logger.handlers:
+        return root_logger
+    
+    level = _settings_level()
     log_file = getattr(settings, 'LOG_FILE', None)
+    handlers = []
+    
+    # 1. File handler (if log file is configured)
     if log_file:
         # Ensure the directory exists
         log_dir = os.path.dirname(log_file)
@@ -48,18 +84,37 @@ def get_logger(name):
             backupCount=5
         )
         file_handler.setLevel(level)
+        file_handler.setFormatter(FILE_FORMATTER)
+        handlers.append(file_handler)
+    
+    # 2. Console handler
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(level)
+    console_handler.setFormatter(CONSOLE_FORMATTER)
+    handlers.append(console_handler)
+    
+    root_logger.addHandler(_queue_handler(*handlers))
+    return root_logger
+
+
+def get_logger(name):
+    """
+    Get a configured logger instance
+    
+    Records propagate to the root logger, which configure_logging or
+    setup_logging gives its handlers.
+    
+    Args:
+        name: Logger name (usually __name__)
         
-        # Format for file logs (more detailed)
-        file_formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - [%(process)d] - %(threadName)s - %(filename)s:%(lineno)d - %(message)s'
-        )
-        file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
+    Returns:
+        Configured logger instance
+    """
+    # Create logger with appropriate name
+    logger = logging.getLogger(name)
     
-    # Format for console logs (more concise)
-    console_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
+    # Set log level from settings
+    logger.setLevel(_settings_level())
     
     return logger
 
@@ -88,17 +143,15 @@ def setup_logging():
     root_logger = logging.getLogger()
     root_logger.setLevel(level)
     
-    # Clear existing handlers to avoid duplicates
-    if root_logger.handlers:
-        for handler in root_logger.handlers:
-            root_logger.removeHandler(handler)
+    # Clear existing handlers (and listeners from an earlier call) to avoid duplicates
+    _stop_listeners()
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
     
-    # Add console handler to root logger
+    # Console handler for the root logger
     console_handler = logging.StreamHandler()
     console_handler.setLevel(level)
-    console_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    console_handler.setFormatter(console_formatter)
-    root_logger.addHandler(console_handler)
+    console_handler.setFormatter(CONSOLE_FORMATTER)
     
     # Configure main log file
     log_file = getattr(settings, 'LOG_FILE')
@@ -109,11 +162,10 @@ def setup_logging():
         backupCount=14  # Keep two weeks of logs
     )
     file_handler.setLevel(level)
-    file_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - [%(process)d] - %(threadName)s - %(filename)s:%(lineno)d - %(message)s'
-    )
-    file_handler.setFormatter(file_formatter)
-    root_logger.addHandler(file_handler)
+    file_handler.setFormatter(FILE_FORMATTER)
+    
+    # Console and file writes happen on a background thread
+    root_logger.addHandler(_queue_handler(console_handler, file_handler))
     
     # Configure Django-specific logging
     if 'django' in settings.INSTALLED_APPS:
@@ -129,11 +181,11 @@ def setup_logging():
             backupCount=7
         )
         django_handler.setLevel(django_level)
-        django_handler.setFormatter(file_formatter)
+        django_handler.setFormatter(FILE_FORMATTER)
         
         django_logger = logging.getLogger('django.request')
         django_logger.setLevel(django_level)
-        django_logger.addHandler(django_handler)
+        django_logger.addHandler(_queue_handler(django_handler))
         
         # Django DB logger for SQL queries (usually only in DEBUG mode)
         if settings.DEBUG:
@@ -144,11 +196,11 @@ def setup_logging():
                 backupCount=3
             )
             sql_handler.setLevel(logging.DEBUG)
-            sql_handler.setFormatter(file_formatter)
+            sql_handler.setFormatter(FILE_FORMATTER)
             
             sql_logger = logging.getLogger('django.db.backends')
             sql_logger.setLevel(logging.DEBUG)
-            sql_logger.addHandler(sql_handler)
+            sql_logger.addHandler(_queue_handler(sql_handler))
     
     # Log that logging has been configured
     logging.info("Logging configured successfully")
@@ -0,0 +1,45 @@
+"""Per-request memoization for values read several times while serving one request"""
+
+from functools import wraps
+from asgiref.local import Local
+
+# Request-scoped storage, safe for both threaded WSGI and ASGI workers
+_local = Local()
+
+class RequestCacheMiddleware:
+    """Give each request a fresh memo, dropped once the response is built"""
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        _local.memo = {}
+        try:
+            return self.get_response(request)
+        finally:
+            _local.memo = None
+
+def per_request(func):
+    """
+    Memoize a function for the duration of the current request
+    
+    Outside a request (ETL, shell) the function is called directly.
+    
+    Args:
+        func: Function with hashable arguments
+        
+    Returns:
+        Wrapped function
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        memo = getattr(_local, 'memo', None)
+        if memo is None:
+            return func(*args, **kwargs)
+        
+        key = (func.__qualname__, args, tuple(sorted(kwargs.items())))
+        if key not in memo:
+            memo[key] = func(*args, **kwargs)
+        return memo[key]
+    
+    return wrapper
\ No newline at end of file
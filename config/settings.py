@@ -24,9 +24,19 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '600')),  # Seconds; reuse API connections across requests
+        'CONN_HEALTH_CHECKS': True,  # Re-check reused connections before each request
     }
 }
 
+# Connection pool used by the ETL loaders (app.database.connection)
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_INSERT_PAGE_SIZE = int(os.getenv('DB_INSERT_PAGE_SIZE', '1000'))  # Rows per batched INSERT
+DB_COPY_THRESHOLD = int(os.getenv('DB_COPY_THRESHOLD', '5000'))  # Rows per tick before loading via COPY
+DB_ANALYZE_THRESHOLD = int(os.getenv('DB_ANALYZE_THRESHOLD', '50000'))  # Rows loaded before ANALYZE
+DB_MIGRATION_DRY_RUN = os.getenv('DB_MIGRATION_DRY_RUN', 'False') == 'True'  # Log, don't run, the options_data type conversion
+
 # TimescaleDB configuration
 TIMESCALEDB_ENABLED = True
 
@@ -38,6 +48,8 @@ API_DEFAULT_SYMBOL = '_SPX'
 ETL_INTERVAL_MINUTES = int(os.getenv('ETL_INTERVAL_MINUTES', '15'))
 ETL_TIMEZONE = 'America/New_York'
 OPTIONS_FILTER_RANGE = float(os.getenv('OPTIONS_FILTER_RANGE', '0.10'))  # 10% strike range
+ETL_STAGE_DIR = os.getenv('ETL_STAGE_DIR')  # e.g. /dev/shm; stages the filtered chain as Feather (needs pyarrow)
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', os.getenv('REDIS_URL'))  # Broker for scheduler.py --beat workers
 
 # Logging settings
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -65,6 +77,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'app.utils.request_cache.RequestCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -117,6 +130,29 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'web', 'static')]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Cache settings. Set REDIS_URL (requires the redis package) so the ETL scheduler's
+# invalidations reach the web workers; the local-memory fallback relies on API_CACHE_TTL expiry.
+REDIS_URL = os.getenv('REDIS_URL')
+API_CACHE_TTL = int(os.getenv('API_CACHE_TTL', '30'))  # Seconds
+LATEST_TIMESTAMP_CACHE_TTL = int(os.getenv('LATEST_TIMESTAMP_CACHE_TTL', '5'))  # Seconds
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'TIMEOUT': API_CACHE_TTL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'leafsense-api',
+            'TIMEOUT': API_CACHE_TTL,
+        }
+    }
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -8,7 +8,7 @@ from web.views import dashboard
 urlpatterns = [
     path('', dashboard, name='dashboard'),
     path('admin/', admin.site.urls),
-    path('api/', include(api_urls())),
+    path('api/', include(api_urls)),
 ]
 
 # Add this section for serving static files during development
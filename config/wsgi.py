@@ -10,4 +10,8 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_wsgi_application()
\ No newline at end of file
+application = get_wsgi_application()
+
+# Module loggers attach no handlers; give the web process its console and log file
+from app.utils.logging_utils import configure_logging
+configure_logging()
\ No newline at end of file
@@ -10,7 +10,6 @@ django.setup()
 import sys
 import argparse
 import traceback
-from django.core.wsgi import get_wsgi_application
 from django.core.management import execute_from_command_line
 from app.database.schema import initialize_database
 from app.utils.logging_utils import setup_logging, get_logger
@@ -107,10 +106,8 @@ def main():
                 # Replace sys.argv with the Django command arguments
                 sys.argv = [sys.argv[0]] + args.args
         
-        # Initialize Django application
-        application = get_wsgi_application()
-        
-        # Execute Django command
+        # Execute Django command; django.setup() above has already populated the
+        # app registry, so no WSGI handler (and middleware chain) is built here
         execute_from_command_line(sys.argv)
         
     except Exception as e:
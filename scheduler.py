@@ -28,15 +28,31 @@ def run_etl_scheduler(interval_minutes=None):
     
     logger.info(f"Starting ETL scheduler with {interval_minutes} minute interval")
     
+    interval = interval_minutes * 60
+    
+    # Fire times are kept on the monotonic clock so wall-clock jumps (NTP, DST)
+    # cannot stretch or shorten a cycle, and each run is scheduled from the
+    # previous fire time rather than from when the last run finished
+    next_fire = time.monotonic()
+    
     while True:
-        start_time = time.time()
+        start_time = time.monotonic()
+        next_fire += interval
         
         # Run ETL process
         success = etl_process()
         
-        # Calculate elapsed time and sleep duration
-        elapsed = time.time() - start_time
-        sleep_time = max(0, interval_minutes * 60 - elapsed)
+        # Skip any slots missed by an overrunning ETL instead of firing back to back
+        now = time.monotonic()
+        elapsed = now - start_time
+        missed = 0
+        while next_fire < now:
+            next_fire += interval
+            missed += 1
+        sleep_time = max(0, next_fire - now)
+        
+        if missed:
+            logger.warning(f"ETL overran its interval, skipped {missed} scheduled run(s)")
         
         if success:
             logger.info(f"ETL completed in {elapsed:.2f} seconds. Sleeping for {sleep_time:.2f} seconds")
@@ -45,6 +61,22 @@ def run_etl_scheduler(interval_minutes=None):
         
         time.sleep(sleep_time)
 
+def run_celery_beat():
+    """
+    Run the Celery beat scheduler, which enqueues one ETL task per interval
+    
+    The tasks run on workers started with `celery -A app.etl.tasks worker -Q etl`,
+    so ETL runs can be spread over several processes or hosts.
+    """
+    from app.etl.tasks import app, lock_is_shared
+    
+    # Workers in other processes would not see a local-memory lock and could overlap
+    if not lock_is_shared():
+        raise Exception("Celery beat needs a shared cache for the ETL lock; set REDIS_URL")
+    
+    logger.info("Starting Celery beat ETL scheduler")
+    app.start(['beat', '-l', 'info'])
+
 def parse_args():
     """Parse command line arguments"""
     parser = argparse.ArgumentParser(
@@ -63,6 +95,12 @@ def parse_args():
         action="store_true",
         help="Run ETL process once and exit"
     )
+    parser.add_argument(
+        "--beat",
+        "-b",
+        action="store_true",
+        help="Enqueue ETL runs on Celery workers instead of running them in this process"
+    )
     parser.add_argument(
         "--verbose",
         "-v",
@@ -97,6 +135,9 @@ def main():
             else:
                 logger.error("ETL process failed")
                 return 1
+        elif args.beat:
+            # Distribute runs to Celery workers
+            run_celery_beat()
         else:
             # Run scheduler with specified interval
             run_etl_scheduler(args.interval)
@@ -0,0 +1,229 @@
+"""Unit tests for API endpoints"""
+
+import unittest
+import os
+import orjson
+from datetime import date, datetime, timezone as dt_timezone
+from unittest.mock import patch, MagicMock
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+# Set up Django test environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+import django
+django.setup()
+
+from app.api.routes import gamma_exposure, options_service
+from app.services.metrics_service import MetricsService
+from app.services.options_service import OptionsService
+from app.models.options import OptionsData
+
+
+class TestGammaExposure(unittest.TestCase):
+    """Test cases for the gamma exposure endpoint"""
+    
+    def setUp(self):
+        """Set up request factory and an empty cache"""
+        self.factory = RequestFactory()
+        cache.clear()
+    
+    @patch('app.services.options_service.OptionsData.get_gamma_exposure_by_strike')
+    def test_filtered_requests_share_cache_entry(self, mock_by_strike):
+        """Test identical expiry-filtered requests are served from one cache entry"""
+        mock_by_strike.return_value = [{'strike_price': 4000.0, 'total_gamma': 1.5}]
+        
+        for expiry_filter in ('0DTE', 'Weekly', 'Monthly'):
+            mock_by_strike.reset_mock()
+            first = gamma_exposure(self.factory.get('/api/gamma-exposure/', {'expiry_filter': expiry_filter}))
+            second = gamma_exposure(self.factory.get('/api/gamma-exposure/', {'expiry_filter': expiry_filter}))
+            
+            # Assertions
+            self.assertEqual(first.status_code, 200)
+            self.assertEqual(first.content, second.content)
+            mock_by_strike.assert_called_once()
+            expiry_end = mock_by_strike.call_args.kwargs['expiry_end']
+            self.assertEqual((expiry_end.hour, expiry_end.minute, expiry_end.second, expiry_end.microsecond), (23, 59, 59, 0))
+
+
+class TestPriceChangeMetrics(unittest.TestCase):
+    """Test cases for price change metrics"""
+    
+    def setUp(self):
+        """Set up an empty cache"""
+        cache.clear()
+    
+    @patch('app.services.metrics_service.transaction.atomic')
+    @patch('app.services.metrics_service.analytics_cursor')
+    @patch.object(MetricsService, 'get_latest_metrics')
+    def test_volatility_failure_falls_back(self, mock_latest, mock_cursor, mock_atomic):
+        """Test a failing volatility column still returns the price changes"""
+        mock_latest.return_value = {
+            'symbol': '_SPX', 'spot_price': 4200.0, 'prev_day_close': 4180.0,
+            'price_change': 20.0, 'price_change_pct': 0.478
+        }
+        cursor = MagicMock()
+        cursor.execute.side_effect = [Exception("stddev failed"), None]
+        cursor.fetchone.return_value = (4000.0, 4100.0, None)
+        mock_cursor.return_value.__enter__.return_value = cursor
+        
+        result = MetricsService().get_price_change_metrics(symbol='_SPX')
+        
+        # Assertions
+        self.assertEqual(cursor.execute.call_count, 2)
+        self.assertIn('NULL AS daily_volatility', cursor.execute.call_args[0][0])
+        self.assertEqual(result['5d_change'], 200.0)
+        self.assertEqual(result['30d_change'], 100.0)
+        self.assertNotIn('30d_volatility', result)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'], SECURE_SSL_REDIRECT=False)
+class TestSnapshotRoutes(SimpleTestCase):
+    """Test cases for the combined snapshot endpoints through the URLconf"""
+    
+    @patch.object(options_service, 'get_dashboard_snapshot')
+    def test_dashboard_snapshot(self, mock_snapshot):
+        """Test the dashboard snapshot passes its query params to the service"""
+        mock_snapshot.return_value = {
+            'by_strike': [{'strike_price': 4000.0, 'total_gamma': 1.5}],
+            'by_expiry': [],
+            'top': [{'strike_price': 4000.0, 'total_gamma': 1.5}],
+        }
+        
+        response = self.client.get('/api/dashboard-snapshot/', {'limit': 5})
+        
+        # Assertions
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(orjson.loads(response.content), mock_snapshot.return_value)
+        mock_snapshot.assert_called_once_with(timestamp=None, top_n=5)
+    
+    @patch.object(options_service, 'get_gamma_profile')
+    def test_gamma_profile_error(self, mock_profile):
+        """Test a failing gamma profile returns a JSON error"""
+        mock_profile.side_effect = Exception("database unavailable")
+        
+        response = self.client.get('/api/gamma-profile/', {'layout': 'soa'})
+        
+        # Assertions
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(orjson.loads(response.content), {"error": "Failed to fetch gamma profile"})
+        mock_profile.assert_called_once_with(timestamp=None, top_n=10, layout='soa')
+    
+    @patch.object(options_service, 'iter_options_chain')
+    def test_options_chain_stream(self, mock_iter_chain):
+        """Test a streamed options chain is grouped into calls and puts"""
+        mock_iter_chain.return_value = iter([
+            {'option_type': 'CALL', 'strike_price': 4000.0},
+            {'option_type': 'CALL', 'strike_price': 4050.0},
+            {'option_type': 'PUT', 'strike_price': 4000.0},
+        ])
+        
+        response = self.client.get('/api/options-chain/', {'stream': 'true', 'expiry_date': '2023-05-19'})
+        
+        # Assertions
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        body = orjson.loads(b''.join(response.streaming_content))
+        self.assertEqual([row['strike_price'] for row in body['calls']], [4000.0, 4050.0])
+        self.assertEqual([row['strike_price'] for row in body['puts']], [4000.0])
+        mock_iter_chain.assert_called_once_with(expiry_date='2023-05-19', timestamp=None)
+
+
+class TestGammaByExpiry(unittest.TestCase):
+    """Test cases for gamma by expiry queries"""
+    
+    def _cursor(self, mock_cursor, results):
+        """Cursor mock returning each result set in turn"""
+        cursor = MagicMock()
+        cursor.fetchall.side_effect = results
+        cursor.description = [('expiration_date',), ('call_gamma_exposure',), ('put_gamma_exposure',),
+                              ('total_gamma_exposure',), ('call_open_interest',), ('put_open_interest',)]
+        mock_cursor.return_value.__enter__.return_value = cursor
+        return cursor
+    
+    @patch.object(OptionsData, '_use_gamma_aggregate', return_value=True)
+    @patch('app.models.options.analytics_cursor')
+    def test_expiries_filtered_at_snapshot_time(self, mock_cursor, mock_use_aggregate):
+        """Test both the aggregate and hypertable paths keep expiries unexpired at the snapshot"""
+        timestamp = datetime(2023, 5, 1, 15, 0, tzinfo=dt_timezone.utc)
+        expiry = datetime(2023, 5, 5, 20, 0, tzinfo=dt_timezone.utc)
+        cursor = self._cursor(mock_cursor, [[], [(expiry, 1.0, -0.5, 0.5, 100, 80)]])
+        
+        result = OptionsData.get_gamma_by_expiry(timestamp=timestamp, limit=5)
+        
+        # Assertions
+        self.assertEqual(cursor.execute.call_count, 2)
+        for sql, params in (call[0] for call in cursor.execute.call_args_list):
+            self.assertNotIn('now()', sql)
+            self.assertIn('expiration_date >= %s', sql)
+            self.assertEqual(params, [timestamp, '_SPX', timestamp, 5])
+        self.assertEqual(result[0]['total_gamma_exposure'], 0.5)
+    
+    def test_dashboard_snapshot_params(self):
+        """Test the fused dashboard query binds the snapshot time for its by-expiry list"""
+        timestamp = datetime(2023, 5, 1, 15, 0, tzinfo=dt_timezone.utc)
+        cursor = MagicMock()
+        cursor.fetchone.return_value = ({'by_strike': [], 'by_expiry': [], 'top': []},)
+        
+        with patch('django.db.connection') as mock_db_connection:
+            mock_db_connection.cursor.return_value.__enter__.return_value = cursor
+            OptionsData.get_dashboard_snapshot(timestamp=timestamp, limit=5)
+        
+        # Assertions
+        sql, params = cursor.execute.call_args[0]
+        self.assertNotIn('now()', sql)
+        self.assertEqual(params, [timestamp, '_SPX', timestamp, 5, 5])
+
+
+class TestGammaSummary(unittest.TestCase):
+    """Test cases for gamma summaries and levels"""
+    
+    def setUp(self):
+        """Set up an empty cache"""
+        cache.clear()
+    
+    @patch.object(OptionsData, 'get_gamma_by_expiry', return_value=[])
+    @patch.object(OptionsData, 'get_gamma_time_buckets')
+    @patch.object(OptionsData, 'get_snapshot_summary', return_value=None)
+    def test_fallback_buckets_use_snapshot_date(self, mock_summary, mock_buckets, mock_by_expiry):
+        """Test a snapshot without a summary row is bucketed against its own date"""
+        mock_buckets.return_value = {'near_term_gamma': 1.0, 'mid_term_gamma': -2.0, 'long_term_gamma': 1.0}
+        
+        for timestamp in (datetime(2023, 5, 1, 15, 0, tzinfo=dt_timezone.utc), '2023-05-01T15:00:00Z'):
+            result = OptionsService().get_gamma_exposure_summary(timestamp=timestamp)
+            
+            # Assertions
+            kwargs = mock_buckets.call_args.kwargs
+            self.assertEqual((kwargs['near_end'], kwargs['mid_end']), (date(2023, 5, 8), date(2023, 5, 31)))
+            self.assertEqual(result['mid_term_gamma']['percentage'], 50.0)
+    
+    @patch('app.models.options.analytics_cursor')
+    def test_snapshot_levels_match_profile_zero_crossing(self, mock_cursor):
+        """Test the stored zero gamma level is served as-is and agrees with the live profile"""
+        # Cumulative gamma -2, -3, 1 crosses zero three quarters of the way from 4100 to 4200
+        profile = {
+            'strike_price': [4000.0, 4100.0, 4200.0],
+            'total_gamma_exposure': [-2.0, -1.0, 4.0],
+            'cumulative_gamma': [-2.0, -3.0, 1.0],
+            'abs_rank': [2, 3, 1],
+        }
+        with patch.object(OptionsData, 'get_gamma_profile', return_value=profile):
+            live = OptionsService().get_gamma_profile(timestamp='2023-05-01T15:00:00Z', layout='soa')
+        self.assertEqual(live['levels']['zero_gamma_level'], 4175.0)
+        
+        cursor = MagicMock()
+        cursor.fetchone.return_value = (1.0, 0.5, 0.5, 0.0, 4175.0)
+        cursor.fetchall.return_value = [('positive', 4200.0, 4.0, 0.0, 4.0, None, None)]
+        summary_columns = [('total_gamma',), ('near_term_gamma',), ('mid_term_gamma',), ('long_term_gamma',), ('zero_gamma_level',)]
+        level_columns = [('side',), ('strike_price',), ('call_gamma_exposure',), ('put_gamma_exposure',),
+                         ('total_gamma_exposure',), ('earliest_expiry',), ('latest_expiry',)]
+        descriptions = iter([summary_columns, level_columns])
+        cursor.execute.side_effect = lambda *args: setattr(cursor, 'description', next(descriptions))
+        mock_cursor.return_value.__enter__.return_value = cursor
+        
+        levels = OptionsService().get_gamma_levels(timestamp='2023-05-01T15:00:00Z')
+        
+        # Assertions
+        self.assertEqual(levels['zero_gamma_level'], live['levels']['zero_gamma_level'])
+        self.assertEqual(levels['total_gamma_exposure'], 1.0)
+        self.assertEqual([row['strike_price'] for row in levels['top_positive_gamma_strikes']], [4200.0])
+        self.assertEqual(levels['top_negative_gamma_strikes'], [])
\ No newline at end of file
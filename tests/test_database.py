@@ -0,0 +1,83 @@
+"""Unit tests for database schema setup"""
+
+import unittest
+import os
+from unittest.mock import MagicMock
+
+# Set up Django test environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+import django
+django.setup()
+
+from app.database.schema import _migrate_options_data_types
+
+
+class TestMigrateOptionsDataTypes(unittest.TestCase):
+    """Test cases for the options_data narrow type conversion"""
+    
+    def _cursor(self, column_types, compression_enabled):
+        """Cursor mock reporting the given column types and compression state"""
+        cursor = MagicMock()
+        cursor.fetchall.return_value = list(column_types.items())
+        cursor.fetchone.return_value = (compression_enabled,)
+        return cursor
+    
+    def test_converted_table_left_alone(self):
+        """Test a table already on the narrow types runs only the type check"""
+        cursor = self._cursor({'symbol': 'int2', 'option_type': 'option_side'}, True)
+        
+        # Assertions
+        self.assertFalse(_migrate_options_data_types(cursor))
+        self.assertEqual(cursor.execute.call_count, 1)
+        self.assertIn('information_schema.columns', cursor.execute.call_args[0][0])
+    
+    def test_compressed_varchar_table_converted(self):
+        """Test a compressed VARCHAR table is decompressed and converted in one query"""
+        cursor = self._cursor({'symbol': 'varchar', 'option_type': 'varchar'}, True)
+        
+        self.assertTrue(_migrate_options_data_types(cursor))
+        
+        # Assertions: type check, compression check, then the conversion as one string
+        self.assertEqual(cursor.execute.call_count, 3)
+        statements = cursor.execute.call_args[0][0].split(';')
+        order = [
+            'DROP MATERIALIZED VIEW IF EXISTS gamma_by_strike_5m',
+            "remove_compression_policy('options_data'",
+            'decompress_chunk',
+            'SET (timescaledb.compress = false)',
+            'INSERT INTO symbols (code) SELECT DISTINCT symbol',
+            'CREATE OR REPLACE FUNCTION pg_temp.symbol_id',
+            'ALTER COLUMN symbol TYPE SMALLINT USING pg_temp.symbol_id(symbol)',
+            'ADD FOREIGN KEY (symbol) REFERENCES symbols (id)',
+            'ALTER COLUMN option_type TYPE option_side USING option_type::option_side',
+        ]
+        positions = [next(i for i, sql in enumerate(statements) if fragment in sql) for fragment in order]
+        self.assertEqual(positions, sorted(positions))
+    
+    def test_uncompressed_partial_conversion(self):
+        """Test only the VARCHAR column is converted and nothing is decompressed"""
+        cursor = self._cursor({'symbol': 'int2', 'option_type': 'varchar'}, False)
+        
+        self.assertTrue(_migrate_options_data_types(cursor))
+        
+        # Assertions
+        sql = cursor.execute.call_args[0][0]
+        self.assertIn('ALTER COLUMN option_type TYPE option_side', sql)
+        self.assertNotIn('ALTER COLUMN symbol', sql)
+        self.assertNotIn('decompress_chunk', sql)
+        self.assertIn('DROP MATERIALIZED VIEW IF EXISTS gamma_by_strike_5m', sql)
+    
+    def test_dry_run_executes_nothing(self):
+        """Test a dry run logs the conversion without executing it"""
+        cursor = self._cursor({'symbol': 'varchar', 'option_type': 'varchar'}, True)
+        
+        with self.assertLogs('options_etl.schema', level='WARNING') as logs:
+            self.assertFalse(_migrate_options_data_types(cursor, dry_run=True))
+        
+        # Assertions: only the two read-only checks ran
+        self.assertEqual(cursor.execute.call_count, 2)
+        self.assertIn('decompress_chunk', logs.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
@@ -1,12 +1,17 @@
 """Unit tests for ETL process components"""
 
 import unittest
+import importlib.util
 import os
+import tempfile
 import json
+import orjson
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
-from django.test import TestCase
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase, override_settings
 from pytz import timezone
 
 # Set up Django test environment
@@ -15,9 +20,35 @@ import django
 django.setup()
 
 from app.etl.fetch import fetch_spx_options_data, fetch_market_data
-from app.etl.process import process_options_data, format_options_data, calculate_gamma_exposure, filter_options_by_range
-from app.etl.load import transform_options_data, load_market_metrics, load_options_data
-from app.etl.run import extract_data, etl_process, run_etl
+from app.etl.process import process_options_data, format_options_data, calculate_gamma_exposure, filter_options_by_range, _strike_range_positions
+from app.etl.load import transform_options_data, load_market_metrics, load_options_data, load_etl_tick, OPTIONS_COLUMNS, _to_python, _SYMBOL_IDS, _write_snapshot_summary
+from app.etl.run import extract_data, etl_process, run_etl, stage_options_data, main
+
+# Contracts expire 30 days out so none are dropped as expired
+_EXPIRY = (datetime.now() + timedelta(days=30)).strftime('%y%m%d')
+
+# CBOE options payload: a flat contract list with each strike's call followed by its put.
+# Frozen as bytes at import; tests decode a fresh copy instead of rebuilding the dict.
+_OPTIONS_FIXTURE = orjson.dumps({
+    'data': {
+        'timestamp': '2023-05-01T15:00:00Z',
+        'symbol': '_SPX',
+        'current_price': 4200.0,
+        'prev_day_close': 4180.0,
+        'price_change': 20.0,
+        'price_change_percent': 0.478,
+        'options': [
+            {"option": f"SPXW{_EXPIRY}C04000000", "iv": "0.2", "delta": "0.6", "gamma": "0.05",
+             "open_interest": "1000", "volume": "500"},
+            {"option": f"SPXW{_EXPIRY}P04000000", "iv": "0.25", "delta": "-0.4", "gamma": "0.04",
+             "open_interest": "800", "volume": "400"},
+            {"option": f"SPXW{_EXPIRY}C04200000", "iv": "0.18", "delta": "0.5", "gamma": "0.06",
+             "open_interest": "1200", "volume": "600"},
+            {"option": f"SPXW{_EXPIRY}P04200000", "iv": "0.22", "delta": "-0.5", "gamma": "0.06",
+             "open_interest": "900", "volume": "450"},
+        ]
+    }
+})
 
 class MockResponse:
     """Mock response object for requests testing"""
@@ -25,6 +56,7 @@ class MockResponse:
         self.json_data = json_data
         self.status_code = status_code
         self.text = json.dumps(json_data)
+        self.content = self.text.encode('utf-8')
         
     def json(self):
         return self.json_data
@@ -37,7 +69,7 @@ class MockResponse:
 class TestFetch(unittest.TestCase):
     """Test cases for data fetching functions"""
     
-    @patch('app.etl.fetch.requests.get')
+    @patch('app.etl.fetch._SESSION.get')
     def test_fetch_spx_options_data_successful(self, mock_get):
         """Test successful API fetch"""
         # Create mock data
@@ -62,7 +94,7 @@ class TestFetch(unittest.TestCase):
         from django.conf import settings
         symbol = getattr(settings, 'API_DEFAULT_SYMBOL', '_SPX')
         base_url = getattr(settings, 'API_BASE_URL', 'https://cdn.cboe.com/api/global/delayed_quotes/options/')
-        expected_url = f"{base_url}{symbol}"
+        expected_url = f"{base_url}{symbol}.json"
         
         # Call the function - don't provide URL so it uses the configured one
         result = fetch_spx_options_data()
@@ -73,32 +105,37 @@ class TestFetch(unittest.TestCase):
         # Verify the correct URL was used
         self.assertEqual(mock_get.call_args[0][0], expected_url)
     
-    @patch('app.etl.fetch.requests.get')
-    def test_fetch_spx_options_data_retry_logic(self, mock_get):
-        """Test retry logic on failure"""
-        # Set up mock to fail twice then succeed
-        mock_get.side_effect = [
-            Exception("Connection error"),
-            Exception("Timeout"),
-            MockResponse({'data': {'success': True}})
-        ]
+    def test_fetch_spx_options_data_retry_logic(self):
+        """Test retry configuration of the shared session"""
+        from app.etl.fetch import _SESSION
         
-        # Call the function without specifying URL to use the configured one
-        result = fetch_spx_options_data()
+        retry = _SESSION.get_adapter('https://cdn.cboe.com/').max_retries
         
         # Assertions
-        self.assertEqual(result, {'data': {'success': True}})
-        self.assertEqual(mock_get.call_count, 3)
-        
-        # Import settings to verify the URL used
-        from django.conf import settings
-        symbol = getattr(settings, 'API_DEFAULT_SYMBOL', '_SPX')
-        base_url = getattr(settings, 'API_BASE_URL', 'https://cdn.cboe.com/api/global/delayed_quotes/options/')
-        expected_url = f"{base_url}{symbol}"
+        self.assertEqual(retry.total, 3)
+        self.assertEqual(retry.backoff_factor, 2)
+        for status in (429, 500, 502, 503, 504):
+            self.assertIn(status, retry.status_forcelist)
+    
+    @patch('app.etl.fetch._SESSION.get')
+    def test_fetch_spx_options_data_failure(self, mock_get):
+        """Test failure once the session gives up retrying"""
+        import requests
+        mock_get.side_effect = requests.exceptions.ConnectionError("Connection error")
         
-        # Verify all calls used the correct URL
-        for call in mock_get.call_args_list:
-            self.assertEqual(call[0][0], expected_url)
+        # Assertions
+        with self.assertRaises(Exception):
+            fetch_spx_options_data()
+        mock_get.assert_called_once()
+    
+    @patch('app.etl.fetch._SESSION.get')
+    def test_fetch_spx_options_data_not_modified(self, mock_get):
+        """Test conditional fetch returns None when the API answers 304"""
+        mock_get.return_value = MockResponse({}, status_code=304)
+    
+        # Assertions
+        self.assertIsNone(fetch_spx_options_data(conditional=True))
+        mock_get.assert_called_once()
     
     @patch('app.etl.fetch.fetch_spx_options_data')
     def test_fetch_market_data(self, mock_fetch_options):
@@ -106,11 +143,11 @@ class TestFetch(unittest.TestCase):
         # Create mock options data
         mock_options_response = {
             'data': {
-                'option': {
-                    'underlying': '_SPX',
-                    'close': '4200.0',
-                    'prevClose': '4180.0'
-                }
+                'symbol': '_SPX',
+                'current_price': 4200.0,
+                'prev_day_close': 4180.0,
+                'price_change': 20.0,
+                'price_change_percent': 0.478
             }
         }
         
@@ -125,80 +162,21 @@ class TestFetch(unittest.TestCase):
         self.assertEqual(result['spot_price'], 4200.0)
         self.assertEqual(result['prev_day_close'], 4180.0)
         self.assertEqual(result['price_change'], 20.0)
-        self.assertAlmostEqual(result['price_change_pct'], 0.478, places=3)
+        self.assertEqual(result['price_change_pct'], 0.478)
+        
+        # An already-fetched payload is parsed without another request
+        mock_fetch_options.reset_mock()
+        self.assertEqual(fetch_market_data(mock_options_response), result)
+        mock_fetch_options.assert_not_called()
 
 
 class TestProcess(unittest.TestCase):
     """Test cases for data processing functions"""
     
-    def setUp(self):
-        """Set up test fixtures"""
-        self.test_data = {
-            'data': {
-                'timestamp': '2023-05-01T15:00:00Z',
-                'option': {
-                    'underlying': '_SPX',
-                    'close': '4200.0',
-                    'prevClose': '4180.0'
-                },
-                'options': [
-                    {
-                        "strikes": [
-                            {
-                                "strike": "4000",
-                                "expiry": "2023-05-19",
-                                "call": {
-                                    "option_root": "SPXW",
-                                    "option_ext": "230519C4000",
-                                    "iv": "0.2",
-                                    "delta": "0.6",
-                                    "gamma": "0.05",
-                                    "open_interest": "1000",
-                                    "volume": "500"
-                                },
-                                "put": {
-                                    "option_root": "SPXW",
-                                    "option_ext": "230519P4000",
-                                    "iv": "0.25",
-                                    "delta": "-0.4",
-                                    "gamma": "0.04",
-                                    "open_interest": "800",
-                                    "volume": "400"
-                                }
-                            },
-                            {
-                                "strike": "4200",
-                                "expiry": "2023-05-19",
-                                "call": {
-                                    "option_root": "SPXW",
-                                    "option_ext": "230519C4200",
-                                    "iv": "0.18",
-                                    "delta": "0.5",
-                                    "gamma": "0.06",
-                                    "open_interest": "1200",
-                                    "volume": "600"
-                                },
-                                "put": {
-                                    "option_root": "SPXW",
-                                    "option_ext": "230519P4200",
-                                    "iv": "0.22",
-                                    "delta": "-0.5",
-                                    "gamma": "0.06",
-                                    "open_interest": "900",
-                                    "volume": "450"
-                                }
-                            }
-                        ]
-                    }
-                ]
-            }
-        }
-        
-        # Set future expiry date to avoid filtering out during processing
-        future_date = (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')
-        for option in self.test_data['data']['options']:
-            for strike in option['strikes']:
-                strike['expiry'] = future_date
+    @classmethod
+    def setUpClass(cls):
+        """Set up test fixtures shared by the read-only tests"""
+        cls.test_data = orjson.loads(_OPTIONS_FIXTURE)
     
     def test_format_options_data(self):
         """Test formatting of options data into DataFrame"""
@@ -211,11 +189,59 @@ class TestProcess(unittest.TestCase):
         # Assertions
         self.assertIsInstance(result, pd.DataFrame)
         self.assertEqual(len(result), 2)  # Two strikes
-        self.assertIn('call_option_symbol', result.columns)
-        self.assertIn('put_option_symbol', result.columns)
+        self.assertIn('calls', result.columns)
+        self.assertIn('puts', result.columns)
         self.assertIn('strike_price', result.columns)
         self.assertIn('expiration_date', result.columns)
     
+    def test_format_options_data_counts_exchange_holidays(self):
+        """Test time till expiry skips NYSE holidays, here Thanksgiving 2025"""
+        tz = timezone("America/New_York")
+        today = tz.localize(datetime(2025, 11, 24, 10, 0))
+        contracts = orjson.loads(_OPTIONS_FIXTURE)['data']['options']
+        for contract, symbol in zip(contracts, ('SPXW251128C04000000', 'SPXW251128P04000000',
+                                                'SPXW251205C04200000', 'SPXW251205P04200000')):
+            contract['option'] = symbol
+        
+        result = format_options_data(contracts, today, tz)
+        
+        # Assertions: Mon-Wed before the Thursday holiday, then a full week after it
+        self.assertEqual(result['time_till_exp'].tolist(), [3 / 252, 8 / 252])
+    
+    def test_format_options_data_malformed_symbol(self):
+        """Test a malformed option symbol drops only its own row"""
+        tz = timezone("America/New_York")
+        contracts = orjson.loads(_OPTIONS_FIXTURE)['data']['options']
+        contracts[0]['option'] = 'SPXW-BAD-C04X00000'
+        
+        # Call the function
+        with self.assertLogs('app.etl.process', level='WARNING'):
+            result = format_options_data(contracts, datetime.now(tz), tz)
+        
+        # Assertions
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result['strike_price'].iloc[0], 4200.0)
+        self.assertEqual(result['calls'].iloc[0], f"SPXW{_EXPIRY}C04200000")
+    
+    def test_format_options_data_odd_contract_count(self):
+        """Test an unpaired trailing contract is dropped and pairs stay aligned"""
+        tz = timezone("America/New_York")
+        contracts = orjson.loads(_OPTIONS_FIXTURE)['data']['options']
+        contracts.append({"option": f"SPXW{_EXPIRY}C04400000", "iv": "0.15", "delta": "0.4",
+                          "gamma": "0.03", "open_interest": "700", "volume": "300"})
+        
+        # Call the function
+        with self.assertLogs('app.etl.process', level='WARNING'):
+            result = format_options_data(contracts, datetime.now(tz), tz)
+        
+        # Assertions
+        self.assertEqual(len(result), 2)
+        self.assertNotIn(4400.0, result['strike_price'].tolist())
+        self.assertEqual(result['calls'].tolist(), [f"SPXW{_EXPIRY}C04000000", f"SPXW{_EXPIRY}C04200000"])
+        self.assertEqual(result['puts'].tolist(), [f"SPXW{_EXPIRY}P04000000", f"SPXW{_EXPIRY}P04200000"])
+        self.assertEqual(result['call_open_interest'].tolist(), [1000, 1200])
+        self.assertEqual(result['put_open_interest'].tolist(), [800, 900])
+    
     def test_calculate_gamma_exposure(self):
         """Test gamma exposure calculations"""
         # Create test dataframe
@@ -263,6 +289,36 @@ class TestProcess(unittest.TestCase):
         self.assertEqual(len(result), 3)  # Only strikes within 5% range
         self.assertTrue((result['strike_price'] >= 3990).all())  # Lower bound
         self.assertTrue((result['strike_price'] <= 4410).all())  # Upper bound
+    
+    def test_strike_range_positions_per_expiry(self):
+        """Test the strike window is binary-searched within each expiry run"""
+        expiries = pd.to_datetime(['2023-05-19'] * 4 + ['2023-05-26'] * 3 + ['2023-06-16'] * 2, utc=True)
+        df = pd.DataFrame({
+            'expiration_date': expiries,
+            'strike_price': [3800.0, 4000.0, 4200.0, 4400.0, 3900.0, 4100.0, 4500.0, 4600.0, 4700.0],
+        })
+        
+        positions = _strike_range_positions(df, 3990.0, 4410.0)
+        
+        # Assertions: two runs hit the window, the last one lies above it
+        self.assertEqual(positions.tolist(), [1, 2, 3, 5])
+        result = filter_options_by_range(df, 4200.0, 0.05)
+        self.assertEqual(result.index.tolist(), [1, 2, 3, 5])
+    
+    def test_strike_range_positions_fallback(self):
+        """Test unsorted or NaN strikes fall back to the boolean mask"""
+        expiries = pd.to_datetime(['2023-05-19'] * 3 + ['2023-05-26'] * 2, utc=True)
+        unsorted = pd.DataFrame({
+            'expiration_date': expiries,
+            'strike_price': [4200.0, 4000.0, 4400.0, 3900.0, 4100.0],
+        })
+        with_nan = unsorted.assign(strike_price=[4000.0, np.nan, 4400.0, 3900.0, 4100.0])
+        
+        # Assertions
+        self.assertIsNone(_strike_range_positions(unsorted, 3990.0, 4410.0))
+        self.assertIsNone(_strike_range_positions(with_nan, 3990.0, 4410.0))
+        self.assertEqual(filter_options_by_range(unsorted, 4200.0, 0.05).index.tolist(), [0, 1, 2, 4])
+        self.assertEqual(filter_options_by_range(with_nan, 4200.0, 0.05).index.tolist(), [0, 2, 4])
 
 
 class TestLoad(unittest.TestCase):
@@ -276,14 +332,14 @@ class TestLoad(unittest.TestCase):
             'expiration_date': [now + timedelta(days=30), now + timedelta(days=30)],
             'strike_price': [4000, 4200],
             'time_till_exp': [0.082, 0.082],
-            'call_option_symbol': ['SPXW230519C4000', 'SPXW230519C4200'],
+            'calls': ['SPXW230519C4000', 'SPXW230519C4200'],
             'call_iv': [0.2, 0.18],
             'call_delta': [0.6, 0.5],
             'call_gamma': [0.05, 0.06],
             'call_open_interest': [1000, 1200],
             'call_volume': [500, 600],
             'call_gamma_exposure': [1000000, 1200000],
-            'put_option_symbol': ['SPXW230519P4000', 'SPXW230519P4200'],
+            'puts': ['SPXW230519P4000', 'SPXW230519P4200'],
             'put_iv': [0.25, 0.22],
             'put_delta': [-0.4, -0.5],
             'put_gamma': [0.04, 0.06],
@@ -300,15 +356,147 @@ class TestLoad(unittest.TestCase):
         # Assertions
         self.assertIsInstance(result, list)
         self.assertEqual(len(result), 4)  # 2 calls and 2 puts
+        self.assertTrue(all(len(r) == len(OPTIONS_COLUMNS) for r in result))
         
         # Check first call record
-        call_record = [r for r in result if r['option_type'] == 'CALL' and r['strike_price'] == 4000][0]
+        records = [dict(zip(OPTIONS_COLUMNS, r)) for r in result]
+        call_record = [r for r in records if r['option_type'] == 'CALL' and r['strike_price'] == 4000][0]
         self.assertEqual(call_record['timestamp'], timestamp)
         self.assertEqual(call_record['symbol'], '_SPX')
         self.assertEqual(call_record['option_symbol'], 'SPXW230519C4000')
         self.assertEqual(call_record['iv'], 0.2)
         self.assertEqual(call_record['gamma'], 0.05)
         self.assertEqual(call_record['gamma_exposure'], 1000000)
+    
+    def test_to_python_widens_float32(self):
+        """Test float32 values are widened by repr and NaN becomes None"""
+        values = np.array([0.2, np.nan], dtype=np.float32)
+        self.assertEqual(_to_python(values), [0.2, None])
+        self.assertEqual(_to_python(np.array([3.0, np.nan]), integer=True), [3, None])
+    
+    def _tick(self):
+        """Market metrics and two options rows for a single ETL tick"""
+        timestamp = datetime(2023, 5, 1, 15, 0)
+        market_metrics = {
+            'symbol': '_SPX', 'spot_price': 4200.0, 'prev_day_close': 4180.0,
+            'price_change': 20.0, 'price_change_pct': 0.478
+        }
+        expiry = timestamp + timedelta(days=30)
+        records = [
+            (timestamp, '_SPX', 'CALL', 'SPXW230531C04000000', expiry, 4000.0, 0.2, 0.6, 0.05, 1000, 500, 1000000.0, 0.082),
+            (timestamp, '_SPX', 'PUT', 'SPXW230531P04000000', expiry, 4000.0, 0.25, -0.4, 0.04, 800, 400, -800000.0, 0.082),
+        ]
+        return market_metrics, records, timestamp
+    
+    def _mock_connection(self):
+        """Connection and cursor mocks that resolve every symbol to id 1"""
+        connection = MagicMock(closed=False)
+        cursor = MagicMock()
+        cursor.fetchone.return_value = (1,)
+        return connection, cursor
+    
+    @patch('app.etl.load.close_connection')
+    @patch('app.etl.load.execute_values')
+    @patch('app.etl.load.create_cursor')
+    @patch('app.etl.load.create_db_connection')
+    def test_load_etl_tick_insert(self, mock_connect, mock_cursor, mock_execute_values, mock_close):
+        """Test a small tick is upserted with execute_values and committed once"""
+        connection, cursor = self._mock_connection()
+        mock_connect.return_value = connection
+        mock_cursor.return_value = cursor
+        _SYMBOL_IDS.clear()
+        market_metrics, records, timestamp = self._tick()
+        
+        self.assertTrue(load_etl_tick(market_metrics, records, timestamp))
+        
+        mock_connect.assert_called_once_with(autocommit=False)
+        connection.commit.assert_called_once()
+        connection.rollback.assert_not_called()
+        cursor.copy_expert.assert_not_called()
+        rows = list(mock_execute_values.call_args[0][2])
+        self.assertEqual([row[1] for row in rows], [1, 1])
+        self.assertEqual(rows[0][3], 'SPXW230531C04000000')
+        mock_close.assert_called_once_with(connection, cursor)
+    
+    @override_settings(DB_COPY_THRESHOLD=1)
+    @patch('app.etl.load.close_connection')
+    @patch('app.etl.load.execute_values')
+    @patch('app.etl.load.create_cursor')
+    @patch('app.etl.load.create_db_connection')
+    def test_load_etl_tick_copy(self, mock_connect, mock_cursor, mock_execute_values, mock_close):
+        """Test a tick over the COPY threshold is streamed through the staging table"""
+        connection, cursor = self._mock_connection()
+        mock_connect.return_value = connection
+        mock_cursor.return_value = cursor
+        _SYMBOL_IDS.clear()
+        market_metrics, records, timestamp = self._tick()
+        
+        self.assertTrue(load_etl_tick(market_metrics, records, timestamp))
+        
+        mock_execute_values.assert_not_called()
+        connection.commit.assert_called_once()
+        copy_sql, buffer = cursor.copy_expert.call_args[0]
+        self.assertIn('COPY options_stage', copy_sql)
+        lines = buffer.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[0].split(',')[1:4], ['1', 'CALL', 'SPXW230531C04000000'])
+        statements = [call[0][0] for call in cursor.execute.call_args_list]
+        self.assertTrue(any('SELECT' in sql and 'FROM options_stage' in sql for sql in statements))
+    
+    def test_write_snapshot_summary(self):
+        """Test the snapshot summary is built from the tick's distinct timestamps"""
+        cursor = MagicMock()
+        _, records, timestamp = self._tick()
+        
+        _write_snapshot_summary(cursor, records)
+        
+        # Assertions
+        sql, params = cursor.execute.call_args[0]
+        self.assertEqual(params, {'timestamps': [timestamp]})
+        self.assertIn('INSERT INTO options_snapshot_summary', sql)
+        self.assertIn('FROM gex_snapshot', sql)
+        # Zero gamma is interpolated on the first interval where the running total changes sign
+        self.assertIn('prev_strike + (strike_price - prev_strike) * (-prev_cumulative) / (cumulative_gamma - prev_cumulative)', sql)
+        self.assertIn('(prev_cumulative <= 0 AND cumulative_gamma > 0) OR (prev_cumulative >= 0 AND cumulative_gamma < 0)', sql)
+    
+    @patch('app.etl.load.close_connection')
+    @patch('app.etl.load.execute_values')
+    @patch('app.etl.load.create_cursor')
+    @patch('app.etl.load.create_db_connection')
+    def test_load_etl_tick_writes_summary_after_strikes(self, mock_connect, mock_cursor, mock_execute_values, mock_close):
+        """Test the summary is written after the per-strike rows it reads"""
+        connection, cursor = self._mock_connection()
+        mock_connect.return_value = connection
+        mock_cursor.return_value = cursor
+        _SYMBOL_IDS.clear()
+        market_metrics, records, timestamp = self._tick()
+        
+        self.assertTrue(load_etl_tick(market_metrics, records, timestamp))
+        
+        statements = [call[0][0] for call in cursor.execute.call_args_list]
+        gex_index = next(i for i, sql in enumerate(statements) if 'INSERT INTO gex_snapshot' in sql)
+        summary_index = next(i for i, sql in enumerate(statements) if 'INSERT INTO options_snapshot_summary' in sql)
+        self.assertLess(gex_index, summary_index)
+    
+    @patch('app.etl.load.close_connection')
+    @patch('app.etl.load.execute_values')
+    @patch('app.etl.load.create_cursor')
+    @patch('app.etl.load.create_db_connection')
+    def test_load_etl_tick_rollback(self, mock_connect, mock_cursor, mock_execute_values, mock_close):
+        """Test a failed tick is rolled back and forgets the symbol ids it registered"""
+        connection, cursor = self._mock_connection()
+        mock_connect.return_value = connection
+        mock_cursor.return_value = cursor
+        mock_execute_values.side_effect = Exception("insert failed")
+        _SYMBOL_IDS.clear()
+        market_metrics, records, timestamp = self._tick()
+        
+        self.assertFalse(load_etl_tick(market_metrics, records, timestamp))
+        
+        connection.commit.assert_not_called()
+        connection.rollback.assert_called_once()
+        self.assertEqual(_SYMBOL_IDS, {})
+        mock_close.assert_called_once_with(connection, cursor)
 
 
 class TestETLProcess(TestCase):
@@ -319,45 +507,7 @@ class TestETLProcess(TestCase):
     def test_extract_data(self, mock_fetch_market, mock_fetch_options):
         """Test the data extraction process"""
         # Set up mocks
-        future_date = (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')
-        mock_options_data = {
-            'data': {
-                'timestamp': '2023-05-01T15:00:00Z',
-                'option': {
-                    'underlying': '_SPX',
-                    'close': '4200.0',
-                    'prevClose': '4180.0'
-                },
-                'options': [
-                    {
-                        "strikes": [
-                            {
-                                "strike": "4000",
-                                "expiry": future_date,
-                                "call": {
-                                    "option_root": "SPXW",
-                                    "option_ext": "230519C4000",
-                                    "iv": "0.2",
-                                    "delta": "0.6",
-                                    "gamma": "0.05",
-                                    "open_interest": "1000",
-                                    "volume": "500"
-                                },
-                                "put": {
-                                    "option_root": "SPXW",
-                                    "option_ext": "230519P4000",
-                                    "iv": "0.25",
-                                    "delta": "-0.4",
-                                    "gamma": "0.04",
-                                    "open_interest": "800",
-                                    "volume": "400"
-                                }
-                            }
-                        ]
-                    }
-                ]
-            }
-        }
+        mock_options_data = orjson.loads(_OPTIONS_FIXTURE)
         
         mock_market_data = {
             'symbol': '_SPX',
@@ -381,9 +531,8 @@ class TestETLProcess(TestCase):
     
     @patch('app.etl.run.extract_data')
     @patch('app.etl.run.transform_options_data')
-    @patch('app.etl.run.load_market_metrics')
-    @patch('app.etl.run.load_options_data')
-    def test_etl_process(self, mock_load_options, mock_load_metrics, mock_transform, mock_extract):
+    @patch('app.etl.run.load_etl_tick')
+    def test_etl_process(self, mock_load_tick, mock_transform, mock_extract):
         """Test the full ETL process"""
         # Set up mocks
         mock_extract.return_value = (
@@ -393,8 +542,7 @@ class TestETLProcess(TestCase):
         )
         
         mock_transform.return_value = [{'option_symbol': 'SPXW230519C4000'}]
-        mock_load_metrics.return_value = True
-        mock_load_options.return_value = True
+        mock_load_tick.return_value = True
         
         # Call the function
         result = etl_process()
@@ -403,8 +551,7 @@ class TestETLProcess(TestCase):
         self.assertTrue(result)
         mock_extract.assert_called_once()
         mock_transform.assert_called_once()
-        mock_load_metrics.assert_called_once()
-        mock_load_options.assert_called_once()
+        mock_load_tick.assert_called_once()
     
     @patch('app.etl.run.etl_process')
     def test_run_etl_success(self, mock_etl_process):
@@ -433,5 +580,108 @@ class TestETLProcess(TestCase):
         mock_etl_process.assert_called_once()
 
 
+
+class TestStaging(unittest.TestCase):
+    """Test cases for Feather staging and the extract-only command line run"""
+    
+    def _processed(self):
+        """Filtered chain with a non-default index, as filter_options_by_range returns it"""
+        expiry = pd.Timestamp('2023-05-19 16:00', tz='America/New_York')
+        return pd.DataFrame({
+            'expiration_date': [expiry, expiry],
+            'strike_price': [4000.0, 4200.0],
+            'time_till_exp': [0.071, 0.071],
+            'calls': ['SPXW230519C04000000', 'SPXW230519C04200000'],
+            'call_iv': np.array([0.2, 0.18], dtype=np.float32),
+            'call_gamma': np.array([0.05, 0.06], dtype=np.float32),
+            'call_open_interest': np.array([1000, 1200], dtype=np.uint16),
+            'call_gamma_exposure': [1000000.0, 1200000.0],
+            'puts': ['SPXW230519P04000000', 'SPXW230519P04200000'],
+            'put_iv': np.array([0.25, 0.22], dtype=np.float32),
+            'put_gamma': np.array([0.04, np.nan], dtype=np.float32),
+            'put_open_interest': np.array([800, 900], dtype=np.uint16),
+            'put_gamma_exposure': [-800000.0, np.nan],
+        }, index=[3, 7])
+    
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), "pyarrow is not installed")
+    def test_stage_round_trip(self):
+        """Test a staged chain transforms to the same rows as the in-memory frame"""
+        filtered_data = self._processed()
+        timestamp = datetime(2023, 5, 1, 15, 0)
+        
+        with tempfile.TemporaryDirectory() as stage_dir:
+            path = stage_options_data(filtered_data, stage_dir)
+            staged = transform_options_data(path, timestamp)
+        
+        # Assertions
+        self.assertEqual(staged, transform_options_data(filtered_data, timestamp))
+        self.assertEqual(len(staged), 3)  # The put without gamma is dropped
+    
+    @patch('django.setup')
+    @patch('app.etl.run.configure_logging')
+    @patch('app.etl.run.run_etl')
+    @patch('app.etl.run.extract_data')
+    def test_main_no_load(self, mock_extract, mock_run_etl, mock_configure_logging, mock_setup):
+        """Test --no-load extracts and transforms without touching Django or the database"""
+        mock_extract.return_value = (self._processed(), {'symbol': '_SPX'}, datetime(2023, 5, 1, 15, 0))
+        
+        with patch('builtins.print') as mock_print:
+            exit_code = main(['--no-load'])
+        
+        # Assertions
+        self.assertEqual(exit_code, 0)
+        mock_extract.assert_called_once_with()
+        mock_run_etl.assert_not_called()
+        mock_setup.assert_not_called()
+        self.assertIn('Extracted 3 options records', mock_print.call_args[0][0])
+
+@unittest.skipUnless(
+    importlib.util.find_spec('celery') and importlib.util.find_spec('redis'),
+    "celery and redis are not installed"
+)
+class TestRunEtlTask(unittest.TestCase):
+    """Test cases for the Celery ETL task lock"""
+    
+    def setUp(self):
+        """Import the task module and give it an empty cache"""
+        from app.etl import tasks
+        self.tasks = tasks
+        self.cache = LocMemCache('etl-lock-test', {})
+        self.cache.clear()
+    
+    @override_settings(REDIS_URL=None)
+    def test_concurrent_run_skipped_and_lock_released(self):
+        """Test a run started while one holds the lock is skipped, and a failing run frees the lock"""
+        nested_results = []
+        
+        def etl_process():
+            # A second worker fires while this run still holds the lock
+            nested_results.append(self.tasks.run_etl_task())
+            raise Exception("Test error")
+        
+        with patch.object(self.tasks, 'caches', {'default': self.cache}), \
+                patch.object(self.tasks, 'etl_process', side_effect=etl_process) as mock_etl_process:
+            with self.assertRaises(Exception):
+                self.tasks.run_etl_task()
+            
+            # Assertions
+            self.assertEqual(nested_results, [False])
+            mock_etl_process.assert_called_once()
+            self.assertIsNone(self.cache.get(self.tasks.ETL_LOCK_KEY))
+    
+    @override_settings(REDIS_URL=None)
+    def test_expired_lock_owned_by_another_run_is_kept(self):
+        """Test a run whose lock expired does not delete the lock a newer run took"""
+        def etl_process():
+            # The lock expired and another worker took it with its own token
+            self.cache.set(self.tasks.ETL_LOCK_KEY, 12345)
+            return True
+        
+        with patch.object(self.tasks, 'caches', {'default': self.cache}), \
+                patch.object(self.tasks, 'etl_process', side_effect=etl_process):
+            self.assertTrue(self.tasks.run_etl_task())
+        
+        self.assertEqual(self.cache.get(self.tasks.ETL_LOCK_KEY), 12345)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,270 @@
+"""Unit tests for shared utilities"""
+
+import unittest
+import os
+import logging
+import numpy as np
+import pandas as pd
+import exchange_calendars as xcals
+from datetime import date, datetime, timedelta
+from logging.handlers import QueueHandler
+from unittest.mock import MagicMock
+from pytz import timezone
+from django.core.cache import cache
+from django.test import override_settings
+
+# Set up Django test environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+import django
+django.setup()
+
+from app.utils.logging_utils import get_logger, configure_logging, _listeners
+from app.utils.cache_utils import cached_result, invalidate_snapshot_cache, snapshot_generation
+from app.utils.request_cache import RequestCacheMiddleware, per_request
+from app.utils.date_utils import (
+    find_monthly_expiration,
+    format_expiry_dates,
+    get_business_days_count,
+    get_business_days_count_array,
+    _get_sessions
+)
+
+NY = "America/New_York"
+
+def _third_friday(year, month):
+    """Arithmetic third Friday of a month, ignoring holidays"""
+    first_day = date(year, month, 1)
+    return first_day + timedelta(days=14 + (4 - first_day.weekday()) % 7)
+
+
+class TestLogging(unittest.TestCase):
+    """Test cases for logging utilities"""
+    
+    def test_module_loggers_have_no_handlers(self):
+        """Test module loggers leave writing to the root logger"""
+        logger = get_logger('tests.logging_probe')
+        
+        # Assertions
+        self.assertEqual(logger.handlers, [])
+        self.assertTrue(logger.propagate)
+    
+    def test_get_logger_leaves_root_unconfigured(self):
+        """Test getting a logger attaches nothing to an unconfigured root logger"""
+        root_logger = logging.getLogger()
+        saved_handlers = root_logger.handlers[:]
+        root_logger.handlers = []
+        try:
+            get_logger('tests.logging_probe')
+            
+            # Assertions
+            self.assertEqual(root_logger.handlers, [])
+        finally:
+            root_logger.handlers = saved_handlers
+    
+    @override_settings(LOG_FILE=None)
+    def test_configure_logging_adds_one_queue_handler(self):
+        """Test configure_logging gives an unconfigured root logger one queued handler"""
+        root_logger = logging.getLogger()
+        saved_handlers = root_logger.handlers[:]
+        root_logger.handlers = []
+        try:
+            configure_logging()
+            configure_logging()
+            
+            # Assertions
+            self.assertEqual(len(root_logger.handlers), 1)
+            self.assertIsInstance(root_logger.handlers[0], QueueHandler)
+        finally:
+            root_logger.handlers = saved_handlers
+            _listeners.pop().stop()
+
+
+class TestMonthlyExpiration(unittest.TestCase):
+    """Test cases for monthly expiration lookup"""
+    
+    def test_inside_calendar_range(self):
+        """Test third Fridays and holiday rollback within the session range"""
+        expiration, trading_days = find_monthly_expiration(datetime(2026, 10, 1), NY)
+        self.assertEqual(expiration.date(), date(2026, 10, 16))
+        self.assertEqual(trading_days, 12)
+        
+        # Good Friday 2025 rolls back to Thursday
+        expiration, trading_days = find_monthly_expiration(datetime(2025, 4, 1), NY)
+        self.assertEqual(expiration.date(), date(2025, 4, 17))
+        self.assertEqual(trading_days, 13)
+    
+    def test_calendar_range_edges(self):
+        """Test the first and last months of the session range"""
+        sessions = _get_sessions("XNYS")
+        for edge in (sessions[0], sessions[-1]):
+            edge_day = edge.astype(date)
+            expiration, trading_days = find_monthly_expiration(datetime(edge_day.year, edge_day.month, 1), NY)
+            third_friday = _third_friday(edge_day.year, edge_day.month)
+            
+            # Assertions
+            self.assertIn(expiration.date(), (third_friday, third_friday - timedelta(days=1)))
+            self.assertGreater(trading_days, 0)
+    
+    def test_outside_calendar_range(self):
+        """Test months before and after the session range use the arithmetic third Friday"""
+        sessions = _get_sessions("XNYS")
+        after = (sessions[-1] + 200).astype(date)
+        before = (sessions[0] - 200).astype(date)
+        for day in (after, before):
+            start = datetime(day.year, day.month, 1)
+            expiration, trading_days = find_monthly_expiration(start, NY)
+            third_friday = _third_friday(day.year, day.month)
+            
+            # Assertions
+            self.assertEqual(expiration.date(), third_friday)
+            self.assertEqual(trading_days, np.busday_count(start.date(), third_friday + timedelta(days=1)))
+
+
+class TestBusinessDays(unittest.TestCase):
+    """Test cases for business day counts"""
+    
+    def test_array_matches_scalar(self):
+        """Test the array count matches the scalar count on mixed dates"""
+        start_dates = ['2026-10-14', '2026-12-31T15:00:00Z', datetime(2025, 4, 20), '2030-01-01', '2001-01-01', '2026-10-14']
+        end_dates = ['2026-10-20', '2026-12-20T09:00:00Z', datetime(2025, 4, 14), '2031-06-30', '2007-01-05', '2026-10-14']
+        
+        expected = [get_business_days_count(start, end) for start, end in zip(start_dates, end_dates)]
+        result = get_business_days_count_array(start_dates, end_dates)
+        
+        # Assertions
+        self.assertEqual(result.tolist(), expected)
+        # Reversed pair over Good Friday 2025 week; a same-day pair is one session
+        self.assertEqual(expected[2], 4)
+        self.assertEqual(expected[5], 1)
+
+
+class TestCachedResult(unittest.TestCase):
+    """Test cases for the shared result cache decorator"""
+    
+    def setUp(self):
+        """Start from an empty cache"""
+        cache.clear()
+    
+    def test_key_includes_generation_and_arguments(self):
+        """Test keys are built from the prefix, generation and bound arguments"""
+        func = MagicMock(return_value=[1, 2])
+        
+        @cached_result("test_prefix", ttl=60)
+        def lookup(symbol, timestamp=None, limit=10):
+            return func(symbol, timestamp, limit)
+        
+        lookup('_SPX', timestamp=datetime(2023, 5, 1, 15, 0))
+        
+        key = f"test_prefix:{snapshot_generation()}:symbol=_SPX:timestamp=2023-05-01T15:00:00:limit=10"
+        self.assertEqual(cache.get(key), [1, 2])
+    
+    def test_hit_and_miss(self):
+        """Test repeated calls hit the cache until the snapshot generation moves"""
+        func = MagicMock(return_value={'total_gamma': 1.5})
+        lookup = cached_result("test_prefix", ttl=60)(lambda symbol: func(symbol))
+        
+        self.assertEqual(lookup('_SPX'), {'total_gamma': 1.5})
+        self.assertEqual(lookup('_SPX'), {'total_gamma': 1.5})
+        self.assertEqual(func.call_count, 1)
+        
+        # Different arguments and a new generation are both misses
+        lookup('_NDX')
+        invalidate_snapshot_cache()
+        lookup('_SPX')
+        self.assertEqual(func.call_count, 3)
+    
+    def test_none_result_is_cached(self):
+        """Test a None result is served from the cache instead of recomputed"""
+        func = MagicMock(return_value=None)
+        lookup = cached_result("test_prefix", ttl=60)(lambda symbol: func(symbol))
+        
+        self.assertIsNone(lookup('_SPX'))
+        self.assertIsNone(lookup('_SPX'))
+        self.assertEqual(func.call_count, 1)
+
+
+class TestPerRequest(unittest.TestCase):
+    """Test cases for per-request memoization"""
+    
+    def test_memo_lasts_one_request(self):
+        """Test calls are memoized inside a request and not outside it"""
+        func = MagicMock(side_effect=lambda symbol, limit: (symbol, limit))
+        
+        @per_request
+        def lookup(symbol, limit=10):
+            return func(symbol, limit)
+        
+        def view(request):
+            first = lookup('_SPX', limit=5)
+            second = lookup('_SPX', limit=5)
+            lookup('_SPX', limit=10)
+            return first, second
+        
+        first, second = RequestCacheMiddleware(view)(MagicMock())
+        
+        # Assertions
+        self.assertEqual(first, ('_SPX', 5))
+        self.assertIs(first, second)
+        self.assertEqual(func.call_count, 2)
+        
+        # The memo is dropped with the request
+        RequestCacheMiddleware(view)(MagicMock())
+        self.assertEqual(func.call_count, 4)
+        lookup('_SPX', limit=5)
+        lookup('_SPX', limit=5)
+        self.assertEqual(func.call_count, 6)
+
+
+class TestFormatExpiryDates(unittest.TestCase):
+    """Test cases for expiry date formatting"""
+    
+    def _reference(self, expirations, tz):
+        """Row-by-row expiry columns, computed the way the original implementation did"""
+        today = datetime.now(tz)
+        calendar = xcals.get_calendar("XNYS")
+        
+        def business_days(expiration):
+            start, end = sorted([today, expiration])
+            try:
+                return calendar.sessions_in_range(start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")).size
+            except Exception:
+                return np.busday_count(np.datetime64(start.date()), np.datetime64(end.date()))
+        
+        current_month = today.replace(day=1)
+        next_month = (current_month + timedelta(days=32)).replace(day=1)
+        monthly = {find_monthly_expiration(month, tz.zone)[0].date() for month in (current_month, next_month)}
+        
+        rows = []
+        for expiration in expirations:
+            days = (expiration - today).total_seconds() / (24 * 60 * 60)
+            count = business_days(expiration)
+            if expiration.date() in monthly:
+                expiry_type = 'Monthly'
+            elif days < 1:
+                expiry_type = '0DTE'
+            elif count <= 5:
+                expiry_type = 'Weekly'
+            else:
+                expiry_type = 'Other'
+            rows.append((days, count, expiry_type))
+        return rows
+    
+    def test_matches_row_by_row_reference(self):
+        """Test the vectorized columns match the row-by-row ones over 120 days of expiries"""
+        tz = timezone(NY)
+        start = datetime.now(tz).date() - timedelta(days=3)
+        local = pd.DatetimeIndex([
+            tz.localize(datetime.combine(start + timedelta(days=offset), datetime.min.time()) + timedelta(hours=16))
+            for offset in range(120)
+        ])
+        expected = self._reference([timestamp.to_pydatetime() for timestamp in local], tz)
+        
+        # The same instants given in New York time and in UTC
+        for expirations in (local, local.tz_convert('UTC')):
+            result = format_expiry_dates(pd.DataFrame({'expiration_date': expirations}), tz)
+            
+            # Assertions
+            self.assertEqual(str(result['expiration_date'].dt.tz), NY)
+            self.assertEqual(result['business_days_till_expiry'].tolist(), [row[1] for row in expected])
+            self.assertEqual(result['expiry_type'].tolist(), [row[2] for row in expected])
+            np.testing.assert_allclose(result['days_till_expiry'], [row[0] for row in expected], atol=1e-5)
\ No newline at end of file